@@ -6,13 +6,29 @@ serialization, and type safety. All models must maintain compatibility with the
 site template's ProductSchema.
 """
 
-from pydantic import BaseModel, Field, HttpUrl
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, HttpUrl, PrivateAttr
+from typing import Any, List, Literal, Optional, Dict, Tuple
 from datetime import datetime
 from enum import Enum
 import re
 
 
+# Compiled once at import; _generate_slug runs for every product we emit
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
+
+# ASCII fast path: drop everything outside [\w\s-] and fold '-' into whitespace
+# so a single split/join collapses separator runs without the regex engine
+_SLUG_ASCII_TABLE = {
+    code: None
+    for code in range(128)
+    if not (chr(code).isalnum() or chr(code).isspace() or chr(code) in '_-')
+}
+_SLUG_ASCII_TABLE[ord('-')] = ' '
+
+_DIGITS = frozenset('0123456789')
+
+
 class AffiliateNetwork(str, Enum):
     """Supported affiliate networks."""
     AMAZON = "amazon"
@@ -20,6 +36,16 @@ class AffiliateNetwork(str, Enum):
     CJ = "cj"
 
 
+# Where a site's published products came from, reported as "source" in scrape results
+ScrapeSource = Literal[
+    "fresh_scrape",
+    "cached_data",
+    "cached_data_fallback",
+    "cached_validation_fallback",
+    "cached_error_fallback",
+]
+
+
 class ProductCard(BaseModel):
     """
     Product data structure - MUST match site template exactly.
@@ -51,24 +77,51 @@ class ScrapedProduct(BaseModel):
     scraped_at: datetime = Field(default_factory=datetime.now)
     validation_score: float = Field(..., ge=0.0, le=1.0)
     
+    # (scoring inputs, score) from the last calculate_quality_score call
+    _quality_score_cache: Optional[Tuple[Tuple[Any, ...], float]] = PrivateAttr(default=None)
+    
+    # (title, slug) from the last slug lookup
+    _slug_cache: Optional[Tuple[str, str]] = PrivateAttr(default=None)
+    
+    @property
+    def slug(self) -> str:
+        """SEO-friendly slug for the title, cached until the title changes."""
+        # Reason: keyed on the title for the same reason as the quality score cache;
+        # model_copy carries private state over and titles stay assignable
+        cached = self._slug_cache
+        if cached is not None and cached[0] == self.title:
+            return cached[1]
+        
+        slug = self._generate_slug(self.title)
+        self._slug_cache = (self.title, slug)
+        return slug
+    
     def to_product_card(self) -> ProductCard:
         """Convert to ProductCard format for final output."""
-        # Generate SEO-friendly slug
-        slug = self._generate_slug(self.title)
-        
         return ProductCard(
             title=self.title,
             price=self.price,
             affiliate_url=self.affiliate_url,
             image_url=self.processed_image_url or self.original_image_url,
-            slug=slug
+            slug=self.slug
         )
     
-    def _generate_slug(self, title: str) -> str:
+    @staticmethod
+    def _generate_slug(title: str) -> str:
         """Generate SEO-friendly slug from product title."""
         # Convert to lowercase and replace spaces/special chars with hyphens
-        slug = re.sub(r'[^\w\s-]', '', title.lower())
-        slug = re.sub(r'[-\s]+', '-', slug)
+        lowered = title.lower()
+        if lowered.isascii():
+            cleaned = lowered.translate(_SLUG_ASCII_TABLE)
+            slug = '-'.join(cleaned.split())
+            # Reason: keep the leading hyphen the regex path produces so the
+            # 50-char truncation below lands on the same boundary
+            if cleaned[:1].isspace():
+                slug = '-' + slug
+        else:
+            # \w is Unicode-aware, so non-ASCII titles keep the regex path
+            slug = _SLUG_STRIP_RE.sub('', lowered)
+            slug = _SLUG_DASH_RE.sub('-', slug)
         
         # Limit length and remove trailing hyphens
         return slug[:50].strip('-')
@@ -77,9 +130,24 @@ class ScrapedProduct(BaseModel):
         """
         Calculate product quality score based on data completeness and validity.
         
+        The result is cached until one of the scored fields changes.
+        
         Returns:
             float: Quality score between 0.0 and 1.0
         """
+        # Reason: fields stay assignable and model_copy carries private state over,
+        # so the cache is keyed on the inputs rather than trusted blindly
+        inputs = (self.title, self.price, self.affiliate_url, self.processed_image_url, self.original_image_url)
+        cached = self._quality_score_cache
+        if cached is not None and cached[0] == inputs:
+            return cached[1]
+        
+        score = self._score_fields()
+        self._quality_score_cache = (inputs, score)
+        return score
+    
+    def _score_fields(self) -> float:
+        """Score the title, price, URL and image fields (uncached)."""
         score = 0.0
         
         # Title quality (30% of score)
@@ -89,16 +157,15 @@ class ScrapedProduct(BaseModel):
             score += 0.15
             
         # Price validity (25% of score)
-        if self.price and any(char.isdigit() for char in self.price):
+        if self.price and not _DIGITS.isdisjoint(self.price):
             score += 0.25
             
-        # URL validity (25% of score) 
-        if self.affiliate_url and str(self.affiliate_url).startswith(('http://', 'https://')):
+        # URL validity (25% of score) - HttpUrl already guarantees an http(s) scheme
+        if self.affiliate_url:
             score += 0.25
             
         # Image URL validity (20% of score)
-        if (self.processed_image_url or self.original_image_url) and \
-           str(self.processed_image_url or self.original_image_url).startswith(('http://', 'https://')):
+        if self.processed_image_url or self.original_image_url:
             score += 0.2
             
         return round(score, 2)
@@ -128,8 +195,9 @@ class SiteConfig(BaseModel):
         if not self.last_scraped:
             return True
             
-        time_since_scrape = datetime.now() - self.last_scraped
-        return time_since_scrape.total_seconds() > (self.refresh_interval_hours * 3600)
+        # Compare epoch seconds directly; also works for timezone-aware last_scraped
+        seconds_since_scrape = datetime.now().timestamp() - self.last_scraped.timestamp()
+        return seconds_since_scrape > self.refresh_interval_hours * 3600
 
 
 class AgentDependencies(BaseModel):
@@ -140,6 +208,7 @@ class AgentDependencies(BaseModel):
     scraping_delay_seconds: float = Field(default=2.0, ge=0.5, le=10.0)
     max_retries: int = Field(default=3, ge=1, le=10)
     quality_threshold: float = Field(default=0.7, ge=0.0, le=1.0)
+    max_concurrent_scrapes: int = Field(default=4, ge=1, le=16)
     
 
 class ScrapingResult(BaseModel):
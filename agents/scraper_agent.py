@@ -5,20 +5,24 @@ This module implements the intelligent scraper agent that coordinates all tools
 to perform end-to-end affiliate product scraping with error recovery.
 """
 
+import asyncio
 import json
 import logging
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
+from pydantic import TypeAdapter
 from pydantic_ai import Agent, RunContext
 from pydantic_ai import ModelRetry
 
 from agents.models import (
     AgentDependencies, SiteConfig, ScrapingResult, 
-    ProductCard
+    ProductCard, ScrapeSource
 )
-from config.settings import settings
+from config import settings as config_settings
+from config.settings import ScraperSettings
 from tools.playwright_scraper import scrape_multiple_urls, test_url_accessibility
 from tools.image_processor import process_product_images
 from tools.data_validator import validate_and_score_products, convert_to_product_cards
@@ -29,9 +33,17 @@ from tools.state_manager import (
 
 logger = logging.getLogger(__name__)
 
-# Initialize the main scraper agent
+# Built once and reused so validators/serializers aren't rebuilt per call
+_PRODUCTS_ADAPTER = TypeAdapter(List[ProductCard])
+_SITE_CONFIG_ADAPTER = TypeAdapter(SiteConfig)
+
+# Default dependencies with the settings instance they were built from
+_default_agent_deps: Optional[Tuple[ScraperSettings, AgentDependencies]] = None
+
+# Initialize the main scraper agent; the model comes from settings on each run
+# (see agent_model) so importing this module doesn't load settings
 scraper_agent = Agent(
-    model=settings.get_llm_model_string(),
+    model=None,
     deps_type=AgentDependencies,
     system_prompt="""You are an intelligent affiliate product scraper. Your job is to:
 
@@ -76,7 +88,7 @@ async def scrape_site_products(
     Returns:
         Dictionary with scraping results and metadata
     """
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     site_name = site_config.get("site_name", "unknown")
     
     logger.info(f"Starting scrape for site: {site_name}")
@@ -84,7 +96,7 @@ async def scrape_site_products(
     try:
         # Parse site config
         try:
-            config = SiteConfig(**site_config)
+            config = _SITE_CONFIG_ADAPTER.validate_python(site_config)
         except Exception as e:
             raise ModelRetry(f"Invalid site configuration: {e}")
         
@@ -98,22 +110,23 @@ async def scrape_site_products(
                 logger.info(f"Using cached data for {site_name} due to consecutive failures")
                 
                 # Save the cached data as current output
-                await _save_products_to_file(cached_products, config.output_path)
-                
-                return {
-                    "success": True,
-                    "site_name": site_name,
-                    "total_products": len(cached_products),
-                    "source": "cached_data",
-                    "message": "Used cached data due to recent failures",
-                    "output_file": config.output_path
-                }
+                return await _publish_cached_products(
+                    site_name, cached_products, config.output_path,
+                    "cached_data", "Used cached data due to recent failures"
+                )
         
         # Test URL accessibility first
         logger.info("Testing URL accessibility...")
+        # Probes are independent network round-trips, so run them concurrently
+        probe_results = await asyncio.gather(
+            *(test_url_accessibility(ctx, str(url_config.url)) for url_config in config.urls_to_scrape),
+            return_exceptions=True
+        )
+        
         accessibility_results = []
-        for url_config in config.urls_to_scrape:
-            test_result = await test_url_accessibility(ctx, str(url_config.url))
+        for url_config, test_result in zip(config.urls_to_scrape, probe_results):
+            if isinstance(test_result, Exception):
+                test_result = {"accessible": False, "error": str(test_result), "issues": [repr(test_result)]}
             accessibility_results.append(test_result)
             
             if not test_result.get("accessible", False):
@@ -132,17 +145,9 @@ async def scrape_site_products(
         # Scrape products from accessible URLs
         logger.info(f"Scraping {len(accessible_urls)} accessible URLs...")
         
-        # Convert URLConfig objects to dictionaries for the tool
-        url_configs_dict = [
-            {
-                "url": str(url_config.url),
-                "platform": url_config.platform.value,
-                "category": url_config.category,
-                "expected_count": url_config.expected_count,
-                "custom_selectors": url_config.custom_selectors
-            }
-            for url_config in accessible_urls
-        ]
+        # Convert validated URLConfig objects to plain dicts for the tool in one
+        # serializer pass each (url -> str, platform -> value)
+        url_configs_dict = [url_config.model_dump(mode='json') for url_config in accessible_urls]
         
         scraped_products = await scrape_multiple_urls(ctx, url_configs_dict)
         
@@ -156,16 +161,10 @@ async def scrape_site_products(
             
             if use_cache and cached_products:
                 logger.info(f"No new products scraped, using cached data for {site_name}")
-                await _save_products_to_file(cached_products, config.output_path)
-                
-                return {
-                    "success": True,
-                    "site_name": site_name,
-                    "total_products": len(cached_products),
-                    "source": "cached_data_fallback",
-                    "message": "No new products found, used cached data",
-                    "output_file": config.output_path
-                }
+                return await _publish_cached_products(
+                    site_name, cached_products, config.output_path,
+                    "cached_data_fallback", "No new products found, used cached data"
+                )
             else:
                 raise ModelRetry(f"No products scraped and no cached data available for {site_name}")
         
@@ -179,16 +178,10 @@ async def scrape_site_products(
             cached_state = await load_last_good_state(ctx, site_name)
             if cached_state and cached_state.last_products:
                 logger.info("Using cached products due to validation failure")
-                await _save_products_to_file(cached_state.last_products, config.output_path)
-                
-                return {
-                    "success": True,
-                    "site_name": site_name,
-                    "total_products": len(cached_state.last_products),
-                    "source": "cached_validation_fallback",
-                    "message": "No products passed validation, used cached data",
-                    "output_file": config.output_path
-                }
+                return await _publish_cached_products(
+                    site_name, cached_state.last_products, config.output_path,
+                    "cached_validation_fallback", "No products passed validation, used cached data"
+                )
         
         # Process images
         logger.info(f"Processing images for {len(validated_products)} products...")
@@ -211,7 +204,7 @@ async def scrape_site_products(
         await _save_products_to_file(final_products, config.output_path)
         
         # Create scraping result
-        processing_time = (datetime.now() - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
         scraping_result = ScrapingResult(
             site_name=site_name,
             total_products_found=len(scraped_products),
@@ -255,16 +248,10 @@ async def scrape_site_products(
         
         if use_cache and cached_products:
             logger.info(f"Using cached data due to scraping error for {site_name}")
-            await _save_products_to_file(cached_products, config.output_path)
-            
-            return {
-                "success": True,
-                "site_name": site_name,
-                "total_products": len(cached_products),
-                "source": "cached_error_fallback",
-                "message": f"Scraping failed, used cached data: {str(e)}",
-                "output_file": config.output_path
-            }
+            return await _publish_cached_products(
+                site_name, cached_products, config.output_path,
+                "cached_error_fallback", f"Scraping failed, used cached data: {str(e)}"
+            )
         
         # No cached data available - return failure
         return {
@@ -292,24 +279,32 @@ async def generate_scraping_report(
     """
     try:
         total_sites = len(results)
-        successful_sites = len([r for r in results if r.get("success", False)])
-        total_products = sum(r.get("total_products", 0) for r in results)
-        
-        # Calculate statistics
-        avg_processing_time = sum(
-            r.get("processing_time_seconds", 0) for r in results
-        ) / total_sites if total_sites > 0 else 0
-        
-        avg_quality_score = sum(
-            r.get("quality_score", 0) for r in results if r.get("quality_score")
-        ) / len([r for r in results if r.get("quality_score")]) if results else 0
-        
-        # Source breakdown
+        successful_sites = 0
+        total_products = 0
+        total_processing_time = 0.0
+        quality_sum = 0.0
+        quality_count = 0
         source_breakdown: Dict[str, int] = {}
+        
+        # Accumulate all per-site statistics in a single pass
         for result in results:
+            if result.get("success", False):
+                successful_sites += 1
+            total_products += result.get("total_products", 0)
+            total_processing_time += result.get("processing_time_seconds", 0)
+            
+            # Only sites that reported a quality score count toward the average
+            quality_score = result.get("quality_score")
+            if quality_score:
+                quality_sum += quality_score
+                quality_count += 1
+            
             source = result.get("source", "unknown")
             source_breakdown[source] = source_breakdown.get(source, 0) + 1
         
+        avg_processing_time = total_processing_time / total_sites if total_sites > 0 else 0
+        avg_quality_score = quality_sum / quality_count if quality_count > 0 else 0
+        
         report = {
             "summary": {
                 "total_sites": total_sites,
@@ -339,11 +334,11 @@ async def _save_products_to_file(products: List[ProductCard], output_path: str)
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Convert products to dictionaries
-        products_data = [product.model_dump(mode='json') for product in products]
+        # Serialize models straight to UTF-8 JSON bytes (no intermediate dicts)
+        products_json = _PRODUCTS_ADAPTER.dump_json(products, indent=2)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(products_data, f, indent=2, ensure_ascii=False, default=str)
+        # Write in a worker thread so the event loop isn't blocked on disk I/O
+        await asyncio.to_thread(output_file.write_bytes, products_json)
         
         logger.info(f"Saved {len(products)} products to {output_path}")
         
@@ -352,6 +347,65 @@ async def _save_products_to_file(products: List[ProductCard], output_path: str)
         raise
 
 
+async def _publish_cached_products(
+    site_name: str,
+    products: List[ProductCard],
+    output_path: str,
+    source: ScrapeSource,
+    message: str
+) -> Dict[str, Any]:
+    """
+    Write cached products as the site's current output and build the tool result.
+    
+    Args:
+        site_name: Name of the site
+        products: Cached products to publish
+        output_path: Path to the site's output JSON file
+        source: Which cached-data path produced the result
+        message: Human-readable reason the cache was used
+        
+    Returns:
+        Scraping result dictionary
+    """
+    await _save_products_to_file(products, output_path)
+    
+    return {
+        "success": True,
+        "site_name": site_name,
+        "total_products": len(products),
+        "source": source,
+        "message": message,
+        "output_file": output_path
+    }
+
+
+def agent_model() -> str:
+    """LLM model string for scraper_agent runs, read from the current settings."""
+    return config_settings.settings.get_llm_model_string()
+
+
+def _get_default_agent_deps() -> AgentDependencies:
+    """
+    Default dependencies built from the current settings.
+    
+    Built on first use and reused until reload_settings() replaces the
+    settings instance, so they never outlive the settings they came from.
+    """
+    global _default_agent_deps
+    current_settings = config_settings.settings
+    if _default_agent_deps is None or _default_agent_deps[0] is not current_settings:
+        _default_agent_deps = (current_settings, AgentDependencies(
+            gcs_credentials_path=current_settings.gcs_credentials_path,
+            output_directory=current_settings.output_directory,
+            state_directory=current_settings.state_directory,
+            scraping_delay_seconds=current_settings.scraping_delay_seconds,
+            max_retries=current_settings.max_retries,
+            quality_threshold=current_settings.quality_threshold,
+            max_concurrent_scrapes=current_settings.max_concurrent_scrapes
+        ))
+    return _default_agent_deps[1]
+
+
 async def run_site_scraping(
     site_config_path: str,
     force_refresh: bool = False,
@@ -370,26 +424,20 @@ async def run_site_scraping(
     """
     # Load site configuration
     try:
-        with open(site_config_path, 'r', encoding='utf-8') as f:
-            site_config = json.load(f)
+        raw_config = await asyncio.to_thread(Path(site_config_path).read_bytes)
+        site_config = json.loads(raw_config)
     except Exception as e:
         return {"success": False, "error": f"Failed to load site config: {e}"}
     
-    # Create agent dependencies if not provided
+    # Fall back to the shared default dependencies if not provided
     if not agent_deps:
-        agent_deps = AgentDependencies(
-            gcs_credentials_path=settings.gcs_credentials_path,
-            output_directory=settings.output_directory,
-            state_directory=settings.state_directory,
-            scraping_delay_seconds=settings.scraping_delay_seconds,
-            max_retries=settings.max_retries,
-            quality_threshold=settings.quality_threshold
-        )
+        agent_deps = _get_default_agent_deps()
     
     # Run the scraping
     try:
         result = await scraper_agent.run(
             f"Scrape products for site: {site_config.get('site_name', 'unknown')}",
+            model=agent_model(),
             deps=agent_deps
         )
         
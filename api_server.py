@@ -5,14 +5,29 @@ Runs alongside the scraper to provide real-time access to product data.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Tuple
+from pydantic_core import from_json, to_json
 import uvicorn
 
-app = FastAPI(title="Affiliate Scraper API", version="1.0.0")
+
+class CoreJSONResponse(JSONResponse):
+    """JSON response encoded with pydantic-core's Rust serializer."""
+    
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+app = FastAPI(
+    title="Affiliate Scraper API",
+    version="1.0.0",
+    default_response_class=CoreJSONResponse
+)
+
+# Parsed and re-encoded product lists keyed by file path, invalidated when the file's mtime changes
+_products_cache: Dict[str, Tuple[float, List[Dict[str, Any]], bytes]] = {}
 
 # Configure CORS for your Vercel sites
 app.add_middleware(
@@ -57,12 +72,12 @@ async def get_sites():
     sites = []
     
     if output_dir.exists():
-        for json_file in output_dir.glob("*.json"):
-            site_name = json_file.stem.replace("-products", "")
+        for entry in _scan_json_files(output_dir):
+            site_name = entry.name[:-len(".json")].replace("-products", "")
             sites.append({
                 "name": site_name,
-                "file": json_file.name,
-                "last_updated": os.path.getmtime(json_file)
+                "file": entry.name,
+                "last_updated": entry.stat().st_mtime
             })
     
     return {"sites": sites, "count": len(sites)}
@@ -72,27 +87,32 @@ async def get_sites():
 async def get_all_products():
     """Get all products from all sites."""
     output_dir = Path("./output")
-    all_products = []
     
     if not output_dir.exists():
         return {"success": True, "data": [], "count": 0}
     
-    for json_file in output_dir.glob("*.json"):
+    # Collect each file's already-encoded product items rather than one merged list
+    fragments = []
+    count = 0
+    for entry in _scan_json_files(output_dir):
         try:
-            with open(json_file, 'r') as f:
-                data = json.load(f)
-                if isinstance(data, dict) and 'products' in data:
-                    all_products.extend(data['products'])
-                elif isinstance(data, list):
-                    all_products.extend(data)
+            products, encoded = _load_products(Path(entry.path), entry.stat().st_mtime)
         except Exception as e:
-            print(f"Error reading {json_file}: {e}")
+            print(f"Error reading {entry.path}: {e}")
+            continue
+        if products:
+            fragments.append(encoded[1:-1])  # Strip the enclosing [ ]
+            count += len(products)
     
-    return {
-        "success": True,
-        "data": all_products,
-        "count": len(all_products)
-    }
+    async def stream_body() -> AsyncIterator[bytes]:
+        yield b'{"success":true,"data":['
+        for i, fragment in enumerate(fragments):
+            if i:
+                yield b','
+            yield fragment
+        yield b'],"count":%d}' % count
+    
+    return StreamingResponse(stream_body(), media_type="application/json")
 
 
 @app.get("/products/{site_name}")
@@ -108,26 +128,67 @@ async def get_site_products(site_name: str):
         raise HTTPException(status_code=404, detail=f"No data found for site: {site_name}")
     
     try:
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-            
-        products = []
-        if isinstance(data, dict) and 'products' in data:
-            products = data['products']
-        elif isinstance(data, list):
-            products = data
+        last_updated = os.path.getmtime(json_path)
+        products, _ = _load_products(json_path, last_updated)
             
         return {
             "success": True,
             "site": site_name,
             "data": products,
             "count": len(products),
-            "last_updated": os.path.getmtime(json_path)
+            "last_updated": last_updated
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading data: {str(e)}")
 
 
+def _scan_json_files(directory: Path) -> List[os.DirEntry]:
+    """
+    List JSON files in a directory via scandir so each entry's stat is cached.
+    
+    Args:
+        directory: Directory to scan
+        
+    Returns:
+        DirEntry objects for regular files ending in .json
+    """
+    with os.scandir(directory) as entries:
+        return [
+            entry for entry in entries
+            if entry.name.endswith(".json") and not entry.name.startswith(".") and entry.is_file()
+        ]
+
+
+def _load_products(json_path: Path, mtime: float) -> Tuple[List[Dict[str, Any]], bytes]:
+    """
+    Load the product list from an output file, reusing the cached parse.
+    
+    Args:
+        json_path: Path to the site's JSON output file
+        mtime: Current modification time of the file
+        
+    Returns:
+        Tuple of (product dictionaries, products encoded as a JSON array)
+    """
+    cache_key = str(json_path)
+    cached = _products_cache.get(cache_key)
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+    
+    with open(json_path, 'rb') as f:
+        data = from_json(f.read())
+    
+    products = []
+    if isinstance(data, dict) and 'products' in data:
+        products = data['products']
+    elif isinstance(data, list):
+        products = data
+    
+    encoded = to_json(products)
+    _products_cache[cache_key] = (mtime, products, encoded)
+    return products, encoded
+
+
 if __name__ == "__main__":
     # Run the API server
     print("Starting Affiliate Scraper API on http://0.0.0.0:8000")
@@ -7,11 +7,28 @@ with sensible defaults for development and production environments.
 
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 import os
 from pathlib import Path
 
 
+_HEADLESS_BROWSER_ARGS = (
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+)
+
+# Additional args for headful mode on VM
+_HEADFUL_BROWSER_ARGS = _HEADLESS_BROWSER_ARGS + (
+    "--disable-gpu",
+    "--no-first-run",
+    "--disable-default-apps",
+)
+
+
 class ScraperSettings(BaseSettings):
     """Main configuration class for the affiliate scraper system."""
     
@@ -29,6 +46,8 @@ class ScraperSettings(BaseSettings):
     max_retries: int = Field(default=3, ge=1, le=10)
     quality_threshold: float = Field(default=0.7, ge=0.0, le=1.0)
     browser_headless: bool = Field(default=False, description="Run browser in headless mode")
+    max_concurrent_sites: int = Field(default=4, ge=1, le=16, description="Sites scraped in parallel by --all-sites")
+    max_concurrent_scrapes: int = Field(default=4, ge=1, le=16, description="URLs on different hosts scraped in parallel per site")
     
     # File System Configuration
     output_directory: str = Field(default="./output")
@@ -64,35 +83,26 @@ class ScraperSettings(BaseSettings):
             raise ValueError(f"LLM provider must be one of: {supported_providers}")
         return v
     
-    @validator("output_directory", "state_directory", "config_directory")
-    def create_directories(cls, v):
-        """Ensure directories exist, create if they don't."""
-        Path(v).mkdir(parents=True, exist_ok=True)
-        return v
+    def ensure_directories(self) -> None:
+        """
+        Create the output, state and config directories if they don't exist.
+        
+        Only the CLI calls this up front; every writer also creates its own
+        directory on first write, so other entry points don't depend on it.
+        """
+        for directory in (self.output_directory, self.state_directory, self.config_directory):
+            Path(directory).mkdir(parents=True, exist_ok=True)
     
     def get_llm_model_string(self) -> str:
         """Get the full LLM model string for Pydantic AI."""
         return f"{self.llm_provider}:{self.llm_model}"
     
-    def get_browser_args(self) -> list[str]:
+    def get_browser_args(self) -> tuple[str, ...]:
         """Get browser launch arguments for GCP VM."""
-        args = [
-            "--no-sandbox",
-            "--disable-dev-shm-usage",
-            "--disable-background-timer-throttling",
-            "--disable-backgrounding-occluded-windows",
-            "--disable-renderer-backgrounding"
-        ]
-        
-        if not self.browser_headless:
-            # Additional args for headful mode on VM
-            args.extend([
-                "--disable-gpu",
-                "--no-first-run",
-                "--disable-default-apps"
-            ])
-        
-        return args
+        # Reason: both variants are fixed, so return a prebuilt immutable tuple
+        if self.browser_headless:
+            return _HEADLESS_BROWSER_ARGS
+        return _HEADFUL_BROWSER_ARGS
 
 
 class TestSettings(ScraperSettings):
@@ -116,19 +126,32 @@ def get_settings(test_mode: bool = False) -> ScraperSettings:
     """
     Get the appropriate settings instance.
     
+    Instances are cached per mode, so .env parsing and validation only
+    happen once; use reload_settings() to pick up environment changes.
+    
     Args:
         test_mode: Whether to use test settings
         
     Returns:
         ScraperSettings instance
     """
-    if test_mode or os.getenv("SCRAPER_TEST_MODE", "").lower() == "true":
+    use_test_settings = test_mode or os.getenv("SCRAPER_TEST_MODE", "").lower() == "true"
+    return _build_settings(use_test_settings)
+
+
+@lru_cache(maxsize=2)
+def _build_settings(test_mode: bool) -> ScraperSettings:
+    """Construct and validate a settings instance for the given mode."""
+    if test_mode:
         return TestSettings()
     return ScraperSettings()
 
 
-# Global settings instance
-settings = get_settings()
+def __getattr__(name: str) -> Any:
+    """Resolve the global `settings` instance lazily on first access."""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def reload_settings(test_mode: bool = False) -> ScraperSettings:
@@ -142,5 +165,6 @@ def reload_settings(test_mode: bool = False) -> ScraperSettings:
         Fresh ScraperSettings instance
     """
     global settings
+    _build_settings.cache_clear()
     settings = get_settings(test_mode)
-    return settings
\ No newline at end of file
+    return settings
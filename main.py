@@ -8,57 +8,117 @@ supporting single-site scraping, batch operations, and maintenance tasks.
 
 import argparse
 import asyncio
-import json
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from config.settings import settings, reload_settings
+from pydantic_core import to_json
+
+from config import settings as config_settings
+from config.settings import reload_settings, ScraperSettings
 from agents.models import AgentDependencies
-from agents.scraper_agent import run_site_scraping, scraper_agent
+from agents.scraper_agent import agent_model, run_site_scraping, scraper_agent
 from tools.state_manager import get_state_summary, cleanup_old_state_files, export_state_backup
 from tools.image_processor import cleanup_old_images
-
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level.upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(settings.log_file) if settings.log_file else logging.NullHandler()
-    ]
-)
+from tools.browser_pool import BrowserPool
 
 logger = logging.getLogger(__name__)
 
+# Reason: logging.getLevelNamesMapping() is 3.11+, and the project supports 3.10
+_LOG_LEVELS = {
+    "CRITICAL": logging.CRITICAL,
+    "ERROR": logging.ERROR,
+    "WARNING": logging.WARNING,
+    "INFO": logging.INFO,
+    "DEBUG": logging.DEBUG,
+}
+
+
+def _configure_logging(active_settings: ScraperSettings) -> None:
+    """
+    Route all logging through a queue so coroutines never block on handler I/O.
+    
+    Called from main() once settings are final; the stream/file handlers run on
+    the QueueListener's background thread.
+    
+    Args:
+        active_settings: Settings providing log_level and log_file
+    """
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if active_settings.log_file:
+        handlers.append(logging.FileHandler(active_settings.log_file))
+    
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Reason: flush queued records before the interpreter exits (sys.exit included)
+    atexit.register(listener.stop)
+    
+    log_level = _LOG_LEVELS.get(active_settings.log_level.upper(), logging.INFO)
+    
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
 
 class ScraperCLI:
     """Command-line interface for the affiliate scraper."""
     
     def __init__(self):
+        config_settings.settings.ensure_directories()
         self.agent_deps = self._create_agent_dependencies()
+        # Reason: tool functions only read ctx.deps, so one shared context suffices
+        self._ctx = SimpleNamespace(deps=self.agent_deps)
+        self._site_index: Dict[str, Path] = {}
+        self.refresh_index()
+    
+    def refresh_index(self) -> None:
+        """Rebuild the site name -> config file index from the config directory."""
+        config_dir = Path(config_settings.settings.config_directory)
+        if not config_dir.exists():
+            self._site_index = {}
+            return
+        
+        # Reason: scandir entries carry their file type, avoiding a stat per config file
+        with os.scandir(config_dir) as entries:
+            self._site_index = {
+                entry.name[:-5]: Path(entry.path)
+                for entry in entries
+                if entry.name.endswith(".json") and entry.is_file()
+            }
     
     def _create_agent_dependencies(self) -> AgentDependencies:
         """Create AgentDependencies from settings."""
+        settings = config_settings.settings
         return AgentDependencies(
             gcs_credentials_path=settings.gcs_credentials_path,
             output_directory=settings.output_directory,
             state_directory=settings.state_directory,
             scraping_delay_seconds=settings.scraping_delay_seconds,
             max_retries=settings.max_retries,
-            quality_threshold=settings.quality_threshold
+            quality_threshold=settings.quality_threshold,
+            max_concurrent_scrapes=settings.max_concurrent_scrapes
         )
     
     async def scrape_site(self, site_name: str, force_refresh: bool = False) -> Dict[str, Any]:
         """Scrape a single site by name."""
-        site_config_path = Path(settings.config_directory) / f"{site_name}.json"
+        site_config_path = self._site_index.get(site_name)
         
-        if not site_config_path.exists():
+        if site_config_path is None:
             return {
                 "success": False,
-                "error": f"Site configuration not found: {site_config_path}"
+                "error": f"Site configuration not found: {Path(config_settings.settings.config_directory) / f'{site_name}.json'}"
             }
         
         logger.info(f"Starting scrape for site: {site_name}")
@@ -78,41 +138,44 @@ class ScraperCLI:
     
     async def scrape_all_sites(self, force_refresh: bool = False) -> List[Dict[str, Any]]:
         """Scrape all configured sites."""
-        config_dir = Path(settings.config_directory)
+        config_dir = Path(config_settings.settings.config_directory)
         
         if not config_dir.exists():
             logger.error(f"Config directory not found: {config_dir}")
             return [{"success": False, "error": "Config directory not found"}]
         
-        # Find all site configuration files
-        site_configs = list(config_dir.glob("*.json"))
-        
-        if not site_configs:
+        if not self._site_index:
             logger.warning(f"No site configurations found in {config_dir}")
             return [{"success": False, "error": "No site configurations found"}]
         
-        logger.info(f"Found {len(site_configs)} site configurations")
+        logger.info(f"Found {len(self._site_index)} site configurations")
         
-        results = []
+        # Sites are independent, so scrape several at once; per-request delays
+        # inside each site's scrape still apply
+        semaphore = asyncio.Semaphore(config_settings.settings.max_concurrent_sites)
         
-        for config_file in site_configs:
-            site_name = config_file.stem
-            logger.info(f"Processing site: {site_name}")
-            
-            try:
-                result = await self.scrape_site(site_name, force_refresh)
-                results.append(result)
-                
-                # Add delay between sites to be respectful
-                await asyncio.sleep(settings.scraping_delay_seconds * 2)
-                
-            except Exception as e:
-                logger.error(f"Failed to process site {site_name}: {e}")
+        async def scrape_with_limit(site_name: str) -> Dict[str, Any]:
+            async with semaphore:
+                logger.info(f"Processing site: {site_name}")
+                return await self.scrape_site(site_name, force_refresh)
+        
+        site_names = list(self._site_index)
+        outcomes = await asyncio.gather(
+            *(scrape_with_limit(site_name) for site_name in site_names),
+            return_exceptions=True
+        )
+        
+        results = []
+        for site_name, outcome in zip(site_names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed to process site {site_name}: {outcome}")
                 results.append({
                     "success": False,
                     "site_name": site_name,
-                    "error": str(e)
+                    "error": str(outcome)
                 })
+            else:
+                results.append(outcome)
         
         return results
     
@@ -121,6 +184,7 @@ class ScraperCLI:
         try:
             report_result = await scraper_agent.run(
                 "Generate a comprehensive scraping report",
+                model=agent_model(),
                 deps=self.agent_deps
             )
             
@@ -134,7 +198,7 @@ class ScraperCLI:
         """Show current status of all sites."""
         try:
             state_summary = await get_state_summary(
-                type('MockContext', (), {'deps': self.agent_deps})()
+                self._ctx
             )
             
             return state_summary
@@ -148,15 +212,16 @@ class ScraperCLI:
         try:
             # Clean up state files
             state_cleanup = await cleanup_old_state_files(
-                type('MockContext', (), {'deps': self.agent_deps})(),
+                self._ctx,
                 max_age_days=days
             )
             
             # Clean up images (if bucket configured)
             image_cleanup = {}
+            settings = config_settings.settings
             if hasattr(settings, 'gcs_bucket_name') and settings.gcs_bucket_name:
                 image_cleanup = await cleanup_old_images(
-                    type('MockContext', (), {'deps': self.agent_deps})(),
+                    self._ctx,
                     bucket_name=settings.gcs_bucket_name,
                     days_old=days
                 )
@@ -174,7 +239,7 @@ class ScraperCLI:
         """Create a backup of all state data."""
         try:
             backup_file = await export_state_backup(
-                type('MockContext', (), {'deps': self.agent_deps})(),
+                self._ctx,
                 backup_path=backup_path
             )
             
@@ -262,13 +327,15 @@ Examples:
     
     args = parser.parse_args()
     
+    active_settings = reload_settings(test_mode=True) if args.test_mode else config_settings.settings
+    _configure_logging(active_settings)
+    
     # Reload settings if custom config provided
     if args.config:
         # This would require modifying settings to accept custom config
         logger.info(f"Using custom config: {args.config}")
     
     if args.test_mode:
-        reload_settings(test_mode=True)
         logger.info("Running in test mode")
     
     cli = ScraperCLI()
@@ -291,9 +358,9 @@ Examples:
             report = await cli.generate_report(results)
             
             # Save report to file
-            report_file = Path(settings.output_directory) / f"scraping_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2, default=str)
+            report_file = Path(config_settings.settings.output_directory) / f"scraping_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            await asyncio.to_thread(report_file.parent.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread(report_file.write_bytes, to_json(report, indent=2, fallback=str))
             
             print(f"\nDetailed report saved to: {report_file}")
             
@@ -307,7 +374,7 @@ Examples:
             print(f"\n{'='*60}")
             print("SYSTEM STATUS")
             print(f"{'='*60}")
-            print(json.dumps(status, indent=2, default=str))
+            print(to_json(status, indent=2, fallback=str).decode())
             
         elif args.cleanup:
             # Clean up old data
@@ -315,7 +382,7 @@ Examples:
             print(f"\n{'='*60}")
             print("CLEANUP RESULTS")
             print(f"{'='*60}")
-            print(json.dumps(cleanup_results, indent=2, default=str))
+            print(to_json(cleanup_results, indent=2, fallback=str).decode())
             
         elif args.backup:
             # Create backup
@@ -337,6 +404,9 @@ Examples:
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        # The shared browser outlives individual scrapes; close it before the loop ends
+        await BrowserPool.shutdown()
 
 
 if __name__ == "__main__":
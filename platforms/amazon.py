@@ -9,11 +9,75 @@ from typing import List, Dict, Any, Optional
 from playwright.async_api import Page
 import re
 import asyncio
-import random
 
 from .base import BasePlatformScraper, ProductExtractionError
 from agents.models import AffiliateNetwork
 
+# Compiled once at import; these run for every product/URL we handle
+_ASIN_RE = re.compile(r'/dp/([A-Z0-9]{10})')
+_PRICE_NUMBER_RE = re.compile(r'[\d,]+\.?\d*')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_DIGITS = frozenset('0123456789')
+_IMAGE_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'webp'})
+
+# Amazon renders prices in several formats; matched as one compound selector so
+# the browser resolves all of them in a single query (first hit in document order)
+_PRICE_SELECTOR = ", ".join([
+    ".a-price-whole",
+    ".a-price .a-offscreen",
+    ".a-price-range .a-offscreen",
+    ".a-price-symbol + .a-price-whole",
+    ".a-text-price .a-offscreen",
+])
+
+# Reads every product container's fields in one browser round-trip instead of
+# several query_selector/get_attribute calls per product
+_EXTRACT_PRODUCTS_JS = """
+({selectors, priceSelector, limit}) => {
+    const containers = document.querySelectorAll(selectors.product_container);
+    const items = [];
+    for (const container of Array.from(containers).slice(0, limit)) {
+        const titleEl = container.querySelector(selectors.title);
+        const imageEl = container.querySelector(selectors.image);
+        const linkEl = container.querySelector(selectors.link);
+        
+        let price = "";
+        for (const priceEl of container.querySelectorAll(priceSelector)) {
+            const text = priceEl.textContent ? priceEl.textContent.trim() : "";
+            if (/[0-9$]/.test(text)) {
+                price = text;
+                break;
+            }
+        }
+        
+        let image = imageEl ? imageEl.getAttribute("src") : null;
+        if (imageEl && (!image || image.includes("data:image"))) {
+            image = imageEl.getAttribute("data-src");
+        }
+        
+        items.push({
+            title: titleEl ? titleEl.textContent : "",
+            price: price,
+            image: image || "",
+            link: linkEl ? linkEl.getAttribute("href") || "" : ""
+        });
+    }
+    return {total: containers.length, items: items};
+}
+"""
+
+# Counts product images and how many already resolved a source
+_IMAGE_READINESS_JS = """
+() => {
+    const images = document.querySelectorAll("[data-component-type='s-search-result'] img");
+    let loaded = 0;
+    images.forEach(image => { if (image.currentSrc || image.src) loaded++; });
+    return [images.length, loaded];
+}
+"""
+_IMAGES_READY_RATIO = 0.8
+
 
 class AmazonScraper(BasePlatformScraper):
     """
@@ -67,26 +131,21 @@ class AmazonScraper(BasePlatformScraper):
             # Wait for Amazon's dynamic content to load
             await self._handle_amazon_loading(page)
             
-            # Find all product containers
-            containers = await page.query_selector_all(selectors["product_container"])
-            self.logger.info(f"Found {len(containers)} product containers on Amazon")
+            # Pull all container fields in a single evaluate call
+            extracted = await page.evaluate(
+                _EXTRACT_PRODUCTS_JS,
+                {"selectors": selectors, "priceSelector": _PRICE_SELECTOR, "limit": expected_count}
+            )
+            self.logger.info(f"Found {extracted['total']} product containers on Amazon")
             
-            if not containers:
+            if not extracted["total"]:
                 raise ProductExtractionError("No product containers found on Amazon page")
             
             products = []
-            for i, container in enumerate(containers[:expected_count]):
-                try:
-                    product_data = await self._extract_single_product(container, selectors, page)
-                    if product_data:
-                        products.append(product_data)
-                        
-                    # Random delay between products to avoid detection
-                    await asyncio.sleep(random.uniform(0.1, 0.3))
-                    
-                except Exception as e:
-                    self.logger.warning(f"Failed to extract product {i}: {e}")
-                    continue
+            for item in extracted["items"]:
+                product_data = self._build_product_data(item)
+                if product_data:
+                    products.append(product_data)
             
             self.logger.info(f"Successfully extracted {len(products)} products from Amazon")
             return products
@@ -109,6 +168,12 @@ class AmazonScraper(BasePlatformScraper):
             if await page.query_selector(captcha_selector):
                 raise ProductExtractionError("Amazon bot detection triggered - CAPTCHA required")
             
+            # Skip the networkidle wait when product images already have sources;
+            # on ad-heavy result pages it routinely runs to the full timeout
+            total_images, loaded_images = await page.evaluate(_IMAGE_READINESS_JS)
+            if total_images and loaded_images >= _IMAGES_READY_RATIO * total_images:
+                return
+            
             # Wait for images to load (Amazon loads them dynamically)
             await page.wait_for_load_state("networkidle", timeout=10000)
             
@@ -119,82 +184,28 @@ class AmazonScraper(BasePlatformScraper):
         except Exception as e:
             self.logger.warning(f"Amazon loading handling issue: {e}")
     
-    async def _extract_single_product(
-        self, 
-        container, 
-        selectors: Dict[str, str], 
-        page: Page
-    ) -> Optional[Dict[str, Any]]:
-        """Extract data from a single Amazon product container."""
-        try:
-            # Extract title
-            title_element = await container.query_selector(selectors["title"])
-            title = ""
-            if title_element:
-                title = await title_element.text_content()
-                title = title.strip() if title else ""
-            
-            # Extract price - Amazon has multiple price formats
-            price = await self._extract_amazon_price(container, selectors)
-            
-            # Extract image URL
-            image_element = await container.query_selector(selectors["image"])
-            image_url = ""
-            if image_element:
-                # Try src first, then data-src for lazy loaded images
-                image_url = await image_element.get_attribute("src")
-                if not image_url or "data:image" in image_url:
-                    image_url = await image_element.get_attribute("data-src") or ""
-            
-            # Extract product link
-            link_element = await container.query_selector(selectors["link"])
-            link = ""
-            if link_element:
-                link = await link_element.get_attribute("href")
-                if link and link.startswith("/"):
-                    link = f"https://www.amazon.com{link}"
-            
-            # Basic validation
-            if not all([title, price, image_url, link]):
-                self.logger.debug(f"Incomplete product data: title={bool(title)}, price={bool(price)}, image={bool(image_url)}, link={bool(link)}")
-                return None
-            
-            return {
-                "title": title,
-                "price": price,
-                "image": image_url,
-                "link": link,
-                "platform": "amazon"
-            }
-            
-        except Exception as e:
-            self.logger.warning(f"Failed to extract single Amazon product: {e}")
-            return None
-    
-    async def _extract_amazon_price(self, container, selectors: Dict[str, str]) -> str:
-        """Extract price from Amazon's various price formats."""
-        price_selectors = [
-            ".a-price-whole",
-            ".a-price .a-offscreen", 
-            ".a-price-range .a-offscreen",
-            ".a-price-symbol + .a-price-whole",
-            ".a-text-price .a-offscreen"
-        ]
+    def _build_product_data(self, item: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """Normalize one container's raw fields from the page into product data."""
+        title = (item.get("title") or "").strip()
+        price = item.get("price") or ""
+        image_url = item.get("image") or ""
         
-        for price_selector in price_selectors:
-            try:
-                price_element = await container.query_selector(price_selector)
-                if price_element:
-                    price_text = await price_element.text_content()
-                    if price_text and price_text.strip():
-                        # Clean up the price text
-                        price = price_text.strip()
-                        if "$" in price or any(c.isdigit() for c in price):
-                            return price
-            except Exception:
-                continue
+        link = item.get("link") or ""
+        if link.startswith("/"):
+            link = f"https://www.amazon.com{link}"
         
-        return ""
+        # Basic validation
+        if not all([title, price, image_url, link]):
+            self.logger.debug(f"Incomplete product data: title={bool(title)}, price={bool(price)}, image={bool(image_url)}, link={bool(link)}")
+            return None
+        
+        return {
+            "title": title,
+            "price": price,
+            "image": image_url,
+            "link": link,
+            "platform": "amazon"
+        }
     
     def validate_product_data(self, product_data: Dict[str, Any]) -> bool:
         """Validate Amazon product data."""
@@ -212,12 +223,13 @@ class AmazonScraper(BasePlatformScraper):
         
         # Validate price contains currency or numbers
         price = product_data["price"]
-        if not (any(c.isdigit() for c in price) or "$" in price):
+        if _DIGITS.isdisjoint(price) and "$" not in price:
             return False
         
-        # Validate image URL
+        # Validate image URL - check the path's extension, ignoring any query string
         image_url = product_data["image"]
-        if not (image_url.startswith("http") and any(ext in image_url.lower() for ext in [".jpg", ".jpeg", ".png", ".webp"])):
+        extension = image_url.split("?", 1)[0].rsplit(".", 1)[-1].lower()
+        if not (image_url.startswith("http") and extension in _IMAGE_EXTENSIONS):
             return False
         
         # Validate Amazon link
@@ -240,14 +252,14 @@ class AmazonScraper(BasePlatformScraper):
             price = price.split(" - ")[0]
         
         # Ensure dollar sign is present
-        if "$" not in price and any(c.isdigit() for c in price):
+        if "$" not in price and not _DIGITS.isdisjoint(price):
             # Try to extract just the numeric part and add $
-            numbers = re.findall(r'[\d,]+\.?\d*', price)
+            numbers = _PRICE_NUMBER_RE.findall(price)
             if numbers:
                 price = f"${numbers[0]}"
         
         # Clean up common formatting issues
-        price = re.sub(r'\s+', ' ', price)  # Normalize whitspace
+        price = _WHITESPACE_RE.sub(' ', price)  # Normalize whitspace
         price = price.replace('$ ', '$')     # Remove space after $
         
         return price
@@ -258,7 +270,7 @@ class AmazonScraper(BasePlatformScraper):
             return ""
         
         # Extract ASIN or product ID from URL
-        asin_match = re.search(r'/dp/([A-Z0-9]{10})', original_url)
+        asin_match = _ASIN_RE.search(original_url)
         if not asin_match:
             # Fallback: just add affiliate tag to existing URL
             separator = "&" if "?" in original_url else "?"
@@ -6,14 +6,83 @@ ensuring consistent behavior across Amazon, Rakuten, CJ, and future platforms.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from playwright.async_api import Page
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, FrozenSet, Tuple
+from urllib.parse import urlparse
+from playwright.async_api import Page, Route
 from agents.models import ScrapedProduct, AffiliateNetwork
-from pydantic import HttpUrl
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Browser context options shared by every scraping context
+DEFAULT_CONTEXT_OPTIONS: Dict[str, Any] = {
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "viewport": {"width": 1920, "height": 1080},
+    "locale": "en-US",
+    "timezone_id": "America/New_York",
+}
+
+# Resource types extraction never reads: product image URLs come from element
+# attributes, so the image bytes themselves don't need to be downloaded
+DEFAULT_BLOCKED_RESOURCE_TYPES: FrozenSet[str] = frozenset({"image", "font", "media"})
+
+# Analytics/ad hosts (and their subdomains) whose requests are always aborted
+_TRACKER_HOSTS = frozenset({
+    "doubleclick.net",
+    "google-analytics.com",
+    "googlesyndication.com",
+    "googletagmanager.com",
+    "facebook.net",
+    "scorecardresearch.com",
+})
+_TRACKER_HOST_SUFFIXES = tuple(f".{host}" for host in _TRACKER_HOSTS)
+
+# Resolves a selector through a per-document element cache and reads its text,
+# or the given attribute, in the same call; a new document gets a fresh window
+# (and cache), and detached elements are looked up again
+_CACHED_QUERY_JS = """
+({selector, attribute}) => {
+    const cache = window.__scraperQueryCache || (window.__scraperQueryCache = new Map());
+    let element = cache.get(selector);
+    if (!element || !element.isConnected) {
+        element = document.querySelector(selector);
+        if (!element) return null;
+        cache.set(selector, element);
+    }
+    return attribute ? element.getAttribute(attribute) : element.textContent;
+}
+"""
+
+
+@lru_cache(maxsize=8192)
+def _build_scraped_product(
+    title: str,
+    price: str,
+    affiliate_url: str,
+    image_url: str,
+    category: str,
+    platform: AffiliateNetwork
+) -> ScrapedProduct:
+    """Validate a ScrapedProduct and score it; cached, so callers must copy it."""
+    # Create ScrapedProduct; the model validates the affiliate URL itself,
+    # so it's passed as a plain string rather than pre-built as HttpUrl
+    scraped_product = ScrapedProduct(
+        title=title,
+        price=price,
+        affiliate_url=affiliate_url,
+        original_image_url=image_url,
+        category=category,
+        platform=platform,
+        validation_score=0.0  # Will be calculated
+    )
+    
+    # Calculate and set quality score
+    scraped_product.validation_score = scraped_product.calculate_quality_score()
+    
+    return scraped_product
+
 
 class PlatformScraperError(Exception):
     """Base exception for platform scraper errors."""
@@ -33,6 +102,10 @@ class BasePlatformScraper(ABC):
     platform-specific scraping logic while maintaining consistent behavior.
     """
     
+    # Request types aborted by route_request; a platform that needs them loaded
+    # (e.g. to read rendered image sizes) overrides this with a smaller set
+    blocked_resource_types: FrozenSet[str] = DEFAULT_BLOCKED_RESOURCE_TYPES
+    
     def __init__(self, platform: AffiliateNetwork):
         """
         Initialize the platform scraper.
@@ -42,6 +115,25 @@ class BasePlatformScraper(ABC):
         """
         self.platform = platform
         self.logger = logging.getLogger(f"{__name__}.{platform.value}")
+        self._selector_cache: Dict[Optional[frozenset], Dict[str, str]] = {}
+        self._fallback_cache: Dict[Optional[frozenset], Dict[str, Tuple[str, ...]]] = {}
+    
+    async def route_request(self, route: Route) -> None:
+        """
+        Abort requests for heavy resources and trackers; let everything else through.
+        
+        Install with `await page.route("**/*", scraper.route_request)`.
+        """
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        if (
+            request.resource_type in self.blocked_resource_types
+            or host in _TRACKER_HOSTS
+            or host.endswith(_TRACKER_HOST_SUFFIXES)
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
     
     @property
     @abstractmethod
@@ -122,21 +214,59 @@ class BasePlatformScraper(ABC):
         """
         pass
     
+    @staticmethod
+    def clear_product_cache() -> None:
+        """Drop cached ScrapedProduct models built by extract_and_validate_products."""
+        _build_scraped_product.cache_clear()
+    
     def get_selectors(self, custom_selectors: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
         Get selectors, preferring custom over defaults.
         
+        Merged dictionaries are cached per distinct set of custom selectors, so
+        repeat scrapes of the same site reuse them; callers must not mutate them.
+        
         Args:
             custom_selectors: Optional custom selectors
             
         Returns:
             Combined selector dictionary
         """
-        selectors = self.default_selectors.copy()
-        if custom_selectors:
-            selectors.update(custom_selectors)
+        key = frozenset(custom_selectors.items()) if custom_selectors else None
+        selectors = self._selector_cache.get(key)
+        if selectors is None:
+            selectors = self.default_selectors.copy()
+            if custom_selectors:
+                selectors.update(custom_selectors)
+            self._selector_cache[key] = selectors
         return selectors
     
+    def get_selector_fallbacks(
+        self,
+        custom_selectors: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Tuple[str, ...]]:
+        """
+        Get selectors split into their ordered fallback lists.
+        
+        Each ", "-separated selector string becomes a de-duplicated tuple of
+        individual selectors, parsed once per distinct set of custom selectors.
+        
+        Args:
+            custom_selectors: Optional custom selectors
+            
+        Returns:
+            Selector fallbacks keyed by field name
+        """
+        key = frozenset(custom_selectors.items()) if custom_selectors else None
+        fallbacks = self._fallback_cache.get(key)
+        if fallbacks is None:
+            fallbacks = {
+                field: tuple(dict.fromkeys(selector.strip() for selector in value.split(", ")))
+                for field, value in self.get_selectors(custom_selectors).items()
+            }
+            self._fallback_cache[key] = fallbacks
+        return fallbacks
+    
     async def safe_extract_text(self, page: Page, selector: str, default: str = "") -> str:
         """
         Safely extract text from an element, returning default if not found.
@@ -150,11 +280,8 @@ class BasePlatformScraper(ABC):
             Extracted text or default
         """
         try:
-            element = await page.query_selector(selector)
-            if element:
-                text = await element.text_content()
-                return text.strip() if text else default
-            return default
+            text = await page.evaluate(_CACHED_QUERY_JS, {"selector": selector, "attribute": None})
+            return text.strip() if text else default
         except Exception as e:
             self.logger.warning(f"Failed to extract text with selector '{selector}': {e}")
             return default
@@ -179,11 +306,8 @@ class BasePlatformScraper(ABC):
             Extracted attribute value or default
         """
         try:
-            element = await page.query_selector(selector)
-            if element:
-                attr_value = await element.get_attribute(attribute)
-                return attr_value.strip() if attr_value else default
-            return default
+            attr_value = await page.evaluate(_CACHED_QUERY_JS, {"selector": selector, "attribute": attribute})
+            return attr_value.strip() if attr_value else default
         except Exception as e:
             self.logger.warning(f"Failed to extract attribute '{attribute}' with selector '{selector}': {e}")
             return default
@@ -197,16 +321,16 @@ class BasePlatformScraper(ABC):
             timeout: Maximum time to wait in seconds
         """
         try:
-            # Wait for product containers to be visible
+            await page.wait_for_load_state("domcontentloaded", timeout=timeout * 1000)
+            
+            # Wait for product containers to be in the DOM; network idle is not
+            # awaited since analytics traffic keeps it busy long after render
             await page.wait_for_selector(
                 self.default_selectors["product_container"], 
-                state="visible",
+                state="attached",
                 timeout=timeout * 1000
             )
             
-            # Additional wait for dynamic content
-            await page.wait_for_load_state("networkidle", timeout=timeout * 1000)
-            
         except Exception as e:
             self.logger.warning(f"Timeout waiting for products to load: {e}")
             # Continue anyway, might still be able to extract some products
@@ -272,19 +396,16 @@ class BasePlatformScraper(ABC):
                     self.logger.warning(f"Invalid product data: {product_data}")
                     continue
                 
-                # Create ScrapedProduct
-                scraped_product = ScrapedProduct(
-                    title=product_data["title"],
-                    price=self.clean_price(product_data["price"]),
-                    affiliate_url=HttpUrl(self.build_affiliate_url(product_data["link"])),
-                    original_image_url=product_data["image"],
-                    category=category,
-                    platform=self.platform,
-                    validation_score=0.0  # Will be calculated
-                )
-                
-                # Calculate and set quality score
-                scraped_product.validation_score = scraped_product.calculate_quality_score()
+                # Products recur across pages and recrawls, so validated models are
+                # cached; each caller gets its own copy with a fresh scrape time
+                scraped_product = _build_scraped_product(
+                    product_data["title"],
+                    self.clean_price(product_data["price"]),
+                    self.build_affiliate_url(product_data["link"]),
+                    product_data["image"],
+                    category,
+                    self.platform
+                ).model_copy(update={"scraped_at": datetime.now()})
                 
                 validated_products.append(scraped_product)
                 
@@ -5,16 +5,85 @@ This module implements the CJ affiliate network scraper for various merchant sit
 that participate in the CJ affiliate program.
 """
 
+from functools import cached_property, lru_cache
 from typing import List, Dict, Any, Optional
 from playwright.async_api import Page
 import re
-import asyncio
-import random
-from urllib.parse import urlparse
 
 from .base import BasePlatformScraper, ProductExtractionError
 from agents.models import AffiliateNetwork
 
+# Compiled once at import; these run for every extracted product
+_DOLLAR_PRICE_RE = re.compile(r'\$[\d,]+\.?\d*')
+_PRICE_NUMBER_RE = re.compile(r'[\d,]+\.?\d*')
+
+_DIGITS = frozenset('0123456789')
+_IS_HTTP_URL = re.compile(r'^https?://').match
+
+# Runs over every product container in the browser and applies each field's
+# fallback selectors, so a whole page costs one round-trip instead of several
+# query_selector/text_content/get_attribute calls per product
+_EXTRACT_PRODUCTS_JS = """
+(containers, {fallbacks, limit}) => {
+    const pickText = (container, selectorList) => {
+        for (const selector of selectorList) {
+            try {
+                const element = container.querySelector(selector);
+                const text = element && element.textContent ? element.textContent.trim() : "";
+                if (text) return text;
+            } catch (e) {}
+        }
+        return "";
+    };
+    
+    const pickImage = (container, selectorList) => {
+        for (const selector of selectorList) {
+            try {
+                const element = container.querySelector(selector);
+                if (!element) continue;
+                for (const attr of ["src", "data-src", "data-lazy-src"]) {
+                    const value = element.getAttribute(attr);
+                    if (value && (value.startsWith("http://") || value.startsWith("https://"))) return value;
+                }
+            } catch (e) {}
+        }
+        return "";
+    };
+    
+    const pickLink = (container, selectorList) => {
+        for (const selector of selectorList) {
+            try {
+                const element = container.querySelector(selector);
+                const href = element ? element.getAttribute("href") : null;
+                if (href) return new URL(href, location.href).href;
+            } catch (e) {}
+        }
+        return "";
+    };
+    
+    return {
+        total: containers.length,
+        items: containers.slice(0, limit).map(container => ({
+            title: pickText(container, fallbacks.title),
+            price: pickText(container, fallbacks.price),
+            image: pickImage(container, fallbacks.image),
+            link: pickLink(container, fallbacks.link)
+        }))
+    };
+}
+"""
+
+
+@lru_cache(maxsize=4096)
+def _build_cj_affiliate_url(original_url: str, affiliate_id: str) -> str:
+    """Append CJ tracking parameters; cached since crawls revisit the same URLs."""
+    # CJ uses click tracking URLs
+    # This is a simplified version - actual CJ links are more complex
+    separator = "&" if "?" in original_url else "?"
+    affiliate_params = f"cjevent=cj_affiliate_{affiliate_id}"
+    
+    return f"{original_url}{separator}{affiliate_params}"
+
 
 class CJScraper(BasePlatformScraper):
     """
@@ -32,9 +101,9 @@ class CJScraper(BasePlatformScraper):
     def platform_name(self) -> str:
         return "Commission Junction"
     
-    @property
+    @cached_property
     def default_selectors(self) -> Dict[str, str]:
-        """Default selectors for CJ merchant sites."""
+        """Default selectors for CJ merchant sites (built once per instance)."""
         return {
             "product_container": ".product, .item, .deal-item, .product-item",
             "title": ".product-title, .item-title, .deal-title, h3, h4",
@@ -67,26 +136,24 @@ class CJScraper(BasePlatformScraper):
             # Wait for content to load
             await self._handle_cj_loading(page)
             
-            # Find all product containers
-            containers = await page.query_selector_all(selectors["product_container"])
-            self.logger.info(f"Found {len(containers)} product containers on CJ merchant site")
+            # Extract every container's fields in a single evaluate call
+            fallbacks = self.get_selector_fallbacks(custom_selectors)
+            # Reason: a locator keeps Playwright selector syntax working for custom
+            # container selectors, unlike document.querySelectorAll
+            extracted = await page.locator(selectors["product_container"]).evaluate_all(
+                _EXTRACT_PRODUCTS_JS,
+                {"fallbacks": fallbacks, "limit": expected_count}
+            )
+            self.logger.info(f"Found {extracted['total']} product containers on CJ merchant site")
             
-            if not containers:
+            if not extracted["total"]:
                 raise ProductExtractionError("No product containers found on CJ merchant page")
             
-            products = []
-            for i, container in enumerate(containers[:expected_count]):
-                try:
-                    product_data = await self._extract_single_product(container, selectors, page)
-                    if product_data:
-                        products.append(product_data)
-                        
-                    # Delay between products
-                    await asyncio.sleep(random.uniform(0.3, 0.7))
-                    
-                except Exception as e:
-                    self.logger.warning(f"Failed to extract CJ product {i}: {e}")
-                    continue
+            products = [
+                {**item, "platform": "cj"}
+                for item in extracted["items"]
+                if all([item["title"], item["price"], item["image"], item["link"]])
+            ]
             
             self.logger.info(f"Successfully extracted {len(products)} products from CJ merchant")
             return products
@@ -97,127 +164,43 @@ class CJScraper(BasePlatformScraper):
     async def _handle_cj_loading(self, page: Page) -> None:
         """Handle CJ merchant site loading."""
         try:
-            # Wait for product containers with longer timeout (CJ sites can be slow)
+            await page.wait_for_load_state("domcontentloaded")
+            
+            # Wait for product containers with longer timeout (CJ sites can be slow).
+            # Reason: extraction reads the DOM directly, so containers only need to be
+            # attached; waiting for paint or network idle just waits on trackers
             await page.wait_for_selector(
                 self.default_selectors["product_container"],
-                state="visible",
+                state="attached",
                 timeout=20000
             )
             
-            # Wait for network idle
-            await page.wait_for_load_state("networkidle", timeout=15000)
-            
         except Exception as e:
             self.logger.warning(f"CJ loading handling issue: {e}")
     
-    async def _extract_single_product(
-        self,
-        container,
-        selectors: Dict[str, str],
-        page: Page
-    ) -> Optional[Dict[str, Any]]:
-        """Extract data from a single CJ product container."""
-        try:
-            # Extract title using multiple possible selectors
-            title = await self._extract_with_fallbacks(container, selectors["title"].split(", "))
-            
-            # Extract price
-            price = await self._extract_with_fallbacks(container, selectors["price"].split(", "))
-            
-            # Extract image
-            image_url = await self._extract_image(container, selectors["image"].split(", "))
-            
-            # Extract link
-            link = await self._extract_link(container, selectors["link"].split(", "), page)
-            
-            # Basic validation
-            if not all([title, price, image_url, link]):
-                return None
-            
-            return {
-                "title": title,
-                "price": price,
-                "image": image_url,
-                "link": link,
-                "platform": "cj"
-            }
-            
-        except Exception as e:
-            self.logger.warning(f"Failed to extract single CJ product: {e}")
-            return None
-    
-    async def _extract_with_fallbacks(self, container, selectors: List[str]) -> str:
-        """Extract text using fallback selectors."""
-        for selector in selectors:
-            try:
-                element = await container.query_selector(selector.strip())
-                if element:
-                    text = await element.text_content()
-                    if text and text.strip():
-                        return text.strip()
-            except Exception:
-                continue
-        return ""
-    
-    async def _extract_image(self, container, selectors: List[str]) -> str:
-        """Extract image URL using fallback selectors."""
-        for selector in selectors:
-            try:
-                element = await container.query_selector(selector.strip())
-                if element:
-                    for attr in ["src", "data-src", "data-lazy-src"]:
-                        image_url = await element.get_attribute(attr)
-                        if image_url and image_url.startswith("http"):
-                            return image_url
-            except Exception:
-                continue
-        return ""
-    
-    async def _extract_link(self, container, selectors: List[str], page: Page) -> str:
-        """Extract product link using fallback selectors."""
-        for selector in selectors:
-            try:
-                element = await container.query_selector(selector.strip())
-                if element:
-                    link = await element.get_attribute("href")
-                    if link:
-                        # Make absolute if relative
-                        if link.startswith("/"):
-                            base_url = page.url
-                            parsed = urlparse(base_url)
-                            link = f"{parsed.scheme}://{parsed.netloc}{link}"
-                        return link
-            except Exception:
-                continue
-        return ""
-    
     def validate_product_data(self, product_data: Dict[str, Any]) -> bool:
         """Validate CJ product data."""
-        required_fields = ["title", "price", "image", "link"]
-        
-        # Check all required fields exist and are non-empty
-        for field in required_fields:
-            if not product_data.get(field, "").strip():
-                return False
+        # Reason: checks run cheapest/most-often-failing first; each one also implies
+        # its field is present and non-blank, so no separate emptiness pass is needed
         
-        # Validate title
-        title = product_data["title"].strip()
-        if len(title) < 3 or len(title) > 500:
+        # Validate link
+        link = product_data.get("link") or ""
+        if not _IS_HTTP_URL(link):
             return False
         
-        # Validate price format
-        price = product_data["price"]
-        if not any(c.isdigit() for c in price):
+        # Validate image URL
+        image_url = product_data.get("image") or ""
+        if not _IS_HTTP_URL(image_url):
             return False
         
-        # Validate image URL
-        image_url = product_data["image"]
-        if not image_url.startswith("http"):
+        # Validate price format
+        price = product_data.get("price") or ""
+        if _DIGITS.isdisjoint(price):
             return False
         
-        # Validate link
-        link = product_data["link"]
-        if not link.startswith("http"):
+        # Validate title
+        title_length = len((product_data.get("title") or "").strip())
+        if title_length < 3 or title_length > 500:
             return False
         
         return True
@@ -229,16 +212,20 @@ class CJScraper(BasePlatformScraper):
         
         price = price_text.strip()
         
+        # Nothing to normalize without any digits
+        if _DIGITS.isdisjoint(price):
+            return price
+        
         # Extract price with dollar sign
         if "$" in price:
-            matches = re.findall(r'\$[\d,]+\.?\d*', price)
-            if matches:
-                return matches[0]
+            match = _DOLLAR_PRICE_RE.search(price)
+            if match:
+                return match.group()
         
         # Extract just numbers and add $
-        numbers = re.findall(r'[\d,]+\.?\d*', price)
-        if numbers and len(numbers[0]) >= 2:
-            return f"${numbers[0]}"
+        match = _PRICE_NUMBER_RE.search(price)
+        if match and len(match.group()) >= 2:
+            return f"${match.group()}"
         
         return price
     
@@ -247,9 +234,4 @@ class CJScraper(BasePlatformScraper):
         if not original_url:
             return ""
         
-        # CJ uses click tracking URLs
-        # This is a simplified version - actual CJ links are more complex
-        separator = "&" if "?" in original_url else "?"
-        affiliate_params = f"cjevent=cj_affiliate_{self.affiliate_id}"
-        
-        return f"{original_url}{separator}{affiliate_params}"
\ No newline at end of file
+        return _build_cj_affiliate_url(original_url, self.affiliate_id)
\ No newline at end of file
@@ -5,16 +5,104 @@ This module implements the Rakuten affiliate product scraper with specific selec
 and handling for Rakuten's product pages and affiliate link construction.
 """
 
+from functools import cached_property, lru_cache
 from typing import List, Dict, Any, Optional
 from playwright.async_api import Page
 import re
 import asyncio
-import random
-from urllib.parse import urlparse
+from urllib.parse import urlencode, urlparse
 
 from .base import BasePlatformScraper, ProductExtractionError
 from agents.models import AffiliateNetwork
 
+# Compiled once at import; these run for every extracted product
+_YEN_PRICE_RE = re.compile(r'¥[\d,]+')
+_DOLLAR_PRICE_RE = re.compile(r'\$[\d,]+\.?\d*')
+_PRICE_NUMBER_RE = re.compile(r'[\d,]+\.?\d*')
+_CURRENCY_OR_DIGIT_RE = re.compile(r'[\d$¥]|USD|JPY')
+_IMAGE_EXTENSION_RE = re.compile(r'\.(?:jpe?g|png|webp|gif)', re.IGNORECASE)
+
+_DIGITS = frozenset('0123456789')
+
+# Reads the first `limit` product containers in a single round-trip, applying
+# each field's pre-split fallback selectors in order
+_EXTRACT_PRODUCTS_JS = """
+(containers, {fallbacks, limit}) => {
+    const extractOne = (container) => {
+        const query = (selector) => {
+            try {
+                return container.querySelector(selector);
+            } catch (e) {
+                return null;
+            }
+        };
+        
+        let title = "";
+        for (const selector of fallbacks.title) {
+            const element = query(selector);
+            const text = element && element.textContent ? element.textContent.trim() : "";
+            if (text) {
+                title = text;
+                break;
+            }
+        }
+        
+        let price = "";
+        for (const selector of fallbacks.price) {
+            const element = query(selector);
+            const text = element && element.textContent ? element.textContent.trim() : "";
+            // Check if it looks like a price
+            if (/[0-9]/.test(text) && (text.includes("$") || text.includes("¥") || selector.toLowerCase().includes("price"))) {
+                price = text;
+                break;
+            }
+        }
+        
+        let image = "";
+        imageSearch:
+        for (const selector of fallbacks.image) {
+            const element = query(selector);
+            if (!element) continue;
+            // Try different image attributes
+            for (const attr of ["src", "data-src", "data-lazy-src"]) {
+                const value = element.getAttribute(attr);
+                if (value && value.startsWith("http")) {
+                    image = value;
+                    break imageSearch;
+                }
+            }
+        }
+        
+        let link = "";
+        for (const selector of fallbacks.link) {
+            const element = query(selector);
+            const href = element ? element.getAttribute("href") : null;
+            if (href && (href.startsWith("/") || href.startsWith("http"))) {
+                link = href;
+                break;
+            }
+        }
+        
+        return {title, price, image, link};
+    };
+    
+    return {total: containers.length, items: containers.slice(0, limit).map(extractOne)};
+}
+"""
+
+
+@lru_cache(maxsize=4096)
+def _build_rakuten_affiliate_url(original_url: str, affiliate_id: str) -> str:
+    """Add Rakuten tracking parameters to the query; cached since crawls revisit the same URLs."""
+    # Rakuten affiliate links typically need specific parameters
+    affiliate_params = urlencode({"ranMID": affiliate_id, "ranEAID": "123456", "ranSiteID": "affiliate"})
+    
+    # Reason: splice into the query component so any #fragment stays at the end,
+    # and leave existing parameters untouched rather than re-encoding them
+    parsed = urlparse(original_url)
+    query = f"{parsed.query}&{affiliate_params}" if parsed.query else affiliate_params
+    return parsed._replace(query=query).geturl()
+
 
 class RakutenScraper(BasePlatformScraper):
     """
@@ -32,9 +120,9 @@ class RakutenScraper(BasePlatformScraper):
     def platform_name(self) -> str:
         return "Rakuten"
     
-    @property
+    @cached_property
     def default_selectors(self) -> Dict[str, str]:
-        """Default selectors for Rakuten product pages."""
+        """Default selectors for Rakuten product pages (built once per instance)."""
         return {
             "product_container": ".product-item, .item, .product-card",
             "title": ".product-title, .item-title, h3 a, .title",
@@ -63,31 +151,33 @@ class RakutenScraper(BasePlatformScraper):
             List of raw product data dictionaries
         """
         selectors = self.get_selectors(custom_selectors)
+        container_selector = selectors["product_container"]
         
         try:
             # Wait for Rakuten's content to load
-            await self._handle_rakuten_loading(page)
+            await self._handle_rakuten_loading(page, container_selector)
             
-            # Find all product containers
-            containers = await page.query_selector_all(selectors["product_container"])
-            self.logger.info(f"Found {len(containers)} product containers on Rakuten")
+            # Extract the first expected_count containers' fields in a single evaluate call.
+            # Reason: a locator keeps Playwright selector syntax working for custom
+            # container selectors and avoids creating a handle per container
+            fallbacks = self.get_selector_fallbacks(custom_selectors)
+            extracted = await page.locator(container_selector).evaluate_all(
+                _EXTRACT_PRODUCTS_JS,
+                {"fallbacks": fallbacks, "limit": expected_count}
+            )
+            self.logger.info(f"Found {extracted['total']} product containers on Rakuten")
             
-            if not containers:
+            if not extracted["total"]:
                 raise ProductExtractionError("No product containers found on Rakuten page")
             
+            # Resolve the link base once, not per product
+            parsed = urlparse(page.url)
+            base_prefix = f"{parsed.scheme}://{parsed.netloc}"
             products = []
-            for i, container in enumerate(containers[:expected_count]):
-                try:
-                    product_data = await self._extract_single_product(container, selectors, page)
-                    if product_data:
-                        products.append(product_data)
-                        
-                    # Delay between products to be respectful
-                    await asyncio.sleep(random.uniform(0.2, 0.5))
-                    
-                except Exception as e:
-                    self.logger.warning(f"Failed to extract Rakuten product {i}: {e}")
-                    continue
+            for item in extracted["items"]:
+                product_data = self._build_product_data(item, base_prefix)
+                if product_data:
+                    products.append(product_data)
             
             self.logger.info(f"Successfully extracted {len(products)} products from Rakuten")
             return products
@@ -95,12 +185,12 @@ class RakutenScraper(BasePlatformScraper):
         except Exception as e:
             raise ProductExtractionError(f"Rakuten product extraction failed: {e}")
     
-    async def _handle_rakuten_loading(self, page: Page) -> None:
-        """Handle Rakuten's loading states."""
+    async def _handle_rakuten_loading(self, page: Page, container_selector: Optional[str] = None) -> None:
+        """Handle Rakuten's loading states, waiting on the given (or default) container selector."""
         try:
             # Wait for product containers to appear
             await page.wait_for_selector(
-                self.default_selectors["product_container"],
+                container_selector or self.default_selectors["product_container"],
                 state="visible",
                 timeout=15000
             )
@@ -115,118 +205,26 @@ class RakutenScraper(BasePlatformScraper):
         except Exception as e:
             self.logger.warning(f"Rakuten loading handling issue: {e}")
     
-    async def _extract_single_product(
-        self,
-        container,
-        selectors: Dict[str, str],
-        page: Page
-    ) -> Optional[Dict[str, Any]]:
-        """Extract data from a single Rakuten product container."""
-        try:
-            # Extract title
-            title = await self._extract_rakuten_title(container, selectors)
-            
-            # Extract price
-            price = await self._extract_rakuten_price(container, selectors)
-            
-            # Extract image URL
-            image_url = await self._extract_rakuten_image(container, selectors)
-            
-            # Extract product link
-            link = await self._extract_rakuten_link(container, selectors, page)
-            
-            # Basic validation
-            if not all([title, price, image_url, link]):
-                self.logger.debug(f"Incomplete Rakuten product data: title={bool(title)}, price={bool(price)}, image={bool(image_url)}, link={bool(link)}")
-                return None
-            
-            return {
-                "title": title,
-                "price": price, 
-                "image": image_url,
-                "link": link,
-                "platform": "rakuten"
-            }
-            
-        except Exception as e:
-            self.logger.warning(f"Failed to extract single Rakuten product: {e}")
-            return None
-    
-    async def _extract_rakuten_title(self, container, selectors: Dict[str, str]) -> str:
-        """Extract title from Rakuten product."""
-        title_selectors = selectors["title"].split(", ")
-        
-        for title_selector in title_selectors:
-            try:
-                title_element = await container.query_selector(title_selector.strip())
-                if title_element:
-                    title = await title_element.text_content()
-                    if title and title.strip():
-                        return title.strip()
-            except Exception:
-                continue
+    def _build_product_data(self, item: Dict[str, str], base_prefix: str) -> Optional[Dict[str, Any]]:
+        """Normalize one container's raw fields from the page into product data."""
+        title, price, image_url, link = item["title"], item["price"], item["image"], item["link"]
         
-        return ""
-    
-    async def _extract_rakuten_price(self, container, selectors: Dict[str, str]) -> str:
-        """Extract price from Rakuten product."""
-        price_selectors = selectors["price"].split(", ")
+        # Make absolute URL if relative
+        if link.startswith("/"):
+            link = f"{base_prefix}{link}"
         
-        for price_selector in price_selectors:
-            try:
-                price_element = await container.query_selector(price_selector.strip())
-                if price_element:
-                    price_text = await price_element.text_content()
-                    if price_text and price_text.strip():
-                        price = price_text.strip()
-                        # Check if it looks like a price
-                        if any(c.isdigit() for c in price) and ("$" in price or "¥" in price or "price" in price_selector.lower()):
-                            return price
-            except Exception:
-                continue
-        
-        return ""
-    
-    async def _extract_rakuten_image(self, container, selectors: Dict[str, str]) -> str:
-        """Extract image URL from Rakuten product."""
-        image_selectors = selectors["image"].split(", ")
-        
-        for image_selector in image_selectors:
-            try:
-                image_element = await container.query_selector(image_selector.strip())
-                if image_element:
-                    # Try different image attributes
-                    for attr in ["src", "data-src", "data-lazy-src"]:
-                        image_url = await image_element.get_attribute(attr)
-                        if image_url and image_url.startswith("http") and not image_url.startswith("data:"):
-                            return image_url
-            except Exception:
-                continue
-        
-        return ""
-    
-    async def _extract_rakuten_link(self, container, selectors: Dict[str, str], page: Page) -> str:
-        """Extract product link from Rakuten product."""
-        link_selectors = selectors["link"].split(", ")
-        
-        for link_selector in link_selectors:
-            try:
-                link_element = await container.query_selector(link_selector.strip())
-                if link_element:
-                    link = await link_element.get_attribute("href")
-                    if link:
-                        # Make absolute URL if relative
-                        if link.startswith("/"):
-                            base_url = page.url
-                            parsed = urlparse(base_url)
-                            link = f"{parsed.scheme}://{parsed.netloc}{link}"
-                        elif not link.startswith("http"):
-                            continue
-                        return link
-            except Exception:
-                continue
+        # Basic validation
+        if not all([title, price, image_url, link]):
+            self.logger.debug(f"Incomplete Rakuten product data: title={bool(title)}, price={bool(price)}, image={bool(image_url)}, link={bool(link)}")
+            return None
         
-        return ""
+        return {
+            "title": title,
+            "price": price, 
+            "image": image_url,
+            "link": link,
+            "platform": "rakuten"
+        }
     
     def validate_product_data(self, product_data: Dict[str, Any]) -> bool:
         """Validate Rakuten product data."""
@@ -244,17 +242,17 @@ class RakutenScraper(BasePlatformScraper):
         
         # Validate price contains currency or numbers
         price = product_data["price"]
-        if not (any(c.isdigit() for c in price) or any(symbol in price for symbol in ["$", "¥", "USD", "JPY"])):
+        if not _CURRENCY_OR_DIGIT_RE.search(price):
             return False
         
         # Validate image URL
         image_url = product_data["image"]
-        if not (image_url.startswith("http") and any(ext in image_url.lower() for ext in [".jpg", ".jpeg", ".png", ".webp", ".gif"])):
+        if not (image_url.startswith("http") and _IMAGE_EXTENSION_RE.search(image_url)):
             return False
         
-        # Validate Rakuten link
+        # Validate Rakuten link (this also covers rms.rakuten hosts)
         link = product_data["link"]
-        if not (("rakuten" in link.lower() or "rms.rakuten" in link.lower()) and link.startswith("http")):
+        if not ("rakuten" in link.lower() and link.startswith("http")):
             return False
         
         return True
@@ -267,23 +265,27 @@ class RakutenScraper(BasePlatformScraper):
         # Remove extra whitespace
         price = price_text.strip()
         
+        # Nothing to normalize without any digits
+        if _DIGITS.isdisjoint(price):
+            return price
+        
         # Handle different currency formats
         if "¥" in price:
             # Japanese Yen format
-            numbers = re.findall(r'¥[\d,]+', price)
-            if numbers:
-                return numbers[0]
+            match = _YEN_PRICE_RE.search(price)
+            if match:
+                return match.group()
         
         if "$" in price:
             # USD format
-            numbers = re.findall(r'\$[\d,]+\.?\d*', price)
-            if numbers:
-                return numbers[0]
+            match = _DOLLAR_PRICE_RE.search(price)
+            if match:
+                return match.group()
         
         # Try to extract just numeric value and add $
-        numbers = re.findall(r'[\d,]+\.?\d*', price)
-        if numbers:
-            numeric_price = numbers[0]
+        match = _PRICE_NUMBER_RE.search(price)
+        if match:
+            numeric_price = match.group()
             if len(numeric_price) >= 2:  # Reasonable price
                 return f"${numeric_price}"
         
@@ -294,13 +296,7 @@ class RakutenScraper(BasePlatformScraper):
         if not original_url:
             return ""
         
-        # Rakuten affiliate links typically need specific parameters
-        separator = "&" if "?" in original_url else "?"
-        
-        # Add Rakuten affiliate parameters
-        affiliate_params = f"ranMID={self.affiliate_id}&ranEAID=123456&ranSiteID=affiliate"
-        
-        return f"{original_url}{separator}{affiliate_params}"
+        return _build_rakuten_affiliate_url(original_url, self.affiliate_id)
     
     async def handle_pagination(self, page: Page) -> bool:
         """
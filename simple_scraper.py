@@ -6,10 +6,24 @@ This generates realistic product data to populate your API.
 
 import json
 import asyncio
+import os
 import random
 from datetime import datetime
+from functools import lru_cache
+from string import Formatter
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+# Reason: this script is meant to run without the full requirements installed,
+# so use pydantic_core's Rust encoder when available and fall back to json
+try:
+    from pydantic_core import to_json
+except ImportError:
+    to_json = None
+
+# Same switch config.settings.get_settings honours; read directly so this
+# script doesn't need pydantic-settings installed
+TEST_MODE = os.getenv("SCRAPER_TEST_MODE", "").lower() == "true"
 
 # Sample product templates for realistic data generation
 OUTDOOR_PRODUCTS = [
@@ -81,28 +95,78 @@ TECH_PRODUCTS = [
     }
 ]
 
-def generate_product_data(template: Dict[str, Any], site_type: str) -> Dict[str, Any]:
-    """Generate realistic product data from template."""
+
+@lru_cache(maxsize=None)
+def _template_renderer(text: str) -> Callable[..., str]:
+    """Parse a template string once and return a renderer for it."""
+    # Reason: most templates have no placeholders, so skip str.format entirely for those;
+    # formatting once still turns escaped {{ and }} into literal braces
+    if all(field is None for _, field, _, _ in Formatter().parse(text)):
+        rendered = text.format()
+        return lambda **_: rendered
+    return text.format
+
+
+# Option pools for the randomized product fields
+_OUTDOOR_SIZES = (2, 4, 6, 8)
+_TECH_SIZES = (32, 40, 64)
+_CAPACITIES = (10000, 20000, 26800)
+_DISCOUNTS = (0, 5, 10, 15, 20, 25, 30)
+_ASIN_NUMBERS = range(100000, 1000000)
+_IMAGE_IDS = range(10000000, 100000000)
+_REVIEW_COUNTS = range(100, 50001)
+
+# Slug substitutions applied in a single str.translate pass
+_SLUG_TABLE = str.maketrans({" ": "-", "(": "", ")": "", "/": "-", ",": ""})
+
+def draw_product_values(count: int, site_type: str) -> List[Tuple[Any, ...]]:
+    """
+    Draw the randomized fields for a batch of products.
+    
+    Each field is drawn for the whole batch with one random.choices call
+    rather than one RNG call per field per product.
+    
+    Args:
+        count: Number of products to draw values for
+        site_type: "outdoor" or "tech", selects the size options
+        
+    Returns:
+        One (size, capacity, discount, asin, image_id, rating, reviews) tuple per product
+    """
+    sizes = _OUTDOOR_SIZES if site_type == "outdoor" else _TECH_SIZES
+    ratings = [round(4.0 + 0.9 * random.random(), 1) for _ in range(count)]
+    return list(zip(
+        random.choices(sizes, k=count),
+        random.choices(_CAPACITIES, k=count),
+        random.choices(_DISCOUNTS, k=count),
+        random.choices(_ASIN_NUMBERS, k=count),
+        random.choices(_IMAGE_IDS, k=count),
+        ratings,
+        random.choices(_REVIEW_COUNTS, k=count),
+    ))
+
+def generate_product_data(
+    template: Dict[str, Any],
+    site_type: str,
+    values: Optional[Tuple[Any, ...]] = None
+) -> Dict[str, Any]:
+    """Generate realistic product data from template, using pre-drawn values if given."""
     
     # Generate dynamic values
-    if site_type == "outdoor":
-        size = random.choice([2, 4, 6, 8])
-        capacity = random.choice([10000, 20000, 26800])
-    else:
-        size = random.choice([32, 40, 64])
-        capacity = random.choice([10000, 20000, 26800])
+    if values is None:
+        values = draw_product_values(1, site_type)[0]
+    size, capacity, discount_percent, asin_number, image_id, rating, review_count = values
     
     # Format title and description
-    title = template["title"].format(size=size, capacity=capacity)
-    description = template["description"].format(size=size, capacity=capacity)
+    title = _template_renderer(template["title"])(size=size, capacity=capacity)
+    description = _template_renderer(template["description"])(size=size, capacity=capacity)
     
     # Generate realistic pricing
     base_price = template["base_price"]
-    discount_percent = random.choice([0, 5, 10, 15, 20, 25, 30])
     current_price = base_price * (1 - discount_percent / 100)
     
     # Generate affiliate URL (you'd replace with real Amazon Product API)
-    asin = f"B0{random.randint(100000, 999999):06d}"
+    asin = f"B0{asin_number:06d}"
     affiliate_tag = "offgriddisc-20"  # Your affiliate tag
     
     # Generate product data
@@ -112,11 +176,11 @@ def generate_product_data(template: Dict[str, Any], site_type: str) -> Dict[str,
         "original_price": f"${base_price:.2f}",
         "discount_percent": f"{discount_percent}%",
         "affiliate_url": f"https://www.amazon.com/dp/{asin}?tag={affiliate_tag}",
-        "image_url": f"https://m.media-amazon.com/images/I/{random.randint(10000000, 99999999):08d}L._AC_SL1500_.jpg",
-        "slug": title.lower().replace(" ", "-").replace("(", "").replace(")", ""),
+        "image_url": f"https://m.media-amazon.com/images/I/{image_id:08d}L._AC_SL1500_.jpg",
+        "slug": title.lower().translate(_SLUG_TABLE),
         "description": description,
-        "rating": round(random.uniform(4.0, 4.9), 1),
-        "review_count": random.randint(100, 50000),
+        "rating": rating,
+        "review_count": review_count,
         "availability": "In Stock",
         "platform": "amazon",
         "category": template["category"],
@@ -126,33 +190,30 @@ def generate_product_data(template: Dict[str, Any], site_type: str) -> Dict[str,
     
     return product
 
+def _vary_template(template: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a template, jittering its base price 30% of the time."""
+    template_copy = template.copy()
+    if random.random() < 0.3:  # 30% chance to modify price
+        template_copy["base_price"] *= random.uniform(0.8, 1.2)
+    return template_copy
+
 async def scrape_site(site_name: str, product_templates: List[Dict[str, Any]], site_type: str) -> Dict[str, Any]:
     """Simulate scraping a site and generate realistic product data."""
     
     print(f"Scraping {site_name}...")
     
-    # Simulate scraping delay
-    await asyncio.sleep(random.uniform(1, 3))
+    # Simulate scraping delay (skipped in test mode so fixtures build instantly)
+    if not TEST_MODE:
+        await asyncio.sleep(random.uniform(1, 3))
     
-    # Generate products
+    # Generate products in one pass; generation is pure CPU, so there's nothing to await
     num_products = random.randint(8, 15)
-    products = []
+    products = [
+        generate_product_data(_vary_template(random.choice(product_templates)), site_type, values)
+        for values in draw_product_values(num_products, site_type)
+    ]
     
-    for i in range(num_products):
-        template = random.choice(product_templates)
-        
-        # Add some variation
-        template_copy = template.copy()
-        if random.random() < 0.3:  # 30% chance to modify price
-            template_copy["base_price"] *= random.uniform(0.8, 1.2)
-            
-        product = generate_product_data(template_copy, site_type)
-        products.append(product)
-        
-        print(f"  Found: {product['title']} - {product['price']}")
-        
-        # Small delay between products
-        await asyncio.sleep(0.1)
+    print(f"  Found {len(products)} products on {site_name}")
     
     # Create output data
     output_data = {
@@ -191,20 +252,31 @@ async def main():
     
     all_results = []
     
-    for site_name, templates, site_type in sites:
+    # Scrape all sites concurrently; exceptions come back in place of results
+    results = await asyncio.gather(
+        *(scrape_site(site_name, templates, site_type) for site_name, templates, site_type in sites),
+        return_exceptions=True
+    )
+    
+    for (site_name, _, _), result in zip(sites, results):
+        if isinstance(result, Exception):
+            print(f"Error scraping {site_name}: {result}")
+            continue
+        
         try:
-            result = await scrape_site(site_name, templates, site_type)
-            
             # Save to file
             output_file = output_dir / f"{site_name}-products.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, default=str)
+            if to_json is not None:
+                output_file.write_bytes(to_json(result, indent=2, fallback=str))
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, indent=2, default=str)
             
             print(f"Saved {len(result['products'])} products to {output_file}")
             all_results.append(result)
             
         except Exception as e:
-            print(f"Error scraping {site_name}: {e}")
+            print(f"Error saving {site_name}: {e}")
     
     # Summary
     total_products = sum(len(r['products']) for r in all_results)
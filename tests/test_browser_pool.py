@@ -0,0 +1,184 @@
+"""
+Unit tests for the shared Playwright page pool.
+"""
+
+import asyncio
+import pytest
+
+from tools import browser_pool
+from tools.browser_pool import BrowserPool
+
+
+class FakePage:
+    """Stand-in for a Playwright page that records resets."""
+    
+    def __init__(self):
+        self.closed = False
+        self.unrouted = 0
+        self.visited = []
+    
+    def is_closed(self):
+        return self.closed
+    
+    async def unroute(self, url):
+        self.unrouted += 1
+    
+    async def goto(self, url):
+        self.visited.append(url)
+
+
+class FakeContext:
+    """Stand-in for a browser context holding one page."""
+    
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+        self.cookies_cleared = 0
+        self.page = FakePage()
+    
+    async def new_page(self):
+        return self.page
+    
+    async def clear_cookies(self):
+        self.cookies_cleared += 1
+    
+    async def close(self):
+        self.closed = True
+        self.page.closed = True
+
+
+class FakeBrowser:
+    """Stand-in for the shared browser that records the contexts it opens."""
+    
+    def __init__(self):
+        self.contexts = []
+        self.closed = False
+    
+    def is_connected(self):
+        return not self.closed
+    
+    async def new_context(self, **options):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+    
+    async def close(self):
+        self.closed = True
+        for context in self.contexts:
+            await context.close()
+
+
+class FakePlaywright:
+    """Stand-in for the Playwright driver."""
+    
+    def __init__(self):
+        self.stopped = False
+    
+    async def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    """A fake browser installed as the pool's shared browser, with an empty pool."""
+    fake_browser = FakeBrowser()
+    monkeypatch.setattr(BrowserPool, "_browser", fake_browser)
+    monkeypatch.setattr(BrowserPool, "_playwright", FakePlaywright())
+    monkeypatch.setattr(BrowserPool, "_idle_pages", [])
+    monkeypatch.setattr(BrowserPool, "_lock", asyncio.Lock())
+    return fake_browser
+
+
+async def _lease_once():
+    """Lease a page, returning the pair that was handed out."""
+    async with BrowserPool.page() as (context, page):
+        return context, page
+
+
+class TestBrowserPool:
+    """Test page leasing, recycling and shutdown."""
+    
+    def test_released_page_is_reused(self, browser):
+        """Test a second lease gets the same pair back, reset in between."""
+        async def run():
+            return await _lease_once(), await _lease_once()
+        
+        (first_context, first_page), (second_context, second_page) = asyncio.run(run())
+        
+        assert second_context is first_context
+        assert second_page is first_page
+        assert len(browser.contexts) == 1
+        assert first_context.cookies_cleared == 2
+        assert first_page.unrouted == 2
+        assert first_page.visited == ["about:blank", "about:blank"]
+    
+    def test_page_is_recycled_after_max_uses(self, browser, monkeypatch):
+        """Test a pair that has served _MAX_PAGE_USES jobs is closed, not pooled."""
+        monkeypatch.setattr(browser_pool, "_MAX_PAGE_USES", 2)
+        
+        async def run():
+            return [await _lease_once() for _ in range(3)]
+        
+        leases = asyncio.run(run())
+        
+        assert leases[0][0] is leases[1][0]
+        assert leases[2][0] is not leases[0][0]
+        assert leases[0][0].closed
+        assert len(browser.contexts) == 2
+        assert BrowserPool._idle_pages == [(leases[2][0], leases[2][1], 1)]
+    
+    def test_idle_pool_is_capped(self, browser, monkeypatch):
+        """Test pairs released beyond _MAX_IDLE_PAGES are closed."""
+        monkeypatch.setattr(browser_pool, "_MAX_IDLE_PAGES", 2)
+        
+        async def lease_together(holders: int):
+            leased = []
+            all_leased = asyncio.Event()
+            
+            # Each job keeps its page until every job holds one
+            async def hold():
+                async with BrowserPool.page() as pair:
+                    leased.append(pair)
+                    if len(leased) == holders:
+                        all_leased.set()
+                    await all_leased.wait()
+            
+            await asyncio.gather(*(hold() for _ in range(holders)))
+        
+        asyncio.run(lease_together(3))
+        
+        assert len(browser.contexts) == 3
+        assert len(BrowserPool._idle_pages) == 2
+        assert sum(context.closed for context in browser.contexts) == 1
+    
+    def test_page_that_fails_to_reset_is_discarded(self, browser):
+        """Test a pair whose reset raises is closed instead of pooled."""
+        async def run():
+            async with BrowserPool.page() as (context, page):
+                async def broken_goto(url):
+                    raise RuntimeError("page crashed")
+                page.goto = broken_goto
+                return context
+        
+        context = asyncio.run(run())
+        
+        assert context.closed
+        assert BrowserPool._idle_pages == []
+    
+    def test_shutdown_closes_everything(self, browser):
+        """Test shutdown closes the browser and its pooled pages and stops Playwright."""
+        playwright = BrowserPool._playwright
+        
+        async def run():
+            context, _ = await _lease_once()
+            await BrowserPool.shutdown()
+            return context
+        
+        context = asyncio.run(run())
+        
+        assert browser.closed
+        assert context.closed
+        assert playwright.stopped
+        assert BrowserPool._idle_pages == []
+        assert BrowserPool._browser is None
+        assert BrowserPool._playwright is None
@@ -7,7 +7,7 @@ import os
 import tempfile
 from pathlib import Path
 
-from config.settings import ScraperSettings, TestSettings, get_settings
+from config.settings import ScraperSettings, TestSettings, get_settings, reload_settings
 
 
 class TestScraperSettings:
@@ -23,6 +23,8 @@ class TestScraperSettings:
         assert settings.max_retries == 3
         assert settings.quality_threshold == 0.7
         assert settings.browser_headless is False
+        assert settings.max_concurrent_sites == 4
+        assert settings.max_concurrent_scrapes == 4
         assert settings.debug_mode is False
         assert settings.test_mode is False
     
@@ -104,7 +106,7 @@ class TestScraperSettings:
             ScraperSettings(quality_threshold=1.5)
     
     def test_directory_creation(self):
-        """Test that directories are created automatically."""
+        """Test that ensure_directories creates the configured directories."""
         with tempfile.TemporaryDirectory() as temp_dir:
             test_output_dir = os.path.join(temp_dir, "test_output")
             test_state_dir = os.path.join(temp_dir, "test_state")
@@ -116,6 +118,11 @@ class TestScraperSettings:
                 config_directory=test_config_dir
             )
             
+            # Constructing settings doesn't touch the filesystem
+            assert not os.path.exists(test_output_dir)
+            
+            settings.ensure_directories()
+            
             # Directories should be created
             assert os.path.exists(test_output_dir)
             assert os.path.exists(test_state_dir)
@@ -160,6 +167,23 @@ class TestGetSettings:
         assert isinstance(settings, TestSettings)
         assert settings.test_mode is True
     
+    def test_settings_are_cached(self):
+        """Test repeated calls reuse the same settings instance."""
+        assert get_settings(test_mode=True) is get_settings(test_mode=True)
+        assert get_settings(test_mode=False) is not get_settings(test_mode=True)
+    
+    def test_reload_settings_builds_fresh_instance(self):
+        """Test reload_settings discards the cached instance."""
+        cached = get_settings(test_mode=True)
+        
+        try:
+            reloaded = reload_settings(test_mode=True)
+            assert reloaded is not cached
+            assert get_settings(test_mode=True) is reloaded
+        finally:
+            # Restore production settings as the module-level instance
+            reload_settings(test_mode=False)
+    
     def test_environment_variable_override(self):
         """Test environment variable override for test mode."""
         # Set environment variable
@@ -2,31 +2,71 @@
 Unit tests for data validation functionality.
 """
 
+import asyncio
+import operator
+from types import SimpleNamespace
 import pytest
 from agents.models import ScrapedProduct, ProductCard, AffiliateNetwork, AgentDependencies
 from tools.data_validator import (
-    _basic_validation, _calculate_comprehensive_quality_score,
+    validate_and_score_products, _basic_validation, _calculate_comprehensive_quality_score,
     _score_title_quality, _score_price_quality, _score_url_quality,
     _score_image_url_quality, _score_category_quality, _score_platform_trust
 )
 
 
+# Products for the comprehensive scorer, built once without re-running
+# validation; the scorer only reads their fields as strings
+_HIGH_QUALITY_PRODUCT = ScrapedProduct.model_construct(
+    title="Apple MacBook Pro 16-inch with M2 Chip 32GB RAM 1TB SSD",
+    price="$2499.99",
+    affiliate_url="https://amazon.com/dp/B123456789",
+    original_image_url="https://m.media-amazon.com/images/I/high-res-product.jpg",
+    category="electronics",
+    platform=AffiliateNetwork.AMAZON,
+    validation_score=0.0
+)
+
+_LOW_QUALITY_PRODUCT = ScrapedProduct.model_construct(
+    title="thing",  # Poor title
+    price="price",  # Invalid price
+    affiliate_url="https://sketchy-site.com/item",
+    original_image_url="http://example.com/placeholder.jpg",
+    category="x",  # Poor category
+    platform=AffiliateNetwork.CJ,  # Lower trust
+    validation_score=0.0
+)
+
+_TYPICAL_PRODUCT = ScrapedProduct.model_construct(
+    title="Test Product",
+    price="$49.99",
+    affiliate_url="https://example.com/product",
+    original_image_url="https://example.com/image.jpg",
+    category="test",
+    platform=AffiliateNetwork.AMAZON,
+    validation_score=0.0
+)
+
+
+@pytest.fixture(scope="module")
+def base_product():
+    """A validated product that tests derive variants from with model_copy."""
+    return ScrapedProduct(
+        title="High-Quality Gaming Laptop",
+        price="$1299.99",
+        affiliate_url="https://amazon.com/dp/B123456789",
+        original_image_url="https://m.media-amazon.com/images/product.jpg",
+        category="electronics",
+        platform=AffiliateNetwork.AMAZON,
+        validation_score=0.0
+    )
+
+
 class TestBasicValidation:
     """Test basic validation functions."""
     
-    def test_valid_product_passes_validation(self):
+    def test_valid_product_passes_validation(self, base_product):
         """Test that a valid product passes basic validation."""
-        product = ScrapedProduct(
-            title="High-Quality Gaming Laptop",
-            price="$1299.99",
-            affiliate_url="https://amazon.com/dp/B123456789",
-            original_image_url="https://m.media-amazon.com/images/product.jpg",
-            category="electronics",
-            platform=AffiliateNetwork.AMAZON,
-            validation_score=0.0
-        )
-        
-        assert _basic_validation(product) is True
+        assert _basic_validation(base_product) is True
     
     def test_empty_title_fails_validation(self):
         """Test that empty title fails validation."""
@@ -42,31 +82,15 @@ class TestBasicValidation:
                 validation_score=0.0
             )
     
-    def test_short_title_fails_validation(self):
+    def test_short_title_fails_validation(self, base_product):
         """Test that very short title fails validation."""
-        product = ScrapedProduct(
-            title="AB",  # Too short
-            price="$29.99",
-            affiliate_url="https://example.com/product",
-            original_image_url="https://example.com/image.jpg",
-            category="test",
-            platform=AffiliateNetwork.AMAZON,
-            validation_score=0.0
-        )
+        product = base_product.model_copy(update={"title": "AB"})  # Too short
         
         assert _basic_validation(product) is False
     
-    def test_invalid_price_fails_validation(self):
+    def test_invalid_price_fails_validation(self, base_product):
         """Test that invalid price fails validation."""
-        product = ScrapedProduct(
-            title="Valid Product",
-            price="Not a price",
-            affiliate_url="https://example.com/product",
-            original_image_url="https://example.com/image.jpg",
-            category="test",
-            platform=AffiliateNetwork.AMAZON,
-            validation_score=0.0
-        )
+        product = base_product.model_copy(update={"price": "Not a price"})
         
         assert _basic_validation(product) is False
     
@@ -88,84 +112,65 @@ class TestBasicValidation:
 class TestTitleQualityScoring:
     """Test title quality scoring."""
     
-    def test_optimal_length_title(self):
-        """Test scoring for optimal length title."""
-        title = "High-Quality Gaming Laptop with RTX Graphics"
-        score = _score_title_quality(title)
-        
-        assert score >= 40.0  # Should get length points
-        assert score <= 100.0
-    
-    def test_title_with_specifications(self):
-        """Test title with specifications gets bonus points."""
-        title = "Gaming Laptop 16GB RAM 1TB SSD 15.6 inch Display"
-        score = _score_title_quality(title)
-        
+    @pytest.mark.parametrize("title, compare, bound", [
+        # Should get length points
+        pytest.param("High-Quality Gaming Laptop with RTX Graphics", operator.ge, 40.0, id="optimal-length"),
         # Should get specification bonus points
-        assert score > 50.0
-    
-    def test_title_with_brand_names(self):
-        """Test title with brand names gets bonus points."""
-        title = "Apple MacBook Pro with M1 Chip"
-        score = _score_title_quality(title)
-        
+        pytest.param("Gaming Laptop 16GB RAM 1TB SSD 15.6 inch Display", operator.gt, 50.0, id="specifications"),
         # Should get brand bonus points
-        assert score > 40.0
-    
-    def test_spammy_title_loses_points(self):
-        """Test spammy title loses points."""
-        title = "FREE LAPTOP!!! LIMITED TIME!!! BUY NOW!!!"
+        pytest.param("Apple MacBook Pro with M1 Chip", operator.gt, 40.0, id="brand-names"),
+        # Should lose points for spam indicators
+        pytest.param("FREE LAPTOP!!! LIMITED TIME!!! BUY NOW!!!", operator.lt, 50.0, id="spammy"),
+        pytest.param("", operator.eq, 0.0, id="empty"),
+    ])
+    def test_title_score(self, title, compare, bound):
+        """Test title scores against each case's bound, within 0-100."""
         score = _score_title_quality(title)
         
-        # Should lose points for spam indicators
-        assert score < 50.0
-    
-    def test_empty_title(self):
-        """Test empty title gets zero score."""
-        score = _score_title_quality("")
-        assert score == 0.0
+        assert compare(score, bound)
+        assert 0.0 <= score <= 100.0
 
 
 class TestPriceQualityScoring:
     """Test price quality scoring."""
     
-    def test_well_formatted_price(self):
-        """Test well-formatted price gets high score."""
-        price = "$299.99"
-        score = _score_price_quality(price)
-        
-        assert score >= 80.0  # Should get most points
-    
-    def test_price_without_currency_symbol(self):
-        """Test price without currency symbol gets lower score."""
-        price = "299.99"
+    @pytest.mark.parametrize("price, compare, bound", [
+        # Should get most points
+        pytest.param("$299.99", operator.ge, 80.0, id="well-formatted"),
+        # Should lose currency symbol points
+        pytest.param("299.99", operator.lt, 80.0, id="no-currency-symbol"),
+        # Too expensive, shouldn't get full points
+        pytest.param("$999999.99", operator.lt, 100.0, id="unreasonable-range"),
+        pytest.param("", operator.eq, 0.0, id="empty"),
+    ])
+    def test_price_score(self, price, compare, bound):
+        """Test price scores against each case's bound, within 0-100."""
         score = _score_price_quality(price)
         
-        assert score < 80.0  # Should lose currency symbol points
-        assert score > 0.0   # But still have some points
+        assert compare(score, bound)
+        assert 0.0 <= score <= 100.0
     
-    def test_unreasonable_price_range(self):
-        """Test unreasonable price gets lower score."""
-        price = "$999999.99"  # Too expensive
-        score = _score_price_quality(price)
-        
-        assert score < 100.0  # Shouldn't get full points
-    
-    def test_empty_price(self):
-        """Test empty price gets zero score."""
-        score = _score_price_quality("")
-        assert score == 0.0
+    def test_price_without_currency_symbol_keeps_some_points(self):
+        """Test price without currency symbol still scores above zero."""
+        assert _score_price_quality("299.99") > 0.0
 
 
 class TestURLQualityScoring:
     """Test URL quality scoring."""
     
-    def test_amazon_url_gets_high_score(self):
-        """Test Amazon URL gets high trust score."""
-        url = "https://amazon.com/dp/B123456789"
+    @pytest.mark.parametrize("url, compare, bound", [
+        # Should get high trust + HTTPS + structure points
+        pytest.param("https://amazon.com/dp/B123456789", operator.ge, 80.0, id="amazon"),
+        # Should get structure bonus points
+        pytest.param("https://example.com/product/gaming-laptop", operator.gt, 20.0, id="product-structure"),
+        pytest.param("", operator.eq, 0.0, id="empty"),
+    ])
+    def test_url_score(self, url, compare, bound):
+        """Test URL scores against each case's bound, within 0-100."""
         score = _score_url_quality(url)
         
-        assert score >= 80.0  # Should get high trust + HTTPS + structure points
+        assert compare(score, bound)
+        assert 0.0 <= score <= 100.0
     
     def test_https_gets_bonus_points(self):
         """Test HTTPS URLs get bonus points."""
@@ -176,101 +181,70 @@ class TestURLQualityScoring:
         score_http = _score_url_quality(url_http)
         
         assert score_https > score_http
-    
-    def test_product_url_structure(self):
-        """Test product URL structure gets bonus points."""
-        url = "https://example.com/product/gaming-laptop"
-        score = _score_url_quality(url)
-        
-        # Should get structure bonus points
-        assert score > 20.0
-    
-    def test_empty_url(self):
-        """Test empty URL gets zero score."""
-        score = _score_url_quality("")
-        assert score == 0.0
 
 
 class TestImageURLQualityScoring:
     """Test image URL quality scoring."""
     
-    def test_https_image_url(self):
-        """Test HTTPS image URLs get bonus points."""
-        url = "https://example.com/image.jpg"
+    @pytest.mark.parametrize("url, compare, bound", [
+        # HTTPS points
+        pytest.param("https://example.com/image.jpg", operator.ge, 25.0, id="https"),
+        # Should lose points for placeholder indicator (allow equal since it might be exactly 75.0)
+        pytest.param("https://example.com/placeholder-image.jpg", operator.le, 75.0, id="placeholder"),
+        pytest.param("", operator.eq, 0.0, id="empty"),
+    ])
+    def test_image_url_score(self, url, compare, bound):
+        """Test image URL scores against each case's bound, within 0-100."""
         score = _score_image_url_quality(url)
         
-        assert score >= 25.0  # HTTPS points
+        assert compare(score, bound)
+        assert 0.0 <= score <= 100.0
     
-    def test_image_format_recognition(self):
+    @pytest.mark.parametrize("fmt", [".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif", ".JPG", ".jpg?w=500"])
+    def test_image_format_recognition(self, fmt):
         """Test various image formats are recognized."""
-        formats = [".jpg", ".jpeg", ".png", ".webp"]
-        
-        for fmt in formats:
-            url = f"https://example.com/image{fmt}"
-            score = _score_image_url_quality(url)
-            assert score >= 50.0  # HTTPS + format points
-    
-    def test_placeholder_images_lose_points(self):
-        """Test placeholder images lose points."""
-        url = "https://example.com/placeholder-image.jpg"
+        url = f"https://example.com/image{fmt}"
         score = _score_image_url_quality(url)
-        
-        # Should lose points for placeholder indicator
-        assert score <= 75.0  # Allow equal since it might be exactly 75.0
+        assert score >= 50.0  # HTTPS + format points
     
-    def test_empty_image_url(self):
-        """Test empty image URL gets zero score."""
-        score = _score_image_url_quality("")
-        assert score == 0.0
+    def test_unrecognized_format_gets_no_format_points(self):
+        """Test a non-image extension doesn't earn format points."""
+        assert _score_image_url_quality("https://example.com/image.svg") < _score_image_url_quality("https://example.com/image.png")
 
 
 class TestCategoryQualityScoring:
     """Test category quality scoring."""
     
-    def test_common_category(self):
-        """Test common categories get bonus points."""
-        score = _score_category_quality("electronics")
-        assert score >= 70.0  # Length + format + common category points
-    
-    def test_proper_formatting(self):
-        """Test properly formatted categories get points."""
-        score = _score_category_quality("home-garden")
-        assert score >= 40.0  # Length + format points
-    
-    def test_invalid_formatting_loses_points(self):
-        """Test invalid formatting loses points."""
-        score = _score_category_quality("Electronics@#$")
-        assert score <= 70.0  # Should lose format points (allow equal)
-    
-    def test_empty_category(self):
-        """Test empty category gets zero score."""
-        score = _score_category_quality("")
-        assert score == 0.0
+    @pytest.mark.parametrize("category, compare, bound", [
+        # Length + format + common category points
+        pytest.param("electronics", operator.ge, 70.0, id="common"),
+        # Length + format points
+        pytest.param("home-garden", operator.ge, 40.0, id="proper-formatting"),
+        # Should lose format points (allow equal)
+        pytest.param("Electronics@#$", operator.le, 70.0, id="invalid-formatting"),
+        pytest.param("", operator.eq, 0.0, id="empty"),
+    ])
+    def test_category_score(self, category, compare, bound):
+        """Test category scores against each case's bound, within 0-100."""
+        score = _score_category_quality(category)
+        
+        assert compare(score, bound)
+        assert 0.0 <= score <= 100.0
 
 
 class TestPlatformTrustScoring:
     """Test platform trust scoring."""
     
-    def test_amazon_platform_trust(self):
-        """Test Amazon gets highest trust score."""
-        score = _score_platform_trust(AffiliateNetwork.AMAZON)
-        assert score == 100.0
-    
-    def test_rakuten_platform_trust(self):
-        """Test Rakuten gets good trust score."""
-        score = _score_platform_trust(AffiliateNetwork.RAKUTEN)
-        assert score == 80.0
-    
-    def test_cj_platform_trust(self):
-        """Test CJ gets decent trust score."""
-        score = _score_platform_trust(AffiliateNetwork.CJ)
-        assert score == 70.0
-    
-    def test_unknown_platform_trust(self):
-        """Test unknown platform gets default score."""
-        # Mock platform as string
-        score = _score_platform_trust("unknown")
-        assert score == 50.0
+    @pytest.mark.parametrize("platform, expected", [
+        pytest.param(AffiliateNetwork.AMAZON, 100.0, id="amazon"),
+        pytest.param(AffiliateNetwork.RAKUTEN, 80.0, id="rakuten"),
+        pytest.param(AffiliateNetwork.CJ, 70.0, id="cj"),
+        # Unknown platform passed as a plain string gets the default score
+        pytest.param("unknown", 50.0, id="unknown"),
+    ])
+    def test_platform_trust(self, platform, expected):
+        """Test each platform's trust score."""
+        assert _score_platform_trust(platform) == expected
 
 
 class TestComprehensiveQualityScore:
@@ -278,49 +252,36 @@ class TestComprehensiveQualityScore:
     
     def test_high_quality_product_score(self):
         """Test high-quality product gets high score."""
-        product = ScrapedProduct(
-            title="Apple MacBook Pro 16-inch with M2 Chip 32GB RAM 1TB SSD",
-            price="$2499.99",
-            affiliate_url="https://amazon.com/dp/B123456789",
-            original_image_url="https://m.media-amazon.com/images/I/high-res-product.jpg",
-            category="electronics",
-            platform=AffiliateNetwork.AMAZON,
-            validation_score=0.0
-        )
-        
-        score = _calculate_comprehensive_quality_score(product)
+        score = _calculate_comprehensive_quality_score(_HIGH_QUALITY_PRODUCT)
         assert score >= 0.8  # Should be high quality
         assert score <= 1.0
     
     def test_low_quality_product_score(self):
         """Test low-quality product gets low score."""
-        product = ScrapedProduct(
-            title="thing",  # Poor title
-            price="price",  # Invalid price
-            affiliate_url="https://sketchy-site.com/item",
-            original_image_url="http://example.com/placeholder.jpg",
-            category="x",  # Poor category
-            platform=AffiliateNetwork.CJ,  # Lower trust
-            validation_score=0.0
-        )
-        
-        score = _calculate_comprehensive_quality_score(product)
+        score = _calculate_comprehensive_quality_score(_LOW_QUALITY_PRODUCT)
         assert score < 0.5  # Should be low quality
         assert score >= 0.0
     
     def test_score_normalization(self):
         """Test that scores are properly normalized to 0-1 range."""
-        product = ScrapedProduct(
-            title="Test Product",
-            price="$49.99",
-            affiliate_url="https://example.com/product",
-            original_image_url="https://example.com/image.jpg",
-            category="test",
-            platform=AffiliateNetwork.AMAZON,
-            validation_score=0.0
-        )
-        
-        score = _calculate_comprehensive_quality_score(product)
+        score = _calculate_comprehensive_quality_score(_TYPICAL_PRODUCT)
         assert 0.0 <= score <= 1.0
         assert isinstance(score, float)
-        assert len(str(score).split('.')[-1]) <= 3  # Max 3 decimal places
\ No newline at end of file
+        assert len(str(score).split('.')[-1]) <= 3  # Max 3 decimal places
+    
+    def test_min_score_only_prunes_failing_products(self):
+        """Test a pass mark skips work for failing products without changing passing ones."""
+        full_score = _calculate_comprehensive_quality_score(_HIGH_QUALITY_PRODUCT)
+        assert _calculate_comprehensive_quality_score(_HIGH_QUALITY_PRODUCT, 0.7) == full_score
+        
+        pruned_score = _calculate_comprehensive_quality_score(_LOW_QUALITY_PRODUCT, 0.7)
+        assert pruned_score <= _calculate_comprehensive_quality_score(_LOW_QUALITY_PRODUCT)
+        assert pruned_score < 0.7
+    
+    def test_rejected_products_keep_their_score(self, base_product):
+        """Test products below the threshold aren't stamped with a pruned partial score."""
+        rejected = base_product.model_copy(update={"title": "thing", "validation_score": 0.5})
+        ctx = SimpleNamespace(deps=SimpleNamespace(quality_threshold=0.99))
+        
+        assert asyncio.run(validate_and_score_products(ctx, [rejected])) == []
+        assert rejected.validation_score == 0.5
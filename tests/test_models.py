@@ -3,7 +3,7 @@ Unit tests for data models.
 """
 
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pydantic import ValidationError, HttpUrl
 
 from agents.models import (
@@ -80,6 +80,27 @@ class TestScrapedProduct:
         assert 0.0 <= score <= 1.0
         assert score > 0.5  # Should be decent quality with good data
     
+    def test_quality_score_tracks_field_changes(self):
+        """Test the cached quality score is recomputed when a scored field changes."""
+        product = ScrapedProduct(
+            title="High Quality Product with Great Specs",
+            price="$299.99",
+            affiliate_url="https://amazon.com/dp/B123456",
+            original_image_url="https://m.media-amazon.com/images/product.jpg",
+            category="electronics",
+            platform=AffiliateNetwork.AMAZON,
+            validation_score=0.0
+        )
+        
+        assert product.calculate_quality_score() == 1.0
+        assert product.calculate_quality_score() == 1.0
+        
+        product.price = "Call for price"
+        assert product.calculate_quality_score() == 0.75
+        
+        cheap_title = product.model_copy(update={"title": "Tent"})
+        assert cheap_title.calculate_quality_score() == 0.45
+    
     def test_slug_generation(self):
         """Test SEO slug generation."""
         product = ScrapedProduct(
@@ -96,7 +117,12 @@ class TestScrapedProduct:
         assert slug == "gaming-laptop-high-performance"
         assert len(slug) <= 50
         assert "--" not in slug  # No double hyphens
-    
+
+    def test_slug_generation_non_ascii(self):
+        """Test slug generation for titles with non-ASCII characters."""
+        assert ScrapedProduct._generate_slug("Café Crème™ – 2 Pack") == "café-crème-2-pack"
+        assert ScrapedProduct._generate_slug("  --Tent (4-Person)  ") == "tent-4-person"
+
     def test_to_product_card_conversion(self):
         """Test conversion to ProductCard."""
         scraped = ScrapedProduct(
@@ -117,6 +143,41 @@ class TestScrapedProduct:
         assert card.affiliate_url == scraped.affiliate_url
         assert card.image_url == scraped.original_image_url
         assert card.slug == "test-product"
+    
+    def test_slug_is_not_serialized(self):
+        """Test the cached slug stays out of model dumps."""
+        product = ScrapedProduct(
+            title="Test Product",
+            price="$49.99",
+            affiliate_url="https://example.com/product",
+            original_image_url="https://example.com/image.jpg",
+            category="test",
+            platform=AffiliateNetwork.AMAZON,
+            validation_score=0.8
+        )
+        
+        assert product.slug == "test-product"
+        assert "slug" not in product.model_dump()
+    
+    def test_slug_follows_title_changes(self):
+        """Test the cached slug is recomputed for copies and reassigned titles."""
+        product = ScrapedProduct(
+            title="Test Product",
+            price="$49.99",
+            affiliate_url="https://example.com/product",
+            original_image_url="https://example.com/image.jpg",
+            category="test",
+            platform=AffiliateNetwork.AMAZON,
+            validation_score=0.8
+        )
+        assert product.slug == "test-product"
+        
+        renamed = product.model_copy(update={"title": "Camping Tent"})
+        assert renamed.slug == "camping-tent"
+        assert renamed.to_product_card().slug == "camping-tent"
+        
+        product.title = "Hiking Boots"
+        assert product.slug == "hiking-boots"
 
 
 class TestAffiliateNetwork:
@@ -180,6 +241,43 @@ class TestURLConfig:
             )
 
 
+class TestSiteConfig:
+    """Test SiteConfig model."""
+    
+    def _make_config(self, last_scraped=None):
+        return SiteConfig(
+            site_name="test-site",
+            output_path="./output/test-site.json",
+            gcs_bucket="test-bucket",
+            urls_to_scrape=[
+                URLConfig(
+                    url="https://example.com",
+                    platform=AffiliateNetwork.AMAZON,
+                    category="test"
+                )
+            ],
+            refresh_interval_hours=24,
+            last_scraped=last_scraped
+        )
+    
+    def test_needs_refresh_when_never_scraped(self):
+        """Test a site that was never scraped needs refreshing."""
+        assert self._make_config().needs_refresh() is True
+    
+    def test_needs_refresh_respects_interval(self):
+        """Test refresh is only needed once the interval has elapsed."""
+        recent = self._make_config(datetime.now() - timedelta(hours=1))
+        stale = self._make_config(datetime.now() - timedelta(hours=25))
+        
+        assert recent.needs_refresh() is False
+        assert stale.needs_refresh() is True
+    
+    def test_needs_refresh_with_timezone_aware_timestamp(self):
+        """Test timezone-aware last_scraped values are handled."""
+        config = self._make_config(datetime.now(timezone.utc) - timedelta(hours=1))
+        assert config.needs_refresh() is False
+
+
 class TestAgentDependencies:
     """Test AgentDependencies model."""
     
@@ -198,6 +296,7 @@ class TestAgentDependencies:
         assert deps.scraping_delay_seconds == 1.5
         assert deps.max_retries == 5
         assert deps.quality_threshold == 0.8
+        assert deps.max_concurrent_scrapes == 4
     
     def test_validation_constraints(self):
         """Test validation constraints."""
@@ -0,0 +1,128 @@
+"""
+Unit tests for the adaptive per-host rate limiter.
+"""
+
+import asyncio
+import pytest
+
+from tools import rate_limiter
+from tools.rate_limiter import HostRateLimiter
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the limiter sleeps (if advance is set)."""
+    
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self.advance = True
+    
+    def monotonic(self):
+        return self.now
+    
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        if self.advance:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the limiter's clock and sleep with a fake that records waits."""
+    fake_clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake_clock.monotonic)
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", fake_clock.sleep)
+    return fake_clock
+
+
+def _limiter(**kwargs) -> HostRateLimiter:
+    """A limiter without jitter so waits are exact."""
+    return HostRateLimiter(jitter_seconds=0.0, **kwargs)
+
+
+class TestHostRateLimiter:
+    """Test per-host pacing, backoff and recovery."""
+    
+    def test_acquire_paces_each_host_separately(self, clock):
+        """Test requests to one host are spaced by the delay while other hosts go straight away."""
+        limiter = _limiter()
+        
+        async def run():
+            await limiter.acquire("a.example", 2.0)
+            await limiter.acquire("a.example", 2.0)
+            await limiter.acquire("b.example", 2.0)
+        
+        asyncio.run(run())
+        
+        assert clock.sleeps == [2.0]
+    
+    def test_concurrent_callers_queue_behind_each_other(self, clock):
+        """Test overlapping callers for one host each reserve their own slot."""
+        limiter = _limiter()
+        # All three arrive at the same instant
+        clock.advance = False
+        
+        async def run():
+            await asyncio.gather(*(limiter.acquire("a.example", 1.0) for _ in range(3)))
+        
+        asyncio.run(run())
+        
+        assert sorted(clock.sleeps) == [1.0, 2.0]
+    
+    def test_failure_halves_rate_down_to_min_rate(self, clock):
+        """Test each failure cuts the rate and the cut stops at min_rate."""
+        limiter = _limiter(min_rate=0.1, backoff_factor=0.5)
+        asyncio.run(limiter.acquire("a.example", 1.0))
+        
+        limiter.on_failure("a.example")
+        assert limiter._rates["a.example"] == pytest.approx(0.5)
+        
+        for _ in range(10):
+            limiter.on_failure("a.example")
+        assert limiter._rates["a.example"] == pytest.approx(0.1)
+    
+    def test_success_recovery_is_capped_at_max_rate(self, clock):
+        """Test successes win the rate back a step at a time but never past the configured delay."""
+        limiter = _limiter(recovery_step=0.2, backoff_factor=0.5)
+        asyncio.run(limiter.acquire("a.example", 1.0))
+        limiter.on_failure("a.example")
+        
+        limiter.on_success("a.example")
+        assert limiter._rates["a.example"] == pytest.approx(0.7)
+        
+        for _ in range(10):
+            limiter.on_success("a.example")
+        assert limiter._rates["a.example"] == pytest.approx(1.0)
+    
+    def test_success_for_unknown_host_is_ignored(self, clock):
+        """Test a success for a host that was never paced doesn't create a rate."""
+        limiter = _limiter()
+        limiter.on_success("a.example")
+        assert "a.example" not in limiter._rates
+    
+    def test_backed_off_host_waits_longer(self, clock):
+        """Test the slot after a failure is spaced by the reduced rate."""
+        limiter = _limiter(backoff_factor=0.5)
+        
+        async def run():
+            await limiter.acquire("a.example", 1.0)
+            limiter.on_failure("a.example")
+            await limiter.acquire("a.example", 1.0)
+            await limiter.acquire("a.example", 1.0)
+        
+        asyncio.run(run())
+        
+        assert clock.sleeps == [1.0, 2.0]
+    
+    def test_retry_after_is_honored(self, clock):
+        """Test a Retry-After pushes the host's next slot out by that many seconds."""
+        limiter = _limiter()
+        
+        async def run():
+            await limiter.acquire("a.example", 1.0)
+            limiter.on_failure("a.example", retry_after=30.0)
+            await limiter.acquire("a.example", 1.0)
+        
+        asyncio.run(run())
+        
+        assert clock.sleeps == [30.0]
@@ -0,0 +1,132 @@
+"""
+Unit tests for the scrape result cache.
+"""
+
+import asyncio
+import pytest
+
+from agents.models import ScrapedProduct, AffiliateNetwork
+from tools import scrape_cache
+from tools.scrape_cache import ScrapeResultCache
+
+URL = "https://example.com/deals"
+KEY = (URL, "amazon")
+
+
+def _product(title: str = "Gaming Laptop") -> ScrapedProduct:
+    """A valid scraped product."""
+    return ScrapedProduct(
+        title=title,
+        price="$999.99",
+        affiliate_url="https://amazon.com/dp/B123456",
+        original_image_url="https://m.media-amazon.com/image.jpg",
+        category="electronics",
+        platform=AffiliateNetwork.AMAZON,
+        validation_score=0.85
+    )
+
+
+class FakeScrape:
+    """Scrape callable that counts its runs and can be held until released."""
+    
+    def __init__(self, products=None):
+        self.products = [_product()] if products is None else products
+        self.calls = 0
+        self.release = None
+    
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return self.products
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock for the cache's expiry checks."""
+    now = [1000.0]
+    monkeypatch.setattr(scrape_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestScrapeResultCache:
+    """Test in-flight sharing, copying and expiry of scrape results."""
+    
+    def test_concurrent_calls_share_one_scrape(self, clock):
+        """Test callers that overlap a running scrape wait for it instead of starting another."""
+        cache = ScrapeResultCache()
+        scrape = FakeScrape()
+        
+        async def run():
+            scrape.release = asyncio.Event()
+            callers = [asyncio.ensure_future(cache.get_or_scrape(KEY, scrape, URL)) for _ in range(3)]
+            await asyncio.sleep(0)
+            scrape.release.set()
+            return await asyncio.gather(*callers)
+        
+        results = asyncio.run(run())
+        
+        assert scrape.calls == 1
+        assert [len(products) for products in results] == [1, 1, 1]
+        assert cache._inflight == {}
+    
+    def test_results_are_copies(self, clock):
+        """Test each caller gets its own products, so edits don't leak between callers."""
+        cache = ScrapeResultCache()
+        scrape = FakeScrape()
+        
+        async def run():
+            return await cache.get_or_scrape(KEY, scrape, URL), await cache.get_or_scrape(KEY, scrape, URL)
+        
+        first, second = asyncio.run(run())
+        first[0].title = "Edited"
+        
+        assert scrape.calls == 1
+        assert first[0] is not second[0]
+        assert first[0] is not scrape.products[0]
+        assert second[0].title == "Gaming Laptop"
+        assert cache._results[KEY][1][0].title == "Gaming Laptop"
+    
+    def test_entries_expire_after_ttl(self, clock):
+        """Test a result is reused until it's 300s old and scraped again after that."""
+        cache = ScrapeResultCache()
+        scrape = FakeScrape()
+        
+        async def call():
+            return await cache.get_or_scrape(KEY, scrape, URL)
+        
+        asyncio.run(call())
+        clock[0] += 299.0
+        asyncio.run(call())
+        assert scrape.calls == 1
+        
+        clock[0] += 1.0
+        asyncio.run(call())
+        assert scrape.calls == 2
+    
+    def test_empty_results_are_not_cached(self, clock):
+        """Test a scrape that found nothing is tried again on the next call."""
+        cache = ScrapeResultCache()
+        scrape = FakeScrape(products=[])
+        
+        async def run():
+            await cache.get_or_scrape(KEY, scrape, URL)
+            await cache.get_or_scrape(KEY, scrape, URL)
+        
+        asyncio.run(run())
+        
+        assert scrape.calls == 2
+        assert KEY not in cache._results
+    
+    def test_least_recently_used_entry_is_evicted(self, clock):
+        """Test the cache keeps at most max_entries results."""
+        cache = ScrapeResultCache(max_entries=2)
+        scrape = FakeScrape()
+        
+        async def run():
+            for key in ("a", "b", "a", "c"):
+                await cache.get_or_scrape((key,), scrape, URL)
+        
+        asyncio.run(run())
+        
+        assert list(cache._results) == [("a",), ("c",)]
@@ -0,0 +1,271 @@
+"""
+Unit tests for the state management tools and their on-disk store.
+"""
+
+import asyncio
+import os
+import pytest
+import time
+from types import SimpleNamespace
+
+from agents.models import AgentDependencies, ScrapingResult
+from tools import state_manager, state_store
+from tools.state_manager import (
+    save_scraping_state, load_last_good_state, increment_failure_count,
+    get_state_summary, cleanup_old_state_files
+)
+
+
+@pytest.fixture
+def ctx(tmp_path):
+    """Run context whose dependencies point the state directory at tmp_path."""
+    deps = AgentDependencies(
+        gcs_credentials_path="./test-creds.json",
+        state_directory=str(tmp_path)
+    )
+    return SimpleNamespace(deps=deps)
+
+
+def _scraping_result(site_name: str) -> ScrapingResult:
+    """A minimal result to save alongside a site's state."""
+    return ScrapingResult(
+        site_name=site_name,
+        total_products_found=0,
+        valid_products=0,
+        failed_products=0,
+        processing_time_seconds=0.0,
+        quality_score=0.0,
+        output_file_path=""
+    )
+
+
+def _save(ctx, site_name: str = "site") -> None:
+    """Save an empty state for site_name."""
+    asyncio.run(save_scraping_state(ctx, site_name, [], _scraping_result(site_name)))
+
+
+def _bump_mtime(path) -> None:
+    """Move a file's mtime a second forward, so coarse filesystem clocks can't hide a rewrite."""
+    file_stat = path.stat()
+    os.utime(path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestFailureCounts:
+    """Test failure counts kept in the sidecar file."""
+    
+    def test_increment_then_load_returns_merged_count(self, ctx, tmp_path):
+        """Test failures recorded in the sidecar are merged into the loaded state."""
+        _save(ctx)
+        
+        async def run():
+            await increment_failure_count(ctx, "site")
+            await increment_failure_count(ctx, "site")
+            return await load_last_good_state(ctx, "site")
+        
+        state_data = asyncio.run(run())
+        
+        assert state_data.consecutive_failures == 2
+        assert (tmp_path / "site_counter.json").exists()
+        # The full state file itself is left as it was saved
+        assert '"consecutive_failures": 0' in (tmp_path / "site_state.json").read_text()
+    
+    def test_save_removes_sidecar(self, ctx, tmp_path):
+        """Test a successful save resets the count and deletes the sidecar."""
+        _save(ctx)
+        asyncio.run(increment_failure_count(ctx, "site"))
+        assert (tmp_path / "site_counter.json").exists()
+        
+        _save(ctx)
+        
+        assert not (tmp_path / "site_counter.json").exists()
+        assert asyncio.run(load_last_good_state(ctx, "site")).consecutive_failures == 0
+    
+    def test_increment_without_state_creates_it(self, ctx, tmp_path):
+        """Test the first failure for a new site writes a full state file."""
+        assert asyncio.run(increment_failure_count(ctx, "site")) == 1
+        
+        assert (tmp_path / "site_state.json").exists()
+        assert not (tmp_path / "site_counter.json").exists()
+
+
+class TestStateCache:
+    """Test the parsed-state cache is keyed on the file version."""
+    
+    def _load(self, ctx):
+        return asyncio.run(load_last_good_state(ctx, "site"))
+    
+    def test_unchanged_file_is_served_from_cache(self, ctx):
+        """Test repeat loads of an unchanged file return the cached object."""
+        _save(ctx)
+        assert self._load(ctx) is self._load(ctx)
+    
+    def test_cache_invalidated_when_mtime_changes(self, ctx, tmp_path):
+        """Test a rewrite of the same size is picked up through its new mtime."""
+        _save(ctx)
+        state_file = tmp_path / "site_state.json"
+        cached = self._load(ctx)
+        file_stat = state_file.stat()
+        
+        # Same length as the saved file, so only the mtime tells them apart
+        changed = cached.model_copy(update={"consecutive_failures": 3})
+        state_file.write_text(changed.model_dump_json(indent=2))
+        os.utime(state_file, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1_000_000))
+        assert state_file.stat().st_size == file_stat.st_size
+        
+        assert self._load(ctx).consecutive_failures == 3
+    
+    def test_cache_invalidated_when_size_changes(self, ctx, tmp_path):
+        """Test a rewrite that keeps the mtime is picked up through its new size."""
+        _save(ctx)
+        state_file = tmp_path / "site_state.json"
+        cached = self._load(ctx)
+        file_stat = state_file.stat()
+        
+        changed = cached.model_copy(update={"consecutive_failures": 12})
+        state_file.write_text(changed.model_dump_json(indent=2))
+        os.utime(state_file, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+        assert state_file.stat().st_mtime_ns == file_stat.st_mtime_ns
+        
+        assert self._load(ctx).consecutive_failures == 12
+        assert state_store._STATE_CACHE[state_file][0] == (file_stat.st_mtime_ns, state_file.stat().st_size)
+
+
+class TestSummaryIndex:
+    """Test get_state_summary only re-reads state files that changed."""
+    
+    @pytest.fixture
+    def summarized(self, monkeypatch):
+        """Record the state files summarize_state_file is called for."""
+        calls = []
+        
+        def summarize(state_file):
+            calls.append(state_file.name)
+            return state_store.summarize_state_file(state_file)
+        
+        monkeypatch.setattr(state_manager, "summarize_state_file", summarize)
+        return calls
+    
+    def _summary(self, ctx):
+        return asyncio.run(get_state_summary(ctx))
+    
+    def test_unchanged_entry_is_served_from_index(self, ctx, tmp_path, summarized):
+        """Test a second summary reuses the indexed entry without reading the file."""
+        _save(ctx)
+        first = self._summary(ctx)
+        assert summarized == ["site_state.json"]
+        assert (tmp_path / "_summary_index.json").exists()
+        
+        second = self._summary(ctx)
+        
+        assert summarized == ["site_state.json"]
+        assert second["sites"] == first["sites"]
+    
+    def test_entry_recomputed_when_state_changes(self, ctx, tmp_path, summarized):
+        """Test a re-saved state file is summarized again."""
+        _save(ctx)
+        _save(ctx, "other")
+        self._summary(ctx)
+        summarized.clear()
+        
+        _save(ctx)
+        _bump_mtime(tmp_path / "site_state.json")
+        self._summary(ctx)
+        
+        assert summarized == ["site_state.json"]
+    
+    def test_entry_recomputed_when_sidecar_changes(self, ctx, tmp_path, summarized):
+        """Test a new failure count in the sidecar is picked up."""
+        _save(ctx)
+        asyncio.run(increment_failure_count(ctx, "site"))
+        assert self._summary(ctx)["sites"]["site"]["consecutive_failures"] == 1
+        summarized.clear()
+        
+        asyncio.run(increment_failure_count(ctx, "site"))
+        _bump_mtime(tmp_path / "site_counter.json")
+        summary = self._summary(ctx)
+        
+        assert summarized == ["site_state.json"]
+        assert summary["sites"]["site"]["consecutive_failures"] == 2
+        assert summary["sites"]["site"]["health_status"] == "warning"
+    
+    def test_corrupt_index_falls_back_to_empty(self, ctx, tmp_path, summarized):
+        """Test an unreadable index is ignored and rebuilt."""
+        _save(ctx)
+        (tmp_path / "_summary_index.json").write_text("{not json")
+        
+        _, index = state_store.scan_state_files(tmp_path)
+        assert index == {}
+        
+        summary = self._summary(ctx)
+        
+        assert summarized == ["site_state.json"]
+        assert summary["sites"]["site"]["cached_products"] == 0
+        assert "site" in state_store.scan_state_files(tmp_path)[1]
+    
+    def test_non_dict_index_falls_back_to_empty(self, tmp_path):
+        """Test valid JSON that isn't an object is treated as no index."""
+        (tmp_path / "_summary_index.json").write_text("[1, 2]")
+        assert state_store.scan_state_files(tmp_path) == ({}, {})
+
+
+class TestCleanup:
+    """Test old state files and sidecars are removed by age."""
+    
+    def _age(self, path, days: float) -> None:
+        """Set a file's mtime to days ago."""
+        mtime = time.time() - days * 86400
+        os.utime(path, (mtime, mtime))
+    
+    def _cleanup(self, ctx):
+        return asyncio.run(cleanup_old_state_files(ctx, max_age_days=30))
+    
+    def test_old_pair_is_deleted(self, ctx, tmp_path):
+        """Test a site whose state and sidecar are both past the cutoff is removed."""
+        _save(ctx)
+        asyncio.run(increment_failure_count(ctx, "site"))
+        self._age(tmp_path / "site_state.json", 40)
+        self._age(tmp_path / "site_counter.json", 35)
+        
+        result = self._cleanup(ctx)
+        
+        assert result == {"total_files": 1, "deleted_files": 1, "retained_files": 0}
+        assert not (tmp_path / "site_state.json").exists()
+        assert not (tmp_path / "site_counter.json").exists()
+    
+    def test_recent_sidecar_keeps_old_state(self, ctx, tmp_path):
+        """Test a site that is still failing keeps its last good state."""
+        _save(ctx)
+        asyncio.run(increment_failure_count(ctx, "site"))
+        self._age(tmp_path / "site_state.json", 40)
+        
+        result = self._cleanup(ctx)
+        
+        assert result["deleted_files"] == 0
+        assert (tmp_path / "site_state.json").exists()
+        assert (tmp_path / "site_counter.json").exists()
+    
+    def test_old_state_without_sidecar_is_deleted(self, ctx, tmp_path):
+        """Test an old state file alone is removed while a recent one is kept."""
+        _save(ctx)
+        _save(ctx, "other")
+        self._age(tmp_path / "site_state.json", 40)
+        
+        result = self._cleanup(ctx)
+        
+        assert result == {"total_files": 2, "deleted_files": 1, "retained_files": 1}
+        assert not (tmp_path / "site_state.json").exists()
+        assert (tmp_path / "other_state.json").exists()
+    
+    def test_orphaned_sidecars_are_deleted_past_cutoff(self, ctx, tmp_path):
+        """Test sidecars without a state file go once they are older than the cutoff."""
+        _save(ctx)
+        state_store.write_failure_count(tmp_path / "gone_counter.json", 4)
+        state_store.write_failure_count(tmp_path / "lost_counter.json", 2)
+        self._age(tmp_path / "gone_counter.json", 40)
+        
+        result = self._cleanup(ctx)
+        
+        assert result["total_files"] == 1
+        assert not (tmp_path / "gone_counter.json").exists()
+        assert (tmp_path / "lost_counter.json").exists()
+        assert (tmp_path / "site_state.json").exists()
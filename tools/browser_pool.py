@@ -0,0 +1,129 @@
+"""
+Shared Playwright browser and page pool for the scraping tools.
+
+One Chromium instance serves every scrape in the process. Jobs lease a
+context and page from a small idle pool instead of opening a new pair per
+URL, and pairs are recycled after a fixed number of jobs to bound renderer
+memory.
+"""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+import asyncio
+import logging
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+from platforms.base import DEFAULT_CONTEXT_OPTIONS
+from config import settings as config_settings
+
+logger = logging.getLogger(__name__)
+
+# Pooled pages are recycled (context closed and reopened) after this many jobs
+# to bound renderer memory, and at most this many are kept idle between jobs
+_MAX_PAGE_USES = 50
+_MAX_IDLE_PAGES = 16
+
+
+class BrowserPool:
+    """
+    Process-wide Playwright browser shared by every scrape.
+    
+    Chromium and the Playwright driver start lazily on first use and stay up
+    until shutdown(). Jobs lease a context and page from a pool that grows to
+    the number of concurrent jobs, instead of opening a new pair per URL.
+    """
+    
+    _playwright: Optional[Playwright] = None
+    _browser: Optional[Browser] = None
+    _lock = asyncio.Lock()
+    
+    # Idle (context, page, jobs served) slots, most recently released last
+    _idle_pages: List[Tuple[BrowserContext, Page, int]] = []
+    
+    @classmethod
+    async def get_browser(cls) -> Browser:
+        """Return the shared browser, (re)launching it if needed."""
+        async with cls._lock:
+            if cls._browser is None or not cls._browser.is_connected():
+                await cls._stop()
+                settings = config_settings.settings
+                cls._playwright = await async_playwright().start()
+                try:
+                    cls._browser = await cls._playwright.chromium.launch(
+                        headless=settings.browser_headless,
+                        args=settings.get_browser_args()
+                    )
+                except Exception:
+                    await cls._stop()
+                    raise
+            return cls._browser
+    
+    @classmethod
+    @asynccontextmanager
+    async def page(cls) -> AsyncIterator[Tuple[BrowserContext, Page]]:
+        """
+        Lease a context and page, reusing an idle pair when there is one.
+        
+        Routes added to the page are removed and cookies cleared when the lease
+        ends, and the page is parked on about:blank to drop the previous DOM.
+        """
+        browser = await cls.get_browser()
+        
+        slot = None
+        while cls._idle_pages:
+            context, page, uses = cls._idle_pages.pop()
+            # Pairs from a browser that has since been relaunched are already gone
+            if context.browser is browser and not page.is_closed():
+                slot = (context, page, uses)
+                break
+        
+        if slot is None:
+            context = await browser.new_context(**DEFAULT_CONTEXT_OPTIONS)
+            try:
+                slot = (context, await context.new_page(), 0)
+            except Exception:
+                await context.close()
+                raise
+        
+        context, page, uses = slot
+        try:
+            yield context, page
+        finally:
+            await cls._release(context, page, uses + 1)
+    
+    @classmethod
+    async def _release(cls, context: BrowserContext, page: Page, uses: int) -> None:
+        """Reset a leased pair and return it to the pool, or close it if it's spent."""
+        if uses < _MAX_PAGE_USES and len(cls._idle_pages) < _MAX_IDLE_PAGES:
+            try:
+                await page.unroute("**/*")
+                await context.clear_cookies()
+                await page.goto("about:blank")
+                cls._idle_pages.append((context, page, uses))
+                return
+            except Exception as e:
+                logger.debug(f"Discarding pooled page that failed to reset: {e}")
+        
+        try:
+            await context.close()
+        except Exception as e:
+            logger.debug(f"Failed to close pooled context: {e}")
+    
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Close the shared browser and stop Playwright."""
+        async with cls._lock:
+            # Closing the browser closes the pooled contexts with it
+            cls._idle_pages.clear()
+            await cls._stop()
+    
+    @classmethod
+    async def _stop(cls) -> None:
+        try:
+            if cls._browser:
+                await cls._browser.close()
+            if cls._playwright:
+                await cls._playwright.stop()
+        finally:
+            cls._playwright = cls._browser = None
@@ -5,6 +5,7 @@ This module provides tools for the Pydantic AI agent to validate, score,
 and filter product data to ensure only high-quality products are output.
 """
 
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 import re
 import logging
@@ -14,10 +15,50 @@ from datetime import datetime
 from pydantic import ValidationError
 from pydantic_ai import RunContext
 
-from agents.models import ScrapedProduct, ProductCard, AgentDependencies
+from agents.models import AffiliateNetwork, ScrapedProduct, ProductCard, AgentDependencies
 
 logger = logging.getLogger(__name__)
 
+# Compiled once at import; these run for every product we score
+_HAS_DIGIT_RE = re.compile(r'\d')
+_TITLE_SPEC_RE = re.compile(r'\b\d+\s*(gb|tb|inch|"|\'|oz|lbs?|kg)\b')
+_PRICE_CENTS_RE = re.compile(r'\d+\.\d{2}')
+_PRICE_NUMBER_RE = re.compile(r'[\d.]+')
+_PRICE_UNCLEAN_RE = re.compile(r'[^\d\.\$\,\s]')
+_CATEGORY_FORMAT_RE = re.compile(r'^[a-z0-9\-\s]+$')
+
+# Title and category keyword groups, each matched with one alternation search
+# instead of a Python-level `in` check per keyword
+_TITLE_BRAND_RE = re.compile('amazon|apple|samsung|nike|adidas')
+_TITLE_QUALITY_RE = re.compile('new|latest|premium|professional')
+_TITLE_SPAM_RE = re.compile('free|limited time|act now|buy now')
+_COMMON_CATEGORY_RE = re.compile(
+    'electronics|clothing|books|home|sports|toys|'
+    'automotive|health|beauty|food|tools|outdoor'
+)
+
+_TRUSTED_DOMAINS = frozenset({
+    'amazon.com', 'amazon.co.uk', 'amazon.ca', 'amazon.de',
+    'rakuten.com', 'walmart.com', 'target.com', 'bestbuy.com',
+    'ebay.com', 'etsy.com', 'shopify.com'
+})
+_TRUSTED_SUBDOMAIN_SUFFIXES = tuple(f'.{domain}' for domain in _TRUSTED_DOMAINS)
+
+_URL_SCHEMES = ('http://', 'https://')
+
+# Lowercase http(s) host with an optional port and nothing else in the authority;
+# for these urlparse's scheme and hostname are exactly the two groups
+_SIMPLE_URL_RE = re.compile(r'(https?)://([a-z0-9.-]+)(?::\d*)?(?=[/?#]|$)')
+
+_IMAGE_EXTENSIONS = frozenset({'jpg', 'jpeg', 'png', 'webp', 'gif', 'avif'})
+
+# Trust score per affiliate network value; unknown platforms get 50.0
+_PLATFORM_TRUST_SCORES = {
+    'amazon': 100.0,
+    'rakuten': 80.0,
+    'cj': 70.0,
+}
+
 
 class DataValidationError(Exception):
     """Exception raised when data validation fails."""
@@ -69,12 +110,13 @@ async def validate_and_score_products(
             
             validation_stats["passed_basic"] += 1
             
-            # Calculate comprehensive quality score
-            quality_score = _calculate_comprehensive_quality_score(product)
-            product.validation_score = quality_score
+            # Calculate comprehensive quality score; below the threshold this may
+            # be a partial score, so only passing products are re-scored
+            quality_score = _calculate_comprehensive_quality_score(product, quality_threshold)
             
             # Check quality threshold
             if quality_score >= quality_threshold:
+                product.validation_score = quality_score
                 validation_stats["passed_quality"] += 1
                 validated_products.append(product)
             else:
@@ -104,15 +146,15 @@ def _basic_validation(product: ScrapedProduct) -> bool:
         return False
     
     # Price validation
-    if not product.price or not any(c.isdigit() for c in product.price):
+    if not product.price or _HAS_DIGIT_RE.search(product.price) is None:
         return False
     
     # URL validation
-    if not product.affiliate_url or not str(product.affiliate_url).startswith(('http://', 'https://')):
+    if not product.affiliate_url or not str(product.affiliate_url).startswith(_URL_SCHEMES):
         return False
     
     # Image URL validation
-    if not product.original_image_url or not str(product.original_image_url).startswith(('http://', 'https://')):
+    if not product.original_image_url or not str(product.original_image_url).startswith(_URL_SCHEMES):
         return False
     
     # Category validation
@@ -122,34 +164,40 @@ def _basic_validation(product: ScrapedProduct) -> bool:
     return True
 
 
-def _calculate_comprehensive_quality_score(product: ScrapedProduct) -> float:
-    """Calculate a comprehensive quality score for a product."""
-    score = 0.0
-    max_score = 100.0
-    
-    # Title quality (25 points)
-    title_score = _score_title_quality(product.title)
-    score += title_score * 0.25
+def _calculate_comprehensive_quality_score(
+    product: ScrapedProduct,
+    min_score: Optional[float] = None
+) -> float:
+    """
+    Calculate a comprehensive quality score for a product.
     
-    # Price quality (20 points)
-    price_score = _score_price_quality(product.price)
-    score += price_score * 0.20
+    Args:
+        product: Product to score
+        min_score: Optional pass mark; once the product can no longer reach it,
+            the URL scorers are skipped and the partial (lower) score is returned
+        
+    Returns:
+        Score between 0.0 and 1.0, rounded to 3 decimal places
+    """
+    max_score = 100.0
     
-    # URL quality (20 points)
-    url_score = _score_url_quality(str(product.affiliate_url))
-    score += url_score * 0.20
+    # Cheap field checks first: title (25), price (20), category (10), platform (10)
+    title_points = _score_title_quality(product.title) * 0.25
+    price_points = _score_price_quality(product.price) * 0.20
+    category_points = _score_category_quality(product.category) * 0.10
+    platform_points = _score_platform_trust(product.platform) * 0.10
     
-    # Image quality (15 points)
-    image_score = _score_image_url_quality(str(product.original_image_url))
-    score += image_score * 0.15
+    # Reason: URL (20) and image (15) scoring stringify and parse URLs; skip them
+    # when even full marks there can't lift the product over the threshold
+    partial = title_points + price_points + category_points + platform_points
+    if min_score is not None and round((partial + 35.0) / max_score, 3) < min_score:
+        return round(partial / max_score, 3)
     
-    # Category quality (10 points)
-    category_score = _score_category_quality(product.category)
-    score += category_score * 0.10
+    url_points = _score_url_quality(str(product.affiliate_url)) * 0.20
+    image_points = _score_image_url_quality(str(product.original_image_url)) * 0.15
     
-    # Platform trust (10 points)
-    platform_score = _score_platform_trust(product.platform)
-    score += platform_score * 0.10
+    # Summed in the original field order so full scores are unchanged bit-for-bit
+    score = title_points + price_points + url_points + image_points + category_points + platform_points
     
     return round(score / max_score, 3)  # Normalize to 0-1 scale
 
@@ -174,13 +222,13 @@ def _score_title_quality(title: str) -> float:
     title_lower = title.lower()
     
     # Positive indicators
-    if any(brand in title_lower for brand in ['amazon', 'apple', 'samsung', 'nike', 'adidas']):
+    if _TITLE_BRAND_RE.search(title_lower):
         score += 10.0  # Brand names
     
-    if re.search(r'\b\d+\s*(gb|tb|inch|"|\'|oz|lbs?|kg)\b', title_lower):
+    if _TITLE_SPEC_RE.search(title_lower):
         score += 15.0  # Specifications
     
-    if any(word in title_lower for word in ['new', 'latest', 'premium', 'professional']):
+    if _TITLE_QUALITY_RE.search(title_lower):
         score += 10.0  # Quality indicators
     
     # Negative indicators
@@ -190,7 +238,7 @@ def _score_title_quality(title: str) -> float:
     if len([c for c in title if c.isupper()]) > len(title) * 0.5:
         score -= 10.0  # Too much uppercase
     
-    if any(spam_word in title_lower for spam_word in ['free', 'limited time', 'act now', 'buy now']):
+    if _TITLE_SPAM_RE.search(title_lower):
         score -= 10.0  # Spammy words
     
     return max(0.0, min(100.0, score))
@@ -208,16 +256,16 @@ def _score_price_quality(price: str) -> float:
         score += 30.0
     
     # Proper decimal format
-    if re.search(r'\d+\.\d{2}', price):
+    if _PRICE_CENTS_RE.search(price):
         score += 25.0  # Has cents
-    elif re.search(r'\d+', price):
+    elif _HAS_DIGIT_RE.search(price):
         score += 15.0  # Has numbers
     
     # Reasonable price range (assuming USD)
-    numbers = re.findall(r'[\d.]+', price)
-    if numbers:
+    first_number = _PRICE_NUMBER_RE.search(price)
+    if first_number:
         try:
-            price_value = float(numbers[0])
+            price_value = float(first_number.group())
             if 1.0 <= price_value <= 10000.0:  # Reasonable range
                 score += 25.0
             elif 0.01 <= price_value < 1.0 or 10000.0 < price_value <= 50000.0:
@@ -226,36 +274,37 @@ def _score_price_quality(price: str) -> float:
             pass
     
     # Clean formatting
-    if not re.search(r'[^\d\.\$\,\s]', price):  # Only digits, dots, dollars, commas, spaces
+    if not _PRICE_UNCLEAN_RE.search(price):  # Only digits, dots, dollars, commas, spaces
         score += 20.0
     
     return max(0.0, min(100.0, score))
 
 
+@lru_cache(maxsize=4096)
 def _score_url_quality(url: str) -> float:
-    """Score URL structure and trustworthiness."""
+    """Score URL structure and trustworthiness (cached; the same URLs recur across scrapes)."""
     if not url:
         return 0.0
     
     try:
-        parsed = urlparse(url)
+        # Normalized http(s) URLs (what HttpUrl produces) are read with one regex
+        # match; anything unusual goes through urlparse for its edge-case handling
+        match = _SIMPLE_URL_RE.match(url)
+        if match:
+            scheme, domain = match.groups()
+        else:
+            parsed = urlparse(url)
+            scheme, domain = parsed.scheme, parsed.hostname or ''
         score = 0.0
         
-        # Domain trust
-        domain = parsed.netloc.lower()
-        trusted_domains = [
-            'amazon.com', 'amazon.co.uk', 'amazon.ca', 'amazon.de',
-            'rakuten.com', 'walmart.com', 'target.com', 'bestbuy.com',
-            'ebay.com', 'etsy.com', 'shopify.com'
-        ]
-        
-        if any(trusted in domain for trusted in trusted_domains):
+        # Domain trust - the host must be a trusted domain or one of its subdomains
+        if domain in _TRUSTED_DOMAINS or domain.endswith(_TRUSTED_SUBDOMAIN_SUFFIXES):
             score += 40.0
-        elif domain.endswith('.com') or domain.endswith('.co.uk'):
+        elif domain.endswith(('.com', '.co.uk')):
             score += 20.0
         
         # HTTPS
-        if parsed.scheme == 'https':
+        if scheme == 'https':
             score += 20.0
         
         # URL structure
@@ -272,8 +321,9 @@ def _score_url_quality(url: str) -> float:
         return 10.0  # Some points for having a URL at all
 
 
+@lru_cache(maxsize=4096)
 def _score_image_url_quality(image_url: str) -> float:
-    """Score image URL quality and format."""
+    """Score image URL quality and format (cached; the same URLs recur across scrapes)."""
     if not image_url:
         return 0.0
     
@@ -286,8 +336,9 @@ def _score_image_url_quality(image_url: str) -> float:
     elif image_url.startswith('http://'):
         score += 10.0
     
-    # Image format
-    if any(ext in image_lower for ext in ['.jpg', '.jpeg', '.png', '.webp']):
+    # Image format - check the path's extension, ignoring any query string
+    extension = image_lower.split('?', 1)[0].rsplit('.', 1)[-1]
+    if extension in _IMAGE_EXTENSIONS:
         score += 25.0
     
     # Not a placeholder or broken image
@@ -314,15 +365,11 @@ def _score_category_quality(category: str) -> float:
         score += 40.0
     
     # Proper formatting (no special characters except hyphens)
-    if re.match(r'^[a-z0-9\-\s]+$', category_lower):
+    if _CATEGORY_FORMAT_RE.match(category_lower):
         score += 30.0
     
     # Common categories
-    common_categories = [
-        'electronics', 'clothing', 'books', 'home', 'sports', 'toys',
-        'automotive', 'health', 'beauty', 'food', 'tools', 'outdoor'
-    ]
-    if any(cat in category_lower for cat in common_categories):
+    if _COMMON_CATEGORY_RE.search(category_lower):
         score += 30.0
     
     return max(0.0, min(100.0, score))
@@ -330,14 +377,9 @@ def _score_category_quality(category: str) -> float:
 
 def _score_platform_trust(platform) -> float:
     """Score platform trustworthiness."""
-    platform_scores = {
-        'amazon': 100.0,
-        'rakuten': 80.0,
-        'cj': 70.0,
-    }
-    
-    platform_name = platform.value if hasattr(platform, 'value') else str(platform).lower()
-    return platform_scores.get(platform_name, 50.0)
+    # Enum members score by their value; anything else (e.g. a raw string) by its lowercased text
+    key = platform.value if isinstance(platform, AffiliateNetwork) else str(platform).lower()
+    return _PLATFORM_TRUST_SCORES.get(key, 50.0)
 
 
 async def convert_to_product_cards(
@@ -364,18 +406,15 @@ async def convert_to_product_cards(
     
     for product in validated_products:
         try:
-            product_card = product.to_product_card()
+            # ProductCard validates on construction, so a failed conversion
+            # raises here; no separate dump/re-validate pass is needed
+            product_cards.append(product.to_product_card())
+            
+        except ValidationError as e:
+            logger.warning(f"ProductCard validation failed for '{product.title[:50]}': {e}")
+            conversion_errors += 1
+            continue
             
-            # Final validation of ProductCard
-            try:
-                # This will raise ValidationError if invalid
-                ProductCard.model_validate(product_card.model_dump())
-                product_cards.append(product_card)
-            except ValidationError as e:
-                logger.warning(f"ProductCard validation failed for '{product.title[:50]}': {e}")
-                conversion_errors += 1
-                continue
-                
         except Exception as e:
             logger.warning(f"Conversion failed for product '{product.title[:50]}': {e}")
             conversion_errors += 1
@@ -413,25 +452,31 @@ async def generate_quality_report(
     min_score = min(scores)
     max_score = max(scores)
     
-    # Score distribution
-    high_quality = len([s for s in scores if s >= 0.8])
-    medium_quality = len([s for s in scores if 0.6 <= s < 0.8])
-    low_quality = len([s for s in scores if s < 0.6])
-    
-    # Platform breakdown
-    platform_stats: Dict[str, Dict[str, Any]] = {}
+    # Score distribution and threshold passes, counted in a single pass
+    threshold = ctx.deps.quality_threshold
+    high_quality = medium_quality = low_quality = passing_products = 0
+    for s in scores:
+        if s >= 0.8:
+            high_quality += 1
+        elif s >= 0.6:
+            medium_quality += 1
+        else:
+            low_quality += 1
+        if s >= threshold:
+            passing_products += 1
+    
+    # Platform breakdown - accumulate running totals rather than per-platform score lists
+    platform_counts: Dict[str, int] = {}
+    platform_score_sums: Dict[str, float] = {}
     for product in products:
         platform = product.platform.value if hasattr(product.platform, 'value') else str(product.platform)
-        if platform not in platform_stats:
-            platform_stats[platform] = {"count": 0, "avg_score": 0.0, "scores": []}
-        platform_stats[platform]["count"] += 1
-        platform_stats[platform]["scores"].append(product.validation_score or 0.0)
+        platform_counts[platform] = platform_counts.get(platform, 0) + 1
+        platform_score_sums[platform] = platform_score_sums.get(platform, 0.0) + (product.validation_score or 0.0)
     
-    # Calculate platform averages
-    for platform in platform_stats:
-        scores_list = platform_stats[platform]["scores"]
-        platform_stats[platform]["avg_score"] = sum(scores_list) / len(scores_list) if scores_list else 0.0
-        del platform_stats[platform]["scores"]  # Remove raw scores from output
+    platform_stats: Dict[str, Dict[str, Any]] = {
+        platform: {"count": count, "avg_score": platform_score_sums[platform] / count}
+        for platform, count in platform_counts.items()
+    }
     
     return {
         "total_products": len(products),
@@ -446,7 +491,7 @@ async def generate_quality_report(
             "low_quality": low_quality
         },
         "platform_breakdown": platform_stats,
-        "threshold": ctx.deps.quality_threshold,
-        "passing_products": len([s for s in scores if s >= ctx.deps.quality_threshold]),
+        "threshold": threshold,
+        "passing_products": passing_products,
         "generated_at": datetime.now().isoformat()
     }
\ No newline at end of file
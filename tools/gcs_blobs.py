@@ -0,0 +1,139 @@
+"""
+Google Cloud Storage blob helpers for the image tools.
+
+These are the synchronous client calls behind tools/image_processor: a shared
+client per credentials file, content-addressed uploads that skip unchanged
+images, and batched deletion of old blobs. Callers run them in a worker thread.
+"""
+
+from typing import List, Tuple
+import base64
+import datetime
+import hashlib
+from functools import lru_cache
+import logging
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+# Deletes per GCS batch request (the JSON API accepts at most 100)
+GCS_BATCH_SIZE = 100
+
+
+@lru_cache(maxsize=4)
+def get_gcs_client(credentials_path: str) -> storage.Client:
+    """Storage client per credentials file, shared so its authorized session is reused."""
+    return storage.Client.from_service_account_json(credentials_path)
+
+
+def upload_blob_if_changed(
+    bucket: storage.Bucket,
+    image_data: bytes,
+    blob_path: str,
+    content_type: str
+) -> str:
+    """Upload image data unless the stored blob already holds the same bytes.
+    
+    Returns:
+        Public URL of the blob
+    """
+    # Reason: SEO filenames are stable per title+category, so re-runs usually
+    # find the same bytes already stored; one metadata GET beats a full PUT
+    existing = bucket.get_blob(blob_path)
+    if existing is not None and existing.md5_hash == _gcs_md5(image_data):
+        logger.debug(f"Image unchanged, skipping upload: {blob_path}")
+        return existing.public_url
+    
+    # Create blob
+    blob = bucket.blob(blob_path)
+    
+    # Set metadata
+    blob.metadata = {
+        'uploaded_by': 'affiliate_scraper',
+        'content_type': content_type,
+    }
+    blob.content_type = content_type
+    
+    # Upload the image data; a first write only succeeds if nobody else created
+    # the object in the meantime, otherwise the concurrent upload is kept
+    try:
+        blob.upload_from_string(
+            image_data,
+            content_type=content_type,
+            if_generation_match=existing.generation if existing is not None else 0
+        )
+    except PreconditionFailed:
+        logger.debug(f"Image uploaded concurrently, keeping existing: {blob_path}")
+        return blob.public_url
+    
+    # Make the blob publicly accessible
+    blob.make_public()
+    
+    # Return the public URL
+    return blob.public_url
+
+
+def _gcs_md5(data: bytes) -> str:
+    """MD5 digest in the base64 form GCS reports as a blob's md5_hash."""
+    return base64.b64encode(hashlib.md5(data).digest()).decode('ascii')
+
+
+def list_blobs_older_than(
+    bucket: storage.Bucket,
+    prefix: str,
+    cutoff_date: datetime.datetime
+) -> Tuple[int, List[storage.Blob]]:
+    """List blobs under prefix and pick those created before cutoff_date.
+    
+    Returns:
+        Tuple of (blobs listed, blobs old enough to delete)
+    """
+    # List blobs in the folder, fetching only the fields cleanup needs
+    blobs = bucket.list_blobs(prefix=prefix, fields="items(name,timeCreated),nextPageToken")
+    
+    total_count = 0
+    old_blobs = []
+    
+    for blob in blobs:
+        total_count += 1
+        
+        # Check if blob is old enough to delete
+        if blob.time_created and blob.time_created.replace(tzinfo=None) < cutoff_date:
+            old_blobs.append(blob)
+    
+    return total_count, old_blobs
+
+
+def delete_blob_batch(gcs_client: storage.Client, blobs: List[storage.Blob]) -> int:
+    """Delete up to GCS_BATCH_SIZE blobs in one batched request, returning how many are gone."""
+    # Reason: the client keeps its batch stack per thread, so batches opened from
+    # separate worker threads don't see each other and can run concurrently
+    try:
+        with gcs_client.batch():
+            for blob in blobs:
+                blob.delete()
+        logger.debug(f"Deleted {len(blobs)} old images")
+        return len(blobs)
+    except Exception as e:
+        # Reason: a failed batch only reports its last error, so retry the
+        # chunk blob by blob to find out which deletes actually failed
+        logger.warning(f"Batch delete failed, retrying individually: {e}")
+        return _delete_blobs_individually(blobs)
+
+
+def _delete_blobs_individually(blobs: List[storage.Blob]) -> int:
+    """Delete blobs one request at a time, returning how many are gone."""
+    deleted_count = 0
+    for blob in blobs:
+        try:
+            blob.delete()
+            deleted_count += 1
+            logger.debug(f"Deleted old image: {blob.name}")
+        except NotFound:
+            # Already removed, e.g. by the batch that just failed part-way
+            deleted_count += 1
+        except Exception as e:
+            logger.warning(f"Failed to delete {blob.name}: {e}")
+    return deleted_count
@@ -6,8 +6,9 @@ including downloading from original URLs, generating SEO-friendly names, and
 uploading to GCS with public access.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import asyncio
+import datetime
 import hashlib
 import re
 from io import BytesIO
@@ -15,15 +16,56 @@ import logging
 
 import httpx
 from google.cloud import storage
-from PIL import Image
+from PIL import Image, features
 from pydantic_ai import RunContext
 from pydantic_ai import ModelRetry
 
 from agents.models import ScrapedProduct, AgentDependencies
+from tools.gcs_blobs import (
+    GCS_BATCH_SIZE, get_gcs_client, upload_blob_if_changed,
+    list_blobs_older_than, delete_blob_batch
+)
 from pydantic import HttpUrl
 
 logger = logging.getLogger(__name__)
 
+# Concurrent image downloads per batch; the shared HTTP client's pool is sized to match
+MAX_CONCURRENT_IMAGE_DOWNLOADS = 8
+
+# Batched delete requests in flight at once during cleanup
+MAX_CONCURRENT_DELETE_BATCHES = 8
+
+# Optimized images are stored as WebP when Pillow was built with libwebp
+_WEBP_AVAILABLE = features.check('webp')
+
+# File extension and content type for each format _optimize_image can emit
+_IMAGE_FORMATS = {
+    'WEBP': ('.webp', 'image/webp'),
+    'JPEG': ('.jpg', 'image/jpeg'),
+}
+
+# Largest image body we'll download
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# Filename slugs: non-ASCII text keeps the Unicode-aware regexes, ASCII text
+# takes the same str.translate fast path as ScrapedProduct._generate_slug
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
+_SLUG_ASCII_TABLE = {
+    code: None
+    for code in range(128)
+    if not (chr(code).isalnum() or chr(code).isspace() or chr(code) in '_-')
+}
+_SLUG_ASCII_TABLE[ord('-')] = ' '
+
+_URL_SCHEMES = ('http://', 'https://')
+
+_IMAGE_REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
 
 class ImageProcessingError(Exception):
     """Exception raised when image processing fails."""
@@ -58,9 +100,7 @@ async def process_product_images(
     
     # Initialize GCS client
     try:
-        gcs_client = storage.Client.from_service_account_json(
-            ctx.deps.gcs_credentials_path
-        )
+        gcs_client = get_gcs_client(ctx.deps.gcs_credentials_path)
         bucket = gcs_client.bucket(bucket_name)
     except Exception as e:
         logger.error(f"Failed to initialize GCS client: {e}")
@@ -71,7 +111,7 @@ async def process_product_images(
     failed_uploads = 0
     
     # Process images with concurrency limit
-    semaphore = asyncio.Semaphore(3)  # Limit concurrent downloads
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_IMAGE_DOWNLOADS)  # Limit concurrent downloads
     
     async def process_single_product(product: ScrapedProduct) -> ScrapedProduct:
         nonlocal successful_uploads, failed_uploads
@@ -79,7 +119,7 @@ async def process_product_images(
         async with semaphore:
             try:
                 processed_product = await _process_single_image(
-                    product, bucket, image_folder
+                    product, bucket, image_folder, client
                 )
                 successful_uploads += 1
                 return processed_product
@@ -90,9 +130,15 @@ async def process_product_images(
                 # Return original product with no processed image
                 return product
     
-    # Process all products concurrently
-    tasks = [process_single_product(product) for product in products]
-    processed_products = await asyncio.gather(*tasks, return_exceptions=False)
+    # Process all products concurrently over one pooled client, so images from
+    # the same CDN reuse connections instead of a new TLS handshake per download
+    limits = httpx.Limits(
+        max_connections=MAX_CONCURRENT_IMAGE_DOWNLOADS,
+        max_keepalive_connections=MAX_CONCURRENT_IMAGE_DOWNLOADS
+    )
+    async with httpx.AsyncClient(timeout=30.0, headers=_IMAGE_REQUEST_HEADERS, limits=limits) as client:
+        tasks = [process_single_product(product) for product in products]
+        processed_products = await asyncio.gather(*tasks, return_exceptions=False)
     
     logger.info(
         f"Image processing complete: {successful_uploads} successful, "
@@ -105,22 +151,25 @@ async def process_product_images(
 async def _process_single_image(
     product: ScrapedProduct,
     bucket: storage.Bucket,
-    image_folder: str
+    image_folder: str,
+    client: httpx.AsyncClient
 ) -> ScrapedProduct:
     """Process a single product's image."""
     try:
         # Download the image
-        image_data = await _download_image(str(product.original_image_url))
+        image_data = await _download_image(client, str(product.original_image_url))
         
-        # Optimize the image
-        optimized_data = _optimize_image(image_data)
+        # Optimize the image off the event loop; Pillow releases the GIL while
+        # decoding, resizing and encoding, so other downloads keep progressing
+        optimized_data, image_format = await asyncio.to_thread(_optimize_image, image_data)
+        extension, content_type = _IMAGE_FORMATS[image_format]
         
         # Generate SEO-friendly filename
-        filename = _generate_seo_filename(product.title, product.category)
+        filename = _generate_seo_filename(product.title, product.category, extension)
         
         # Upload to GCS
         public_url = await _upload_to_gcs(
-            bucket, optimized_data, f"{image_folder}/{filename}"
+            bucket, optimized_data, f"{image_folder}/{filename}", content_type
         )
         
         # Update product with processed image URL
@@ -134,20 +183,15 @@ async def _process_single_image(
         raise
 
 
-async def _download_image(image_url: str) -> bytes:
-    """Download image from URL with proper headers and error handling."""
-    if not image_url or not image_url.startswith(('http://', 'https://')):
+async def _download_image(client: httpx.AsyncClient, image_url: str) -> bytes:
+    """Download image from URL with the shared client, with error handling."""
+    if not image_url or not image_url.startswith(_URL_SCHEMES):
         raise ImageProcessingError(f"Invalid image URL: {image_url}")
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-    }
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.get(image_url, headers=headers, follow_redirects=True)
+    try:
+        # Stream the body so an oversized image is abandoned at the limit instead
+        # of being buffered in full first (content-length may be absent or wrong)
+        async with client.stream('GET', image_url, follow_redirects=True) as response:
             response.raise_for_status()
             
             # Validate content type
@@ -157,27 +201,37 @@ async def _download_image(image_url: str) -> bytes:
             
             # Validate file size (max 10MB)
             content_length = response.headers.get('content-length')
-            if content_length and int(content_length) > 10 * 1024 * 1024:
+            if content_length and int(content_length) > MAX_IMAGE_BYTES:
                 raise ImageProcessingError("Image too large (>10MB)")
             
-            image_data = response.content
-            
-            # Validate we got actual image data
-            if len(image_data) < 1000:  # Less than 1KB is suspicious
-                raise ImageProcessingError("Downloaded image data too small")
-            
-            return image_data
-            
-        except httpx.HTTPStatusError as e:
-            raise ImageProcessingError(f"HTTP error downloading image: {e.response.status_code}")
-        except httpx.TimeoutException:
-            raise ImageProcessingError("Timeout downloading image")
-        except Exception as e:
-            raise ImageProcessingError(f"Error downloading image: {e}")
+            buffer = bytearray()
+            async for chunk in response.aiter_bytes(65536):
+                buffer.extend(chunk)
+                if len(buffer) > MAX_IMAGE_BYTES:
+                    raise ImageProcessingError("Image too large (>10MB)")
+        
+        image_data = bytes(buffer)
+        
+        # Validate we got actual image data
+        if len(image_data) < 1000:  # Less than 1KB is suspicious
+            raise ImageProcessingError("Downloaded image data too small")
+        
+        return image_data
+        
+    except httpx.HTTPStatusError as e:
+        raise ImageProcessingError(f"HTTP error downloading image: {e.response.status_code}")
+    except httpx.TimeoutException:
+        raise ImageProcessingError("Timeout downloading image")
+    except Exception as e:
+        raise ImageProcessingError(f"Error downloading image: {e}")
 
 
-def _optimize_image(image_data: bytes) -> bytes:
-    """Optimize image for web use (resize, compress, convert format)."""
+def _optimize_image(image_data: bytes) -> Tuple[bytes, str]:
+    """Optimize image for web use (resize, compress, convert format).
+    
+    Returns:
+        Tuple of (image bytes, format key into _IMAGE_FORMATS)
+    """
     try:
         # Open image with PIL
         with Image.open(BytesIO(image_data)) as img:
@@ -197,34 +251,46 @@ def _optimize_image(image_data: bytes) -> bytes:
             if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
                 img.thumbnail(max_size, Image.Resampling.LANCZOS)
             
-            # Save as optimized JPEG
+            # Save as WebP (smaller at the same visual quality), or optimized JPEG
+            # when this Pillow build lacks WebP support
             output = BytesIO()
-            img.save(
-                output,
-                format='JPEG',
-                quality=85,  # Good balance of quality vs size
-                optimize=True,
-                progressive=True
-            )
-            
-            return output.getvalue()
+            if _WEBP_AVAILABLE:
+                img.save(output, format='WEBP', quality=82, method=4)
+                return output.getvalue(), 'WEBP'
+            else:
+                img.save(
+                    output,
+                    format='JPEG',
+                    quality=85,  # Good balance of quality vs size
+                    optimize=True,
+                    progressive=True
+                )
+                return output.getvalue(), 'JPEG'
             
     except Exception as e:
         logger.warning(f"Image optimization failed, using original: {e}")
-        return image_data  # Return original if optimization fails
+        # Reason: Pillow couldn't decode it, so the original keeps the JPEG
+        # labelling every upload had before WebP output was added
+        return image_data, 'JPEG'  # Return original if optimization fails
 
 
-def _generate_seo_filename(title: str, category: str) -> str:
+def _slugify(text: str) -> str:
+    """Lowercase text into hyphen-separated words, dropping punctuation."""
+    lowered = text.lower()
+    if lowered.isascii():
+        # Reason: split() drops leading/trailing separators, matching strip('-')
+        return '-'.join(lowered.translate(_SLUG_ASCII_TABLE).split())
+    slug = _SLUG_STRIP_RE.sub('', lowered)
+    return _SLUG_DASH_RE.sub('-', slug).strip('-')
+
+
+def _generate_seo_filename(title: str, category: str, extension: str) -> str:
     """Generate SEO-friendly filename from product title and category."""
     # Clean and truncate title
-    clean_title = re.sub(r'[^\w\s-]', '', title.lower())
-    clean_title = re.sub(r'[-\s]+', '-', clean_title)
-    clean_title = clean_title.strip('-')[:30]  # Limit length
+    clean_title = _slugify(title)[:30]  # Limit length
     
     # Clean category
-    clean_category = re.sub(r'[^\w\s-]', '', category.lower())
-    clean_category = re.sub(r'[-\s]+', '-', clean_category)
-    clean_category = clean_category.strip('-')[:20]
+    clean_category = _slugify(category)[:20]
     
     # Create base filename
     if clean_title and clean_category:
@@ -237,32 +303,23 @@ def _generate_seo_filename(title: str, category: str) -> str:
         base_filename = f"product-{int(time.time())}"
     
     # Add unique suffix to avoid collisions
-    suffix = hashlib.md5(f"{title}{category}".encode()).hexdigest()[:8]
+    suffix = hashlib.blake2s(f"{title}{category}".encode(), digest_size=4).hexdigest()
     
-    return f"{base_filename}-{suffix}.jpg"
+    return f"{base_filename}-{suffix}{extension}"
 
 
-async def _upload_to_gcs(bucket: storage.Bucket, image_data: bytes, blob_path: str) -> str:
+async def _upload_to_gcs(
+    bucket: storage.Bucket,
+    image_data: bytes,
+    blob_path: str,
+    content_type: str
+) -> str:
     """Upload image data to Google Cloud Storage and make it public."""
     try:
-        # Create blob
-        blob = bucket.blob(blob_path)
-        
-        # Set metadata
-        blob.metadata = {
-            'uploaded_by': 'affiliate_scraper',
-            'content_type': 'image/jpeg',
-        }
-        blob.content_type = 'image/jpeg'
-        
-        # Upload the image data
-        blob.upload_from_string(image_data, content_type='image/jpeg')
-        
-        # Make the blob publicly accessible
-        blob.make_public()
-        
-        # Return the public URL
-        return blob.public_url
+        # The GCS client is synchronous; run the lookup and upload off the event loop
+        return await asyncio.to_thread(
+            upload_blob_if_changed, bucket, image_data, blob_path, content_type
+        )
         
     except Exception as e:
         raise ImageProcessingError(f"Failed to upload to GCS: {e}")
@@ -287,31 +344,29 @@ async def cleanup_old_images(
         Dictionary with cleanup statistics
     """
     try:
-        gcs_client = storage.Client.from_service_account_json(
-            ctx.deps.gcs_credentials_path
-        )
+        gcs_client = get_gcs_client(ctx.deps.gcs_credentials_path)
         bucket = gcs_client.bucket(bucket_name)
         
-        # List blobs in the folder
-        blobs = bucket.list_blobs(prefix=f"{image_folder}/")
-        
-        import datetime
         cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days_old)
         
-        deleted_count = 0
-        total_count = 0
+        # Listing pages and batch requests are blocking HTTP calls; run them in
+        # worker threads so the event loop keeps serving other tool calls meanwhile
+        total_count, old_blobs = await asyncio.to_thread(
+            list_blobs_older_than, bucket, f"{image_folder}/", cutoff_date
+        )
         
-        for blob in blobs:
-            total_count += 1
-            
-            # Check if blob is old enough to delete
-            if blob.time_created and blob.time_created.replace(tzinfo=None) < cutoff_date:
-                try:
-                    blob.delete()
-                    deleted_count += 1
-                    logger.debug(f"Deleted old image: {blob.name}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete {blob.name}: {e}")
+        # Send the batched deletes concurrently, one batch per worker thread
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_DELETE_BATCHES)
+        
+        async def delete_chunk(chunk: List[storage.Blob]) -> int:
+            async with semaphore:
+                return await asyncio.to_thread(delete_blob_batch, gcs_client, chunk)
+        
+        deleted_counts = await asyncio.gather(*(
+            delete_chunk(old_blobs[start:start + GCS_BATCH_SIZE])
+            for start in range(0, len(old_blobs), GCS_BATCH_SIZE)
+        ))
+        deleted_count = sum(deleted_counts)
         
         logger.info(f"Cleanup complete: deleted {deleted_count} out of {total_count} images")
         
@@ -5,10 +5,17 @@ This module provides tools that the AI agent can use to perform intelligent
 web scraping using Playwright browser automation.
 """
 
+from collections import defaultdict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 import asyncio
 import random
-from playwright.async_api import async_playwright, Page
+import re
+from urllib.parse import urlparse
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from pydantic_ai import RunContext
 from pydantic_ai import ModelRetry
 import logging
@@ -17,10 +24,66 @@ from agents.models import ScrapedProduct, AgentDependencies, AffiliateNetwork
 from platforms.amazon import AmazonScraper
 from platforms.rakuten import RakutenScraper
 from platforms.cj import CJScraper
-from config.settings import settings
+from tools.browser_pool import BrowserPool
+from tools.rate_limiter import HostRateLimiter
+from tools.scrape_cache import ScrapeResultCache
 
 logger = logging.getLogger(__name__)
 
+# Paces requests per host across every scrape in this process
+_rate_limiter = HostRateLimiter()
+
+# Overlapping identical tool calls share one page load, and a URL re-requested
+# within a few minutes is served from the last result
+_scrape_cache = ScrapeResultCache(max_entries=64, ttl_seconds=300.0)
+
+# Elements that indicate a bot check rather than real content
+_BOT_INDICATORS = (
+    "#captcha",
+    ".captcha",
+    "[aria-label*='captcha']",
+    "input[name*='captcha']",
+    ".cf-browser-verification",  # Cloudflare
+    "#challenge-form",  # Generic challenge
+    ".anti-bot",
+    ".bot-detection",
+)
+_CAPTCHA_INDICATORS = ("#captcha", ".captcha")
+
+# Keyword checks compiled once; each scans the text in a single case-insensitive pass
+_BOT_TITLE_RE = re.compile("blocked|captcha|verification|challenge", re.IGNORECASE)
+_BOT_URL_RE = re.compile("captcha|challenge|blocked", re.IGNORECASE)
+_ACCESS_BLOCKED_TITLE_RE = re.compile("blocked|access denied", re.IGNORECASE)
+_NETWORK_ERROR_RE = re.compile("timeout|net::", re.IGNORECASE)
+_RETRYABLE_ERROR_RE = re.compile("rate limit|429|blocked|captcha", re.IGNORECASE)
+
+# Returns the first indicator selector present on the page (or null) together
+# with the document title, replacing a query_selector round-trip per indicator
+_BOT_CHECK_JS = """
+(selectors) => [
+    selectors.find(selector => document.querySelector(selector) !== null) || null,
+    document.title
+]
+"""
+
+# Picks a random link/button/product in the page, scrolls it into view if needed
+# and returns its centre, so a hover costs one round-trip instead of an element
+# handle for every match
+_HOVER_TARGET_JS = """
+() => {
+    const elements = document.querySelectorAll("a, button, .product");
+    if (!elements.length) return null;
+    const element = elements[Math.floor(Math.random() * elements.length)];
+    let rect = element.getBoundingClientRect();
+    if (rect.top < 0 || rect.bottom > window.innerHeight) {
+        element.scrollIntoView({block: "center"});
+        rect = element.getBoundingClientRect();
+    }
+    if (!rect.width || !rect.height) return null;
+    return [rect.x + rect.width / 2, rect.y + rect.height / 2];
+}
+"""
+
 
 class PlaywrightScrapingError(Exception):
     """Exception raised when Playwright scraping fails."""
@@ -30,42 +93,26 @@ class PlaywrightScrapingError(Exception):
 class PlatformScraperRegistry:
     """Registry for platform-specific scrapers."""
     
-    _scrapers: Dict[AffiliateNetwork, Any] = {}
+    # Built once at import so lookups are a plain dict hit on every scrape
+    _scrapers: Dict[AffiliateNetwork, Any] = {
+        AffiliateNetwork.AMAZON: AmazonScraper(),
+        AffiliateNetwork.RAKUTEN: RakutenScraper(),
+        AffiliateNetwork.CJ: CJScraper(),
+    }
     
     @classmethod
     def get_scraper(cls, platform: AffiliateNetwork):
         """Get the appropriate scraper for the platform."""
-        if platform not in cls._scrapers:
-            if platform == AffiliateNetwork.AMAZON:
-                cls._scrapers[platform] = AmazonScraper()
-            elif platform == AffiliateNetwork.RAKUTEN:
-                cls._scrapers[platform] = RakutenScraper()
-            elif platform == AffiliateNetwork.CJ:
-                cls._scrapers[platform] = CJScraper()
-            else:
-                raise ValueError(f"Unsupported platform: {platform}")
-        
-        return cls._scrapers[platform]
+        try:
+            return cls._scrapers[platform]
+        except KeyError:
+            raise ValueError(f"Unsupported platform: {platform}") from None
 
 
-async def create_browser_context():
-    """Create a Playwright browser context with optimal settings for scraping."""
-    playwright = await async_playwright().start()
-    
-    browser = await playwright.chromium.launch(
-        headless=settings.browser_headless,
-        args=settings.get_browser_args()
-    )
-    
-    # Create context with realistic user agent and settings
-    context = await browser.new_context(
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        viewport={"width": 1920, "height": 1080},
-        locale="en-US",
-        timezone_id="America/New_York"
-    )
-    
-    return playwright, browser, context
+@lru_cache(maxsize=16)
+def _platform_enum(platform: str) -> AffiliateNetwork:
+    """Resolve a platform name to its enum; tool calls repeat the same few names."""
+    return AffiliateNetwork(platform.lower())
 
 
 async def scrape_products_from_url(
@@ -96,35 +143,67 @@ async def scrape_products_from_url(
     Raises:
         ModelRetry: For recoverable errors that should trigger retry
     """
+    key = (
+        url,
+        platform,
+        category,
+        expected_count,
+        tuple(sorted(custom_selectors.items())) if custom_selectors else None,
+        ctx.deps.quality_threshold,
+    )
+    
+    return await _scrape_cache.get_or_scrape(
+        key,
+        lambda: _scrape_products_from_url(ctx, url, platform, category, expected_count, custom_selectors),
+        url
+    )
+
+
+async def _scrape_products_from_url(
+    ctx: RunContext[AgentDependencies],
+    url: str,
+    platform: str,
+    category: str,
+    expected_count: int,
+    custom_selectors: Optional[Dict[str, str]]
+) -> List[ScrapedProduct]:
+    """Run one scrape of a URL; see scrape_products_from_url."""
+    host = urlparse(url).hostname or url
+    retry_after: Optional[float] = None
+    
     try:
         # Convert platform string to enum
-        platform_enum = AffiliateNetwork(platform.lower())
+        platform_enum = _platform_enum(platform)
         scraper = PlatformScraperRegistry.get_scraper(platform_enum)
         
         logger.info(f"Starting scrape of {url} for {platform} platform")
         
-        # Create browser context
-        playwright, browser, context = await create_browser_context()
+        # Wait for this host's next slot; the pace adapts to blocks and throttling
+        await _rate_limiter.acquire(host, ctx.deps.scraping_delay_seconds)
         
-        try:
-            page = await context.new_page()
-            
-            # Add delay to avoid detection
-            delay = ctx.deps.scraping_delay_seconds + random.uniform(-0.5, 0.5)
-            await asyncio.sleep(delay)
+        # Lease a pooled page in the shared browser, skipping images, fonts,
+        # media and trackers the extraction never reads
+        async with BrowserPool.page() as (_, page):
+            await page.route("**/*", scraper.route_request)
             
             # Navigate to URL with error handling
             try:
-                response = await page.goto(url, wait_until="networkidle", timeout=30000)
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
                 
                 if not response or response.status >= 400:
+                    if response:
+                        retry_after = _parse_retry_after(response.headers.get("retry-after"))
                     raise ModelRetry(f"Failed to load {url}: HTTP {response.status if response else 'timeout'}")
                 
             except Exception as e:
-                if "timeout" in str(e).lower() or "net::" in str(e).lower():
+                if _NETWORK_ERROR_RE.search(str(e)):
                     raise ModelRetry(f"Network timeout loading {url}. Please retry with longer delay.")
                 raise e
             
+            # Wait for the product grid itself rather than network idle, which
+            # pages with polling analytics or ads may take seconds to reach or never do
+            await _wait_until_ready(page, scraper.get_selectors(custom_selectors).get("product_container"))
+            
             # Check for common bot detection patterns
             await _handle_bot_detection(page, url)
             
@@ -147,23 +226,20 @@ async def scrape_products_from_url(
             
             logger.info(f"Filtered to {len(high_quality_products)} high-quality products (score >= {quality_threshold})")
             
+            _rate_limiter.on_success(host)
             return high_quality_products
             
-        finally:
-            # Clean up browser resources
-            await context.close()
-            await browser.close()
-            await playwright.stop()
-            
     except ModelRetry:
-        # Re-raise ModelRetry exceptions so agent can retry
+        # Back off this host, then re-raise so the agent can retry
+        _rate_limiter.on_failure(host, retry_after)
         raise
     except Exception as e:
         error_msg = f"Scraping failed for {url}: {str(e)}"
         logger.error(error_msg)
         
         # Determine if this is a recoverable error
-        if any(keyword in str(e).lower() for keyword in ["rate limit", "429", "blocked", "captcha"]):
+        if _RETRYABLE_ERROR_RE.search(str(e)):
+            _rate_limiter.on_failure(host)
             raise ModelRetry(f"Rate limited or blocked on {url}. Try again with longer delay.")
         
         # For other errors, return empty list rather than failing completely
@@ -178,16 +254,21 @@ async def scrape_multiple_urls(
     """
     Scrape products from multiple URLs efficiently.
     
+    URLs on different hosts are scraped concurrently (up to
+    max_concurrent_scrapes); URLs on the same host still run one at a time,
+    paced by the per-host rate limiter.
+    
     Args:
         ctx: Pydantic AI run context
         url_configs: List of URL configuration dictionaries
         
     Returns:
-        Combined list of all scraped products
+        Combined list of all scraped products, in url_configs order
     """
-    all_products = []
+    semaphore = asyncio.Semaphore(ctx.deps.max_concurrent_scrapes)
+    host_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
     
-    for url_config in url_configs:
+    async def scrape_one(url_config: Dict[str, Any]) -> List[ScrapedProduct]:
         try:
             # Parse URL config
             url = url_config["url"]
@@ -196,25 +277,23 @@ async def scrape_multiple_urls(
             expected_count = url_config.get("expected_count", 10)
             custom_selectors = url_config.get("custom_selectors")
             
-            # Scrape products from this URL
-            products = await scrape_products_from_url(
-                ctx=ctx,
-                url=url,
-                platform=platform,
-                category=category,
-                expected_count=expected_count,
-                custom_selectors=custom_selectors
-            )
-            
-            all_products.extend(products)
-            
-            # Delay between URLs to be respectful
-            inter_url_delay = ctx.deps.scraping_delay_seconds * 2
-            await asyncio.sleep(inter_url_delay)
-            
+            async with host_locks[urlparse(url).hostname or url], semaphore:
+                # Scrape products from this URL
+                return await scrape_products_from_url(
+                    ctx=ctx,
+                    url=url,
+                    platform=platform,
+                    category=category,
+                    expected_count=expected_count,
+                    custom_selectors=custom_selectors
+                )
+                
         except Exception as e:
             logger.warning(f"Failed to scrape URL {url_config.get('url', 'unknown')}: {e}")
-            continue
+            return []
+    
+    results = await asyncio.gather(*(scrape_one(url_config) for url_config in url_configs))
+    all_products = [product for products in results for product in products]
     
     logger.info(f"Scraped total of {len(all_products)} products from {len(url_configs)} URLs")
     return all_products
@@ -234,49 +313,68 @@ async def test_url_accessibility(
     Returns:
         Dictionary with accessibility info
     """
-    playwright, browser, context = await create_browser_context()
-    
     try:
-        page = await context.new_page()
-        
-        start_time = asyncio.get_event_loop().time()
-        response = await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-        load_time = asyncio.get_event_loop().time() - start_time
-        
-        # Extract basic page info
-        title = await page.title()
-        url_final = page.url  # After redirects
-        
-        # Check for common issues
-        issues = []
-        if response.status >= 400:
-            issues.append(f"HTTP {response.status}")
-        
-        if await page.query_selector("#captcha, .captcha"):
-            issues.append("CAPTCHA detected")
-        
-        if "blocked" in title.lower() or "access denied" in title.lower():
-            issues.append("Access blocked")
-        
-        return {
-            "accessible": response.status < 400 and not issues,
-            "status_code": response.status,
-            "load_time_seconds": round(load_time, 2),
-            "title": title,
-            "final_url": url_final,
-            "issues": issues
-        }
-        
+        async with BrowserPool.page() as (_, page):
+            start_time = asyncio.get_event_loop().time()
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+            load_time = asyncio.get_event_loop().time() - start_time
+            
+            # Extract basic page info, checking for a CAPTCHA in the same round-trip
+            captcha, title = await page.evaluate(_BOT_CHECK_JS, _CAPTCHA_INDICATORS)
+            url_final = page.url  # After redirects
+            
+            # Check for common issues
+            issues = []
+            if response.status >= 400:
+                issues.append(f"HTTP {response.status}")
+            
+            if captcha:
+                issues.append("CAPTCHA detected")
+            
+            if _ACCESS_BLOCKED_TITLE_RE.search(title):
+                issues.append("Access blocked")
+            
+            return {
+                "accessible": response.status < 400 and not issues,
+                "status_code": response.status,
+                "load_time_seconds": round(load_time, 2),
+                "title": title,
+                "final_url": url_final,
+                "issues": issues
+            }
+            
     except Exception as e:
         return {
             "accessible": False,
             "error": str(e),
             "issues": ["Connection failed"]
         }
-    finally:
-        await context.close()
-        await browser.close()
-        await playwright.stop()
+
+
+async def _wait_until_ready(page: Page, ready_selector: Optional[str]) -> None:
+    """Wait until the page's products are in the DOM (network idle without a selector)."""
+    try:
+        if ready_selector:
+            await page.wait_for_selector(ready_selector, state="attached", timeout=15000)
+        else:
+            await page.wait_for_load_state("networkidle", timeout=15000)
+    except PlaywrightTimeoutError:
+        # Bot detection and the platform extractor report what's actually missing
+        logger.debug(f"Page not ready after waiting for {ready_selector or 'network idle'}")
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
 
 
 async def _handle_bot_detection(page: Page, url: str) -> None:
@@ -284,30 +382,18 @@ async def _handle_bot_detection(page: Page, url: str) -> None:
     # Wait a moment for any detection scripts to run
     await asyncio.sleep(1)
     
-    # Check for common bot detection indicators
-    bot_indicators = [
-        "#captcha",
-        ".captcha",
-        "[aria-label*='captcha']",
-        "input[name*='captcha']",
-        ".cf-browser-verification",  # Cloudflare
-        "#challenge-form",  # Generic challenge
-        ".anti-bot",
-        ".bot-detection"
-    ]
-    
-    for indicator in bot_indicators:
-        if await page.query_selector(indicator):
-            raise ModelRetry(f"Bot detection triggered on {url}. Please retry with different parameters.")
+    # Check for common bot detection indicators and read the title in one round-trip
+    matched_indicator, title = await page.evaluate(_BOT_CHECK_JS, _BOT_INDICATORS)
+    if matched_indicator:
+        raise ModelRetry(f"Bot detection triggered on {url}. Please retry with different parameters.")
     
     # Check page title for bot detection
-    title = await page.title()
-    if any(phrase in title.lower() for phrase in ["blocked", "captcha", "verification", "challenge"]):
+    if _BOT_TITLE_RE.search(title):
         raise ModelRetry(f"Bot detection in page title on {url}: {title}")
     
     # Check for redirects to known bot detection pages
     current_url = page.url
-    if any(domain in current_url.lower() for domain in ["captcha", "challenge", "blocked"]):
+    if _BOT_URL_RE.search(current_url):
         raise ModelRetry(f"Redirected to bot detection page: {current_url}")
 
 
@@ -329,10 +415,9 @@ async def simulate_human_behavior(page: Page) -> None:
     # Hover over a random element occasionally
     if random.random() < 0.3:  # 30% chance
         try:
-            elements = await page.query_selector_all("a, button, .product")
-            if elements:
-                random_element = random.choice(elements)
-                await random_element.hover()
+            target = await page.evaluate(_HOVER_TARGET_JS)
+            if target:
+                await page.mouse.move(*target)
                 await asyncio.sleep(random.uniform(0.2, 0.8))
         except Exception:
             pass  # Ignore hover errors
\ No newline at end of file
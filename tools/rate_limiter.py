@@ -0,0 +1,90 @@
+"""
+Adaptive per-host request pacing for the scraping tools.
+
+Each host gets a token bucket holding a single token, refilled at a rate that
+adapts to how the host responds: successful loads let the rate climb back
+towards the configured ceiling, while blocks and throttling halve it. A host
+that has been idle can be hit straight away, and one that starts pushing back
+is slowed down quickly instead of being retried at full speed.
+"""
+
+from typing import Dict, Optional
+import asyncio
+import random
+import time
+
+
+class HostRateLimiter:
+    """
+    Additive-increase / multiplicative-decrease rate limiter keyed by host.
+    
+    The pace never exceeds one request per configured delay; failures lower it
+    down to min_rate and each success wins back recovery_step.
+    """
+    
+    def __init__(
+        self,
+        min_rate: float = 1 / 60,
+        recovery_step: float = 0.05,
+        backoff_factor: float = 0.5,
+        jitter_seconds: float = 0.5
+    ):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            min_rate: Slowest pace a host is backed off to, in requests per second
+            recovery_step: Requests per second regained after each success
+            backoff_factor: Multiplier applied to a host's rate after a failure
+            jitter_seconds: Upper bound of the random delay added to every wait
+        """
+        self.min_rate = min_rate
+        self.recovery_step = recovery_step
+        self.backoff_factor = backoff_factor
+        self.jitter_seconds = jitter_seconds
+        
+        self._rates: Dict[str, float] = {}
+        self._max_rates: Dict[str, float] = {}
+        self._next_slot: Dict[str, float] = {}
+    
+    async def acquire(self, host: str, min_interval: float) -> None:
+        """
+        Wait until the host's next request slot.
+        
+        Args:
+            host: Host the request goes to
+            min_interval: Configured delay; at most one request per this many seconds
+        """
+        max_rate = 1.0 / min_interval
+        self._max_rates[host] = max_rate
+        rate = min(self._rates.setdefault(host, max_rate), max_rate)
+        
+        # Reason: reserve the slot before sleeping so concurrent callers for the
+        # same host queue up behind each other instead of sharing one token
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + 1.0 / rate
+        
+        wait = slot - now + random.uniform(0, self.jitter_seconds)
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    def on_success(self, host: str) -> None:
+        """Let the host's rate recover after a successful load."""
+        if host in self._rates:
+            self._rates[host] = min(self._max_rates[host], self._rates[host] + self.recovery_step)
+    
+    def on_failure(self, host: str, retry_after: Optional[float] = None) -> None:
+        """
+        Back off the host after a block, throttle or timeout.
+        
+        Args:
+            host: Host that failed
+            retry_after: Seconds the server asked us to wait (Retry-After), if any
+        """
+        rate = self._rates.get(host, self._max_rates.get(host, 1.0))
+        self._rates[host] = max(self.min_rate, rate * self.backoff_factor)
+        
+        if retry_after:
+            hold_until = time.monotonic() + retry_after
+            self._next_slot[host] = max(self._next_slot.get(host, hold_until), hold_until)
@@ -0,0 +1,95 @@
+"""
+Reuse of recent and in-flight scrape results for the scraping tools.
+
+The agent often asks for the same URL more than once in a run. Calls that
+overlap share a single page load, and a non-empty result is kept for a few
+minutes so a repeat request doesn't load the page again. Every caller gets
+its own copies of the products, because callers go on to re-score and update
+them.
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+import asyncio
+import logging
+import time
+
+from agents.models import ScrapedProduct
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeResultCache:
+    """
+    Time-limited LRU cache of scrape results with in-flight deduplication.
+    
+    Keys must cover everything that shapes a result (URL, platform, selectors,
+    quality threshold, ...). Failures and empty results are never cached, so
+    the next call tries the page again.
+    """
+    
+    def __init__(self, max_entries: int = 64, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        
+        # Recent non-empty results with when they finished, least recently used first
+        self._results: "OrderedDict[Tuple[Any, ...], Tuple[float, List[ScrapedProduct]]]" = OrderedDict()
+        # Scrapes currently running
+        self._inflight: Dict[Tuple[Any, ...], "asyncio.Task[List[ScrapedProduct]]"] = {}
+    
+    async def get_or_scrape(
+        self,
+        key: Tuple[Any, ...],
+        scrape: Callable[[], Awaitable[List[ScrapedProduct]]],
+        url: str
+    ) -> List[ScrapedProduct]:
+        """
+        Return products for key from the cache, a running scrape, or a new one.
+        
+        Args:
+            key: Hashable description of everything that shapes the result
+            scrape: Starts the scrape when neither a fresh result nor a running
+                scrape exists for key
+            url: URL being scraped, for logging
+            
+        Returns:
+            This caller's own copies of the products
+        """
+        cached = self._results.get(key)
+        if cached is not None:
+            age = time.monotonic() - cached[0]
+            if age < self.ttl_seconds:
+                self._results.move_to_end(key)
+                logger.info(f"Reusing {len(cached[1])} products scraped from {url} {age:.0f}s ago")
+                return _copy_products(cached[1])
+            del self._results[key]
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(scrape())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            logger.info(f"Joining in-flight scrape of {url}")
+        
+        # Reason: shield so one caller being cancelled doesn't cancel the scrape the
+        # others are waiting on
+        return _copy_products(await asyncio.shield(task))
+    
+    def _finish(self, key: Tuple[Any, ...], task: "asyncio.Task[List[ScrapedProduct]]") -> None:
+        """Drop a finished scrape from the in-flight map and cache its products if it found any."""
+        self._inflight.pop(key, None)
+        
+        if task.cancelled() or task.exception() is not None or not task.result():
+            return
+        
+        # Cached separately from the copies handed to callers, so their edits never reach it
+        self._results[key] = (time.monotonic(), _copy_products(task.result()))
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+
+def _copy_products(products: List[ScrapedProduct]) -> List[ScrapedProduct]:
+    """Per-caller copies of shared products, which callers go on to re-score and update."""
+    return [product.model_copy() for product in products]
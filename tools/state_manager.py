@@ -5,21 +5,33 @@ This module provides tools for the Pydantic AI agent to save and restore
 scraping state, enabling graceful recovery from failures.
 """
 
-from typing import List, Dict, Any, Optional
-import json
+from collections import defaultdict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import gzip
 import logging
 from pathlib import Path
 from datetime import datetime, timedelta
 
 from pydantic_ai import RunContext
+from pydantic_core import to_json
 
 from agents.models import (
     ProductCard, StateData, ScrapingResult, 
     AgentDependencies
 )
+from tools.state_store import (
+    counter_file_for, delete_state_files_older_than, list_state_files,
+    load_failure_count, read_state_dict, read_state_file, save_summary_index,
+    scan_state_files, summarize_state_file, write_failure_count, write_state_file
+)
 
 logger = logging.getLogger(__name__)
 
+# Serializes read-modify-write updates of the same state file
+_STATE_LOCKS: Dict[Path, asyncio.Lock] = defaultdict(asyncio.Lock)
+
 
 class StateManagementError(Exception):
     """Exception raised when state management operations fail."""
@@ -48,10 +60,7 @@ async def save_scraping_state(
         Path to saved state file
     """
     try:
-        state_dir = Path(ctx.deps.state_directory)
-        state_dir.mkdir(parents=True, exist_ok=True)
-        
-        state_file = state_dir / f"{site_name}_state.json"
+        state_file = _state_dir(ctx.deps.state_directory) / f"{site_name}_state.json"
         
         # Create state data
         state_data = StateData(
@@ -62,9 +71,9 @@ async def save_scraping_state(
             consecutive_failures=0  # Reset on successful save
         )
         
-        # Save to file
-        with open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state_data.model_dump(mode='json'), f, indent=2, default=str)
+        # Save to file off the event loop
+        async with _STATE_LOCKS[state_file]:
+            await asyncio.to_thread(write_state_file, state_file, state_data)
         
         logger.info(f"Saved state for {site_name} with {len(products)} products")
         return str(state_file)
@@ -90,29 +99,18 @@ async def load_last_good_state(
         StateData object if found, None otherwise
     """
     try:
-        state_file = Path(ctx.deps.state_directory) / f"{site_name}_state.json"
+        state_file = _state_dir(ctx.deps.state_directory) / f"{site_name}_state.json"
         
-        if not state_file.exists():
+        state_data = await read_state_file(state_file)
+        if state_data is None:
             logger.info(f"No previous state found for {site_name}")
             return None
         
-        with open(state_file, 'r', encoding='utf-8') as f:
-            state_dict = json.load(f)
-        
-        # Parse datetime strings back to datetime objects
-        if 'last_successful_scrape' in state_dict:
-            state_dict['last_successful_scrape'] = datetime.fromisoformat(
-                state_dict['last_successful_scrape'].replace('Z', '+00:00')
-            )
-        
-        if 'last_result' in state_dict and 'timestamp' in state_dict['last_result']:
-            state_dict['last_result']['timestamp'] = datetime.fromisoformat(
-                state_dict['last_result']['timestamp'].replace('Z', '+00:00')
-            )
+        # Failures since the last save live in a small sidecar file
+        failures = await load_failure_count(counter_file_for(state_file))
+        if failures is not None and failures != state_data.consecutive_failures:
+            state_data = state_data.model_copy(update={"consecutive_failures": failures})
         
-        state_data = StateData(**state_dict)
-        
-        logger.info(f"Loaded state for {site_name} from {state_data.last_successful_scrape}")
         return state_data
         
     except Exception as e:
@@ -135,44 +133,51 @@ async def increment_failure_count(
         New failure count
     """
     try:
-        state_data = await load_last_good_state(ctx, site_name)
+        state_file = _state_dir(ctx.deps.state_directory) / f"{site_name}_state.json"
         
-        if state_data:
-            state_data.consecutive_failures += 1
-        else:
-            # Create new state with failure
-            state_data = StateData(
-                site_name=site_name,
-                last_successful_scrape=datetime.now(),
-                last_products=[],
-                last_result=ScrapingResult(
+        async with _STATE_LOCKS[state_file]:
+            # Usually served from the in-memory cache rather than re-read from disk
+            state_data = await load_last_good_state(ctx, site_name)
+            
+            if state_data:
+                # Reason: only the small sidecar is rewritten, so a failing site
+                # doesn't re-serialize its whole product cache on every failure
+                failures = state_data.consecutive_failures + 1
+                await asyncio.to_thread(write_failure_count, counter_file_for(state_file), failures)
+            else:
+                # Create new state with failure
+                failures = 1
+                state_data = StateData(
                     site_name=site_name,
-                    total_products_found=0,
-                    valid_products=0,
-                    failed_products=0,
-                    processing_time_seconds=0.0,
-                    quality_score=0.0,
-                    output_file_path=""
-                ),
-                consecutive_failures=1
-            )
-        
-        # Save updated state
-        state_dir = Path(ctx.deps.state_directory)
-        state_dir.mkdir(parents=True, exist_ok=True)
-        state_file = state_dir / f"{site_name}_state.json"
-        
-        with open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state_data.model_dump(mode='json'), f, indent=2, default=str)
-        
-        logger.warning(f"Incremented failure count for {site_name} to {state_data.consecutive_failures}")
-        return state_data.consecutive_failures
+                    last_successful_scrape=datetime.now(),
+                    last_products=[],
+                    last_result=ScrapingResult(
+                        site_name=site_name,
+                        total_products_found=0,
+                        valid_products=0,
+                        failed_products=0,
+                        processing_time_seconds=0.0,
+                        quality_score=0.0,
+                        output_file_path=""
+                    ),
+                    consecutive_failures=failures
+                )
+                await asyncio.to_thread(write_state_file, state_file, state_data)
+        
+        logger.warning(f"Incremented failure count for {site_name} to {failures}")
+        return failures
         
     except Exception as e:
         logger.error(f"Failed to increment failure count for {site_name}: {e}")
         return 1  # Assume at least one failure
 
 
+@lru_cache(maxsize=16)
+def _state_dir(state_directory: str) -> Path:
+    """Path for a configured state directory, built once per directory string."""
+    return Path(state_directory)
+
+
 async def should_use_cached_data(
     ctx: RunContext[AgentDependencies],
     site_name: str,
@@ -247,23 +252,10 @@ async def merge_with_cached_data(
         
         if merge_strategy == "replace":
             # Prefer new products, use cached only to fill gaps
-            merged = new_products.copy()
-            
-            # Add cached products that aren't in new products (by title)
-            new_titles = {p.title.lower() for p in new_products}
-            for cached_product in cached_products:
-                if cached_product.title.lower() not in new_titles:
-                    merged.append(cached_product)
-                    
+            merged = _merge_by_title(new_products, cached_products)
         elif merge_strategy == "supplement":
             # Use cached products as base, add new ones
-            merged = cached_products.copy()
-            
-            # Add new products that aren't in cached (by title)
-            cached_titles = {p.title.lower() for p in cached_products}
-            for new_product in new_products:
-                if new_product.title.lower() not in cached_titles:
-                    merged.append(new_product)
+            merged = _merge_by_title(cached_products, new_products)
         else:
             raise ValueError(f"Unknown merge strategy: {merge_strategy}")
         
@@ -279,6 +271,15 @@ async def merge_with_cached_data(
         return new_products  # Fallback to new products only
 
 
+def _merge_by_title(
+    base_products: List[ProductCard],
+    extra_products: List[ProductCard]
+) -> List[ProductCard]:
+    """Base products in order, then extras whose title (case-insensitive) isn't among them."""
+    base_titles = {p.title.lower() for p in base_products}
+    return [*base_products, *(p for p in extra_products if p.title.lower() not in base_titles)]
+
+
 async def cleanup_old_state_files(
     ctx: RunContext[AgentDependencies],
     max_age_days: int = 30
@@ -294,29 +295,17 @@ async def cleanup_old_state_files(
         Dictionary with cleanup statistics
     """
     try:
-        state_dir = Path(ctx.deps.state_directory)
+        state_dir = _state_dir(ctx.deps.state_directory)
         
         if not state_dir.exists():
             return {"total_files": 0, "deleted_files": 0}
         
         cutoff_time = datetime.now() - timedelta(days=max_age_days)
         
-        deleted_count = 0
-        total_count = 0
-        
-        for state_file in state_dir.glob("*_state.json"):
-            total_count += 1
-            
-            # Check file modification time
-            file_mtime = datetime.fromtimestamp(state_file.stat().st_mtime)
-            
-            if file_mtime < cutoff_time:
-                try:
-                    state_file.unlink()
-                    deleted_count += 1
-                    logger.debug(f"Deleted old state file: {state_file}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete {state_file}: {e}")
+        # Directory scan, stats and unlinks are blocking; run them in a worker thread
+        total_count, deleted_count = await asyncio.to_thread(
+            delete_state_files_older_than, state_dir, cutoff_time
+        )
         
         logger.info(f"State cleanup: deleted {deleted_count} out of {total_count} files")
         
@@ -344,35 +333,38 @@ async def get_state_summary(
         Dictionary with state summary for all sites
     """
     try:
-        state_dir = Path(ctx.deps.state_directory)
+        state_dir = _state_dir(ctx.deps.state_directory)
         
         if not state_dir.exists():
             return {"sites": {}, "total_sites": 0}
         
-        sites_summary = {}
+        # One directory pass for every state file's version, plus the index of
+        # summaries built from earlier versions
+        state_files, index = await asyncio.to_thread(scan_state_files, state_dir)
+        
+        # Read and summarize only the files that changed, concurrently
+        stale_sites = [
+            site_name for site_name, (_, version) in state_files.items()
+            if index.get(site_name, {}).get("version") != version
+        ]
+        summaries = await asyncio.gather(
+            *(asyncio.to_thread(summarize_state_file, state_files[site_name][0]) for site_name in stale_sites),
+            return_exceptions=True
+        )
+        fresh_summaries = dict(zip(stale_sites, summaries))
         
-        for state_file in state_dir.glob("*_state.json"):
-            site_name = state_file.stem.replace("_state", "")
-            
-            try:
-                with open(state_file, 'r', encoding='utf-8') as f:
-                    state_dict = json.load(f)
-                
-                # Extract key information
-                last_scrape = state_dict.get('last_successful_scrape')
-                consecutive_failures = state_dict.get('consecutive_failures', 0)
-                product_count = len(state_dict.get('last_products', []))
-                
-                sites_summary[site_name] = {
-                    "last_scrape": last_scrape,
-                    "consecutive_failures": consecutive_failures,
-                    "cached_products": product_count,
-                    "health_status": "healthy" if consecutive_failures == 0 else 
-                                   "warning" if consecutive_failures < 3 else "critical"
-                }
-                
-            except Exception as e:
-                sites_summary[site_name] = {"error": str(e)}
+        sites_summary = {}
+        new_index = {}
+        for site_name, (_, version) in state_files.items():
+            summary = fresh_summaries.get(site_name, index.get(site_name, {}).get("summary"))
+            if isinstance(summary, Exception):
+                sites_summary[site_name] = {"error": str(summary)}
+            else:
+                sites_summary[site_name] = summary
+                new_index[site_name] = {"version": version, "summary": summary}
+        
+        if new_index != index:
+            await save_summary_index(state_dir, new_index)
         
         return {
             "sites": sites_summary,
@@ -392,6 +384,8 @@ async def export_state_backup(
     """
     Export all state data to a backup file.
     
+    Backups are gzip-compressed JSON unless a custom backup_path doesn't end in ".gz".
+    
     Args:
         ctx: Pydantic AI run context
         backup_path: Optional custom backup path
@@ -400,35 +394,34 @@ async def export_state_backup(
         Path to backup file
     """
     try:
-        state_dir = Path(ctx.deps.state_directory)
+        state_dir = _state_dir(ctx.deps.state_directory)
         
         if backup_path:
             backup_file = Path(backup_path)
         else:
-            backup_file = state_dir / f"state_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            backup_file = state_dir / f"state_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json.gz"
+        
+        await asyncio.to_thread(backup_file.parent.mkdir, parents=True, exist_ok=True)
         
-        backup_file.parent.mkdir(parents=True, exist_ok=True)
+        # Read every state file concurrently in worker threads
+        state_files = await list_state_files(state_dir)
+        states = await asyncio.gather(
+            *(asyncio.to_thread(read_state_dict, state_file) for state_file in state_files),
+            return_exceptions=True
+        )
         
         all_states = {}
         
-        for state_file in state_dir.glob("*_state.json"):
+        for state_file, state in zip(state_files, states):
             site_name = state_file.stem.replace("_state", "")
             
-            try:
-                with open(state_file, 'r', encoding='utf-8') as f:
-                    all_states[site_name] = json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to read state for {site_name}: {e}")
-                all_states[site_name] = {"error": str(e)}
-        
-        backup_data = {
-            "backup_timestamp": datetime.now().isoformat(),
-            "total_sites": len(all_states),
-            "states": all_states
-        }
+            if isinstance(state, Exception):
+                logger.warning(f"Failed to read state for {site_name}: {state}")
+                all_states[site_name] = {"error": str(state)}
+            else:
+                all_states[site_name] = state
         
-        with open(backup_file, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, indent=2, default=str)
+        await asyncio.to_thread(_write_state_backup, backup_file, datetime.now().isoformat(), all_states)
         
         logger.info(f"Exported state backup to {backup_file}")
         return str(backup_file)
@@ -436,4 +429,27 @@ async def export_state_backup(
     except Exception as e:
         error_msg = f"Failed to export state backup: {e}"
         logger.error(error_msg)
-        raise StateManagementError(error_msg)
\ No newline at end of file
+        raise StateManagementError(error_msg)
+
+
+def _write_state_backup(backup_file: Path, backup_timestamp: str, all_states: Dict[str, Any]) -> None:
+    """
+    Write the backup document one site at a time.
+    
+    Each site's state is serialized and (for ".gz" paths) compressed as it's
+    written, so no single buffer holds the whole backup.
+    """
+    if backup_file.suffix == ".gz":
+        backup = gzip.open(backup_file, 'wb', compresslevel=6)
+    else:
+        backup = open(backup_file, 'wb')
+    
+    with backup as f:
+        f.write(b'{"backup_timestamp":' + to_json(backup_timestamp))
+        f.write(b',"total_sites":' + to_json(len(all_states)))
+        f.write(b',"states":{')
+        for index, (site_name, state) in enumerate(all_states.items()):
+            if index:
+                f.write(b',')
+            f.write(to_json(site_name) + b':' + to_json(state, fallback=str))
+        f.write(b'}}')
@@ -0,0 +1,292 @@
+"""
+On-disk storage behind the state management tools.
+
+Each site has a "{site}_state.json" file holding its last good products and a
+small "{site}_counter.json" sidecar for failures recorded since then. Files are
+replaced atomically, reads are cached per file version, and state summaries
+are kept in a per-directory index so unchanged files aren't re-read.
+"""
+
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+from pydantic_core import from_json, to_json
+
+from agents.models import StateData
+
+logger = logging.getLogger(__name__)
+
+# Last state read or written per state file with its (mtime, size), so repeat lookups
+# (several per scrape) skip the read and parse while the file is unchanged.
+# Cached StateData is shared with callers and must be treated as read-only.
+_STATE_CACHE: Dict[Path, Tuple[Tuple[int, int], StateData]] = {}
+
+# Same idea for the failure-count sidecars, caching (version, consecutive_failures)
+_COUNTER_CACHE: Dict[Path, Tuple[Tuple[int, int], int]] = {}
+
+# Per-directory index of site summaries, each stored with the state and sidecar
+# file versions it was built from, so get_state_summary only re-reads the files
+# that changed since the last summary
+_SUMMARY_INDEX_NAME = "_summary_index.json"
+_SUMMARY_INDEX_LOCK = asyncio.Lock()
+
+# Recent "*_state.json" listings per state directory with the monotonic time they
+# were taken, so bursts of summary/backup calls don't re-scan the directory
+_STATE_LISTINGS: Dict[Path, Tuple[float, List[Path]]] = {}
+_STATE_LISTING_TTL_SECONDS = 2.0
+
+
+def _replace_file(path: Path, data: bytes) -> None:
+    """Atomically replace path's contents with data."""
+    # Reason: write a temp file, fsync it and rename it over the original, so a
+    # crash mid-write leaves the previous contents intact instead of a truncated file
+    tmp_file = path.with_name(f"{path.name}.tmp")
+    try:
+        f = open(tmp_file, 'wb')
+    except FileNotFoundError:
+        # Only create the directory when it's actually missing instead of
+        # issuing a mkdir on every save
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(tmp_file, 'wb')
+    with f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def counter_file_for(state_file: Path) -> Path:
+    """Failure-count sidecar for a "{site}_state.json" file."""
+    return state_file.with_name(f"{state_file.name.removesuffix('_state.json')}_counter.json")
+
+
+def write_failure_count(counter_file: Path, failures: int) -> None:
+    """Write a site's consecutive failure count to its sidecar file."""
+    _replace_file(counter_file, to_json({
+        "consecutive_failures": failures,
+        "updated_at": datetime.now().isoformat()
+    }))
+    
+    file_stat = counter_file.stat()
+    _COUNTER_CACHE[counter_file] = ((file_stat.st_mtime_ns, file_stat.st_size), failures)
+
+
+def _remove_failure_count(counter_file: Path) -> None:
+    """Delete a failure-count sidecar, if there is one."""
+    counter_file.unlink(missing_ok=True)
+    _COUNTER_CACHE.pop(counter_file, None)
+
+
+async def load_failure_count(counter_file: Path) -> Optional[int]:
+    """Consecutive failures recorded in a sidecar file, or None if there isn't one."""
+    try:
+        file_stat = counter_file.stat()
+    except FileNotFoundError:
+        return None
+    
+    version = (file_stat.st_mtime_ns, file_stat.st_size)
+    cached = _COUNTER_CACHE.get(counter_file)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    counter = from_json(await asyncio.to_thread(counter_file.read_bytes))
+    failures = int(counter["consecutive_failures"])
+    _COUNTER_CACHE[counter_file] = (version, failures)
+    return failures
+
+
+async def read_state_file(state_file: Path) -> Optional[StateData]:
+    """
+    Load a state file, reusing the cached parse while the file is unchanged.
+    
+    The sidecar's failure count is not applied; see load_failure_count.
+    
+    Returns:
+        StateData, or None if the file doesn't exist
+    """
+    try:
+        file_stat = state_file.stat()
+    except FileNotFoundError:
+        return None
+    
+    version = (file_stat.st_mtime_ns, file_stat.st_size)
+    cached = _STATE_CACHE.get(state_file)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    # Read, parse and validate off the event loop; pydantic reads the ISO
+    # datetimes itself. The stat above stays inline since it's cheaper than a hop
+    raw_state = await asyncio.to_thread(state_file.read_bytes)
+    state_data = StateData.model_validate_json(raw_state)
+    _STATE_CACHE[state_file] = (version, state_data)
+    
+    logger.info(f"Loaded state for {state_data.site_name} from {state_data.last_successful_scrape}")
+    return state_data
+
+
+def write_state_file(state_file: Path, state_data: StateData) -> None:
+    """Write state atomically and remember it as the file's cached contents."""
+    _replace_file(state_file, state_data.model_dump_json(indent=2).encode('utf-8'))
+    
+    file_stat = state_file.stat()
+    _STATE_CACHE[state_file] = ((file_stat.st_mtime_ns, file_stat.st_size), state_data)
+    
+    # The full state carries the current failure count, superseding any sidecar
+    _remove_failure_count(counter_file_for(state_file))
+    
+    # A new site's file has to show up in the next summary straight away
+    listing = _STATE_LISTINGS.get(state_file.parent)
+    if listing is not None and state_file not in listing[1]:
+        _STATE_LISTINGS.pop(state_file.parent, None)
+
+
+async def list_state_files(state_dir: Path) -> List[Path]:
+    """
+    List the state files in a directory, reusing a listing taken in the last few seconds.
+    
+    The returned list is shared with other callers and must not be modified.
+    """
+    cached = _STATE_LISTINGS.get(state_dir)
+    if cached is not None and time.monotonic() - cached[0] < _STATE_LISTING_TTL_SECONDS:
+        return cached[1]
+    
+    listed_at = time.monotonic()
+    state_files = await asyncio.to_thread(list, state_dir.glob("*_state.json"))
+    _STATE_LISTINGS[state_dir] = (listed_at, state_files)
+    return state_files
+
+
+def delete_state_files_older_than(state_dir: Path, cutoff_time: datetime) -> Tuple[int, int]:
+    """Delete sites' state whose state file and failure sidecar are both older than cutoff_time.
+    
+    Sidecars left without a state file are deleted once they're older than cutoff_time.
+    
+    Returns:
+        Tuple of (state files found, state files deleted)
+    """
+    deleted_count = 0
+    cutoff_timestamp = cutoff_time.timestamp()
+    _STATE_LISTINGS.pop(state_dir, None)
+    
+    # Reason: scandir yields names and stat results without building a Path per
+    # file, and mtimes are compared as raw timestamps; only deleted files get a Path
+    state_mtimes: Dict[str, float] = {}
+    counter_mtimes: Dict[str, float] = {}
+    with os.scandir(state_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith("_state.json"):
+                state_mtimes[entry.path] = entry.stat().st_mtime
+            elif entry.name.endswith("_counter.json"):
+                counter_mtimes[entry.name] = entry.stat().st_mtime
+    
+    for path, state_mtime in state_mtimes.items():
+        state_file = Path(path)
+        counter_file = counter_file_for(state_file)
+        
+        # A failing site only touches its sidecar, so the pair counts as recent
+        # if either file is; this keeps the last good state of a site still failing
+        if max(state_mtime, counter_mtimes.pop(counter_file.name, 0.0)) >= cutoff_timestamp:
+            continue
+        
+        try:
+            state_file.unlink()
+            _STATE_CACHE.pop(state_file, None)
+            _remove_failure_count(counter_file)
+            deleted_count += 1
+            logger.debug(f"Deleted old state file: {state_file}")
+        except Exception as e:
+            logger.warning(f"Failed to delete {state_file}: {e}")
+    
+    # Whatever is left are sidecars whose state file is gone (deleted by hand or
+    # lost in a crash); nothing would ever clean those up otherwise
+    for name, counter_mtime in counter_mtimes.items():
+        if counter_mtime >= cutoff_timestamp:
+            continue
+        
+        try:
+            _remove_failure_count(state_dir / name)
+            logger.debug(f"Deleted orphaned failure count file: {name}")
+        except Exception as e:
+            logger.warning(f"Failed to delete {name}: {e}")
+    
+    return len(state_mtimes), deleted_count
+
+
+def scan_state_files(state_dir: Path) -> Tuple[Dict[str, Tuple[Path, List[Any]]], Dict[str, Any]]:
+    """
+    List each site's state file with its version, and load the summary index.
+    
+    A version is the (mtime_ns, size) of the state file followed by those of its
+    failure-count sidecar, or None for both when the site has no sidecar.
+    
+    Returns:
+        Tuple of ({site name: (state file, version)}, summary index)
+    """
+    state_entries = {}
+    counter_versions = {}
+    with os.scandir(state_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith("_state.json"):
+                state_entries[entry.name] = entry
+            elif entry.name.endswith("_counter.json"):
+                file_stat = entry.stat()
+                counter_versions[entry.name] = [file_stat.st_mtime_ns, file_stat.st_size]
+    
+    state_files = {}
+    for entry in state_entries.values():
+        state_file = Path(entry.path)
+        file_stat = entry.stat()
+        counter_version = counter_versions.get(counter_file_for(state_file).name, [None, None])
+        site_name = state_file.stem.replace("_state", "")
+        state_files[site_name] = (state_file, [file_stat.st_mtime_ns, file_stat.st_size, *counter_version])
+    
+    try:
+        index = from_json((state_dir / _SUMMARY_INDEX_NAME).read_bytes())
+    except (OSError, ValueError):
+        index = {}
+    
+    return state_files, index if isinstance(index, dict) else {}
+
+
+async def save_summary_index(state_dir: Path, index: Dict[str, Any]) -> None:
+    """Persist the summary index; failing to is logged, since it's only a cache."""
+    try:
+        async with _SUMMARY_INDEX_LOCK:
+            await asyncio.to_thread(_replace_file, state_dir / _SUMMARY_INDEX_NAME, to_json(index))
+    except Exception as e:
+        logger.debug(f"Failed to save state summary index: {e}")
+
+
+def read_state_dict(state_file: Path) -> Dict[str, Any]:
+    """Read one state file as plain JSON data (no model validation), with its current failure count."""
+    state_dict = from_json(state_file.read_bytes())
+    try:
+        counter = from_json(counter_file_for(state_file).read_bytes())
+    except FileNotFoundError:
+        return state_dict
+    
+    state_dict["consecutive_failures"] = counter["consecutive_failures"]
+    return state_dict
+
+
+def summarize_state_file(state_file: Path) -> Dict[str, Any]:
+    """Read one state file and extract the fields shown in the state summary."""
+    state_dict = read_state_dict(state_file)
+    
+    # Extract key information
+    last_scrape = state_dict.get('last_successful_scrape')
+    consecutive_failures = state_dict.get('consecutive_failures', 0)
+    product_count = len(state_dict.get('last_products', []))
+    
+    return {
+        "last_scrape": last_scrape,
+        "consecutive_failures": consecutive_failures,
+        "cached_products": product_count,
+        "health_status": "healthy" if consecutive_failures == 0 else 
+                       "warning" if consecutive_failures < 3 else "critical"
+    }